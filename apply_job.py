@@ -0,0 +1,190 @@
+"""
+Auto Style Manager - apply to existing layers
+Chunked, cancellable restyling of every layer in the project
+"""
+
+from collections import namedtuple
+from qgis.PyQt.QtCore import QObject, QTimer, Qt, pyqtSignal
+from qgis.PyQt.QtWidgets import QProgressDialog
+from qgis.core import QgsApplication, QgsProject, QgsRasterLayer, QgsTask, QgsVectorLayer
+
+
+# Plain-data copy of a layer taken on the GUI thread for the worker thread
+LayerSnapshot = namedtuple('LayerSnapshot', ['layer_id', 'kind', 'provider', 'source', 'name'])
+
+# One planned styling step; basemap is only meaningful for rasters
+PlanItem = namedtuple('PlanItem', ['layer_id', 'kind', 'basemap'])
+
+
+class PlanLayersTask(QgsTask):
+    """Classify layer snapshots off the GUI thread"""
+    
+    def __init__(self, classifier, profile, snapshots):
+        super().__init__("Auto Style Manager: planning restyle", QgsTask.CanCancel)
+        self.classifier = classifier
+        self.profile = profile
+        self.snapshots = snapshots
+        self.plan = []
+    
+    def run(self):
+        total = len(self.snapshots) or 1
+        for i, snap in enumerate(self.snapshots):
+            if self.isCanceled():
+                return False
+            basemap = False
+            if snap.kind == 'raster' and self.profile.exclude_basemaps:
+                # Also primes the classifier cache for the GUI thread
+                basemap = self.classifier.classifyCached(
+                    snap.layer_id, snap.provider, snap.source, snap.name).is_basemap
+            self.plan.append(PlanItem(snap.layer_id, snap.kind, basemap))
+            self.setProgress(100.0 * (i + 1) / total)
+        return True
+
+
+class ApplyToExistingJob(QObject):
+    """Restyle all project layers in event-loop friendly chunks"""
+    
+    # raster_count, vector_count, label_count, unchanged_count, cancelled
+    finished = pyqtSignal(int, int, int, int, bool)
+    
+    CHUNK_SIZE = 50
+    
+    def __init__(self, plugin, profile, parent=None, force=False):
+        super().__init__(parent)
+        self.plugin = plugin
+        self.styler = plugin.layerStyler()
+        self.profile = profile
+        self.force = force
+        self.task = None
+        self.plan = []
+        self.position = 0
+        self.styled = []
+        self.raster_count = 0
+        self.vector_count = 0
+        self.label_count = 0
+        self.unchanged_count = 0
+        # Vector layers checked for a missing spatial index, for the summary
+        self.indexed_layer_ids = []
+        self.cancelled = False
+        self.progress = None
+    
+    def start(self):
+        """Snapshot the project layers and hand them to the planning task"""
+        snapshots = []
+        for layer in QgsProject.instance().mapLayers().values():
+            if isinstance(layer, QgsRasterLayer) and self.profile.raster_enabled:
+                kind = 'raster'
+            elif isinstance(layer, QgsVectorLayer) and self.profile.vector_enabled:
+                kind = 'vector'
+            else:
+                continue
+            provider = layer.dataProvider().name() if layer.dataProvider() else ""
+            snapshots.append(LayerSnapshot(layer.id(), kind, provider, layer.source(), layer.name()))
+        
+        self.progress = QProgressDialog("Applying styles to existing layers...", "Cancel",
+                                        0, max(len(snapshots), 1), self.parent())
+        self.progress.setWindowModality(Qt.WindowModal)
+        self.progress.setMinimumDuration(500)
+        self.progress.canceled.connect(self.cancel)
+        
+        classifier = self.styler.basemapClassifier(self.profile)
+        self.task = PlanLayersTask(classifier, self.profile, snapshots)
+        self.task.taskCompleted.connect(self.onPlanReady)
+        self.task.taskTerminated.connect(self.cancel)
+        QgsApplication.taskManager().addTask(self.task)
+    
+    def cancel(self):
+        """Stop after the current chunk"""
+        if self.task and not self.plan:
+            self.task.cancel()
+        if not self.cancelled:
+            self.cancelled = True
+            if not self.plan:
+                self.finish()
+    
+    def onPlanReady(self):
+        self.plan = self.task.plan
+        self.task = None
+        if self.cancelled:
+            return
+        QTimer.singleShot(0, self.processChunk)
+    
+    def processChunk(self):
+        """Apply the plan for one chunk, then yield to the event loop"""
+        if self.cancelled:
+            self.finish()
+            return
+        
+        project = QgsProject.instance()
+        end = min(self.position + self.CHUNK_SIZE, len(self.plan))
+        for item in self.plan[self.position:end]:
+            layer = project.mapLayer(item.layer_id)
+            if layer is None:
+                continue
+            profile = self.styler.layerProfile(layer, self.profile)
+            if item.kind == 'raster':
+                basemap = item.basemap
+                if (profile.exclude_basemaps != self.profile.exclude_basemaps or
+                        profile.basemapPatterns() != self.profile.basemapPatterns()):
+                    # A rule changed what counts as a basemap: the plan used the base profile
+                    basemap = profile.exclude_basemaps and self.styler.isBasemapLayer(layer, profile)
+                if not basemap:
+                    changed = self.update(layer, profile)
+                    if changed is None:
+                        changed = self.styler.styleRasterLayer(layer, profile, repaint=False, basemap=False,
+                                                               force=self.force)
+                    self.track(layer, profile, changed)
+                self.raster_count += 1
+            else:
+                changed = self.update(layer, profile)
+                if changed is None:
+                    changed = self.styler.styleVectorLayer(layer, profile, repaint=False, force=self.force)
+                self.track(layer, profile, changed)
+                self.vector_count += 1
+                if profile.build_indexes:
+                    self.buildIndex(layer, profile)
+                if profile.labels_enabled and layer.labelsEnabled():
+                    self.label_count += 1
+        self.position = end
+        self.progress.setValue(self.position)
+        
+        if self.position < len(self.plan):
+            QTimer.singleShot(0, self.processChunk)
+        else:
+            self.finish()
+    
+    def buildIndex(self, layer, profile):
+        try:
+            self.styler.spatial_indexes.maybeBuild(layer, profile)
+        except Exception as e:
+            self.styler.reportFailure(layer, 'spatial index', e)
+        self.indexed_layer_ids.append(layer.id())
+    
+    def indexSummary(self):
+        """Lines on the spatial indexes created, failed or skipped for this job"""
+        return self.styler.spatial_indexes.summaryLines(self.indexed_layer_ids)
+    
+    def update(self, layer, profile):
+        """Apply only what changed since the layer was last styled; None when a full restyle is needed"""
+        if self.force:
+            return None
+        return self.styler.updateLayer(layer, profile, repaint=False)
+    
+    def track(self, layer, profile, changed):
+        """Remember restyled layers for the final refresh, count the rest"""
+        if changed:
+            self.styled.append(layer)
+        elif self.styler.isStyledWith(layer, profile):
+            self.unchanged_count += 1
+    
+    def finish(self):
+        """Refresh the canvas once and report the counts"""
+        if self.progress:
+            self.progress.canceled.disconnect(self.cancel)
+            self.progress.close()
+            self.progress = None
+        self.styler.saveCaches()
+        self.plugin.refreshCanvas(self.styled)
+        self.styled = []
+        self.finished.emit(self.raster_count, self.vector_count, self.label_count,
+                           self.unchanged_count, self.cancelled)
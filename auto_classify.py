@@ -0,0 +1,318 @@
+"""
+Auto Style Manager - automatic classification
+Graduated/categorized renderers from a uniform, geometry-free sample of field values,
+scanned in a background task
+"""
+
+import random
+import sys
+from collections import Counter, OrderedDict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from qgis.core import (NULL, QgsCategorizedSymbolRenderer, QgsFeatureRequest,
+                       QgsGraduatedSymbolRenderer, QgsProject, QgsRendererCategory, QgsRendererRange, QgsStyle,
+                       QgsTask, QgsVectorLayerFeatureSource)
+
+from .task_registry import TaskRegistry
+
+
+CLASSIFY_MODES = ('auto', 'graduated', 'categorized')
+CLASSIFY_METHODS = ('quantile', 'equal', 'jenks')
+
+# Renderer types this module produces, so a restyle may replace them
+CLASSIFIED_RENDERERS = frozenset(['graduatedSymbol', 'categorizedSymbol'])
+
+# Rows read between cancellation checks of a background scan
+CANCEL_CHECK_ROWS = 10000
+
+# Jenks runs on at most this many distinct (weighted) values
+JENKS_MAX_VALUES = 1000
+
+# Categories beyond this go to the catch-all class
+MAX_CATEGORIES = 20
+
+# Field names that identify rather than describe, never auto-picked
+ID_FIELD_NAMES = frozenset(['id', 'fid', 'gid', 'objectid', 'ogc_fid', 'oid', 'pk', 'uid'])
+
+
+def reservoirSample(values, size, rng):
+    """Uniform sample of at most size items from an iterable"""
+    reservoir = []
+    for seen, value in enumerate(values):
+        if seen < size:
+            reservoir.append(value)
+        else:
+            slot = rng.randint(0, seen)
+            if slot < size:
+                reservoir[slot] = value
+    return reservoir
+
+
+def quantileBreaks(values, classes):
+    return np.quantile(values, np.linspace(0.0, 1.0, classes + 1))
+
+
+def equalIntervalBreaks(values, classes):
+    return np.linspace(values.min(), values.max(), classes + 1)
+
+
+def jenksBreaks(values, classes):
+    """Fisher-Jenks natural breaks on weighted distinct values"""
+    uniques, weights = np.unique(values, return_counts=True)
+    if uniques.size > JENKS_MAX_VALUES:
+        # Collapse to quantile bins, each represented by its mean
+        edges = np.quantile(values, np.linspace(0.0, 1.0, JENKS_MAX_VALUES + 1))
+        bins = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, JENKS_MAX_VALUES - 1)
+        weights = np.bincount(bins, minlength=JENKS_MAX_VALUES)
+        sums = np.bincount(bins, weights=values, minlength=JENKS_MAX_VALUES)
+        keep = weights > 0
+        weights = weights[keep]
+        uniques = sums[keep] / weights
+    n = uniques.size
+    classes = min(classes, n)
+    if classes < 2:
+        return np.array([values.min(), values.max()])
+    
+    w = weights.astype(np.float64)
+    cw = np.concatenate(([0.0], np.cumsum(w)))
+    cwx = np.concatenate(([0.0], np.cumsum(w * uniques)))
+    cwx2 = np.concatenate(([0.0], np.cumsum(w * uniques * uniques)))
+    
+    def cost(starts, end):
+        # Weighted sum of squared deviations of uniques[starts..end]
+        sw = cw[end + 1] - cw[starts]
+        swx = cwx[end + 1] - cwx[starts]
+        return (cwx2[end + 1] - cwx2[starts]) - swx * swx / sw
+    
+    # best[c, j]: lowest cost of splitting uniques[0..j] into c + 1 classes
+    best = np.full((classes, n), np.inf)
+    start = np.zeros((classes, n), dtype=np.int64)
+    best[0] = cost(np.zeros(n, dtype=np.int64), np.arange(n))
+    for c in range(1, classes):
+        for j in range(c, n):
+            starts = np.arange(c, j + 1)
+            total = best[c - 1, starts - 1] + cost(starts, j)
+            k = int(np.argmin(total))
+            best[c, j] = total[k]
+            start[c, j] = starts[k]
+    
+    breaks = [uniques[-1]]
+    j = n - 1
+    for c in range(classes - 1, 0, -1):
+        i = start[c, j]
+        breaks.append(uniques[i - 1])
+        j = i - 1
+    breaks.append(values.min())
+    return np.array(breaks[::-1])
+
+
+BREAK_METHODS = {
+    'quantile': quantileBreaks,
+    'equal': equalIntervalBreaks,
+    'jenks': jenksBreaks,
+}
+
+
+def sortedCategories(values):
+    try:
+        return sorted(values)
+    except TypeError:
+        return sorted(values, key=str)  # Mixed types
+
+
+def computeClasses(sample, mode, profile):
+    """Return ('graduated', breaks) or ('categorized', values) for a sample, or None"""
+    if mode == 'graduated':
+        try:
+            values = np.asarray(sample, dtype=np.float64)
+        except (TypeError, ValueError):
+            values = np.empty(0)
+        values = values[np.isfinite(values)]
+        if not values.size:
+            return None
+        breaks = np.unique(BREAK_METHODS[profile.classify_method](values, profile.classify_classes))
+        if breaks.size == 1:
+            breaks = np.array([breaks[0], breaks[0]])
+        return ('graduated', [float(b) for b in breaks])
+    if not sample:
+        return None
+    # Keep the field's own values: a category only matches features of the same value and type
+    common = Counter(sample).most_common(MAX_CATEGORIES)
+    return ('categorized', sortedCategories([value for value, _count in common]))
+
+
+def sampleValues(source, fields, field_name, size, rng, canceled=None):
+    """Stream one attribute without geometry and keep a uniform sample of its non-null values
+    
+    source is a layer or a QgsVectorLayerFeatureSource; canceled() stops the scan early.
+    """
+    request = QgsFeatureRequest()
+    request.setFlags(QgsFeatureRequest.NoGeometry)
+    request.setSubsetOfAttributes([field_name], fields)
+    index = fields.lookupField(field_name)
+    
+    def present():
+        for row, feature in enumerate(source.getFeatures(request)):
+            if canceled is not None and row % CANCEL_CHECK_ROWS == 0 and canceled():
+                return
+            value = feature.attribute(index)
+            if value is not None and value != NULL and value == value:
+                yield value
+    
+    return reservoirSample(present(), size, rng)
+
+
+class ClassifyTask(QgsTask):
+    """Sample a field over every row in the background, then compute its classes"""
+    
+    def __init__(self, classifier, layer, key, field_name, mode, profile):
+        super().__init__(f"Auto Style Manager: classifying {layer.name()}", QgsTask.CanCancel)
+        self.classifier = classifier
+        self.layer_id = layer.id()
+        self.key = key
+        # Feature sources may be read off the main thread, layers may not
+        self.source = QgsVectorLayerFeatureSource(layer)
+        self.fields = layer.fields()
+        self.field_name = field_name
+        self.mode = mode
+        self.profile = profile
+        self.result = None
+    
+    def run(self):
+        sample = sampleValues(self.source, self.fields, self.field_name, self.profile.classify_sample,
+                              random.Random(self.classifier.seed), self.isCanceled)
+        if self.isCanceled():
+            return False
+        self.result = computeClasses(sample, self.mode, self.profile)
+        return True
+    
+    def finished(self, result):
+        if not result:
+            return
+        self.classifier.store(self.key, self.result)
+        layer = QgsProject.instance().mapLayer(self.layer_id)
+        if layer is not None and self.result is not None and self.classifier.on_ready is not None:
+            self.classifier.on_ready(layer)
+
+
+class AutoClassifier:
+    """Build classified renderers, caching the classes per layer source
+    
+    With background set, classes not cached yet are computed by a ClassifyTask and
+    renderer() returns None meanwhile; on_ready(layer) is called once they are.
+    """
+    
+    def __init__(self, max_entries=256, seed=0, background=True, on_ready=None):
+        self.max_entries = max_entries
+        self.seed = seed
+        self.background = background
+        self.on_ready = on_ready
+        self.cache = OrderedDict()
+        # cache key -> running task
+        self.tasks = TaskRegistry()
+    
+    @staticmethod
+    def pickField(layer, preferred):
+        """Return (field name, numeric) for the configured or first usable field, or None"""
+        fields = layer.fields()
+        if preferred:
+            index = fields.lookupField(preferred)
+            if index < 0:
+                return None
+            field = fields.at(index)
+            return field.name(), field.isNumeric()
+        for field in fields:
+            if field.isNumeric() and field.name().lower() not in ID_FIELD_NAMES:
+                return field.name(), True
+        return None
+    
+    def cacheKey(self, layer, field_name, mode, profile):
+        return (layer.source(), layer.subsetString(), layer.featureCount(), field_name, mode,
+                profile.classify_method, profile.classify_classes, profile.classify_sample)
+    
+    def classes(self, layer, field_name, mode, profile):
+        """Return ('graduated', breaks) or ('categorized', values), cached per source
+        
+        None when the field has no usable values, or while a background scan runs.
+        """
+        key = self.cacheKey(layer, field_name, mode, profile)
+        try:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        except KeyError:
+            pass
+        
+        if self.background:
+            if key not in self.tasks:
+                self.tasks.start(key, ClassifyTask(self, layer, key, field_name, mode, profile))
+            return None
+        
+        sample = sampleValues(layer, layer.fields(), field_name, profile.classify_sample, random.Random(self.seed))
+        result = computeClasses(sample, mode, profile)
+        self.store(key, result)
+        return result
+    
+    def store(self, key, result):
+        self.cache[key] = result
+        if len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+    
+    def renderer(self, layer, profile, template):
+        """Return a classified renderer for layer built from template symbol, or None"""
+        if np is None or template is None:
+            return None
+        picked = self.pickField(layer, profile.classify_field)
+        if picked is None:
+            return None
+        field_name, numeric = picked
+        mode = profile.classify_mode
+        if mode == 'auto':
+            mode = 'graduated' if numeric else 'categorized'
+        elif mode == 'graduated' and not numeric:
+            return None
+        
+        classes = self.classes(layer, field_name, mode, profile)
+        if classes is None:
+            return None
+        kind, values = classes
+        ramp = QgsStyle.defaultStyle().colorRamp(profile.classify_ramp)
+        
+        def classSymbol(position):
+            symbol = template.clone()
+            if ramp is not None:
+                symbol.setColor(ramp.color(position))
+            return symbol
+        
+        if kind == 'graduated':
+            count = len(values) - 1
+            ranges = []
+            for i in range(count):
+                lower, upper = values[i], values[i + 1]
+                label = f"{lower:g} - {upper:g}"
+                # Open the outer classes: values outside the sample must still render
+                if i == 0:
+                    lower = -sys.float_info.max
+                if i == count - 1:
+                    upper = sys.float_info.max
+                ranges.append(QgsRendererRange(lower, upper, classSymbol(i / max(count - 1, 1)), label))
+            renderer = QgsGraduatedSymbolRenderer(field_name, ranges)
+        else:
+            count = len(values)
+            categories = [QgsRendererCategory(value, classSymbol(i / max(count - 1, 1)), str(value))
+                          for i, value in enumerate(values)]
+            # An empty value is QGIS's "all other values" class
+            categories.append(QgsRendererCategory('', template.clone(), 'Other'))
+            renderer = QgsCategorizedSymbolRenderer(field_name, categories)
+        if ramp is not None:
+            renderer.setSourceColorRamp(ramp)
+        return renderer
+    
+    def cancelAll(self):
+        self.tasks.cancelAll()
+    
+    def clear(self):
+        self.cache.clear()
@@ -0,0 +1,109 @@
+"""
+Auto Style Manager - basemap classifier
+Compiled provider/URL/keyword rules deciding which rasters are basemaps
+"""
+
+import re
+from collections import namedtuple
+
+
+# rule is None when the layer is not a basemap; match is the text that triggered it
+BasemapVerdict = namedtuple('BasemapVerdict', ['is_basemap', 'rule', 'match'])
+
+NOT_BASEMAP = BasemapVerdict(False, None, None)
+
+BASEMAP_PROVIDERS = frozenset(['wms', 'xyz', 'wmts', 'arcgismapserver', 'wfs'])
+
+# Web sources, including URL-encoded ones (e.g. url=https%3A%2F%2F...)
+URL_SCHEME_PATTERN = r'(?:https?|ftp)(?:://|%3a%2f%2f)'
+
+BASEMAP_KEYWORDS = ('google', 'osm', 'openstreetmap', 'bing', 'esri',
+                    'mapbox', 'satellite', 'basemap', 'background', 'imagery')
+
+
+def parsePatternList(text):
+    """Split a semicolon separated list of user patterns"""
+    return tuple(pattern.strip() for pattern in text.split(';') if pattern.strip())
+
+
+class BasemapClassifier:
+    """Classify rasters as basemaps with precompiled rules and cached verdicts"""
+    
+    MAX_CACHED = 20000
+    
+    def __init__(self, user_patterns=()):
+        self.user_patterns = tuple(user_patterns)
+        self.url_re = re.compile(URL_SCHEME_PATTERN, re.IGNORECASE)
+        self.keyword_re = re.compile('|'.join(re.escape(k) for k in BASEMAP_KEYWORDS), re.IGNORECASE)
+        self.user_re = self.compileUserPatterns(self.user_patterns)
+        self.verdicts = {}
+    
+    @staticmethod
+    def compileUserPatterns(patterns):
+        """Combine user regexes into one alternation with a named group per pattern"""
+        if not patterns:
+            return None
+        parts = []
+        for i, pattern in enumerate(patterns):
+            try:
+                re.compile(pattern)
+            except re.error:
+                # Not a valid regex; match it literally instead
+                pattern = re.escape(pattern)
+            parts.append(f'(?P<p{i}>{pattern})')
+        try:
+            return re.compile('|'.join(parts), re.IGNORECASE)
+        except re.error:
+            # Patterns clash once combined (e.g. duplicate group names)
+            return re.compile('|'.join(f'(?P<p{i}>{re.escape(p)})' for i, p in enumerate(patterns)),
+                              re.IGNORECASE)
+    
+    def classify(self, provider, source, name):
+        """Return a BasemapVerdict for plain layer properties"""
+        provider = provider.lower()
+        if provider in BASEMAP_PROVIDERS:
+            return BasemapVerdict(True, 'provider', provider)
+        
+        m = self.url_re.search(source)
+        if m:
+            return BasemapVerdict(True, 'url', m.group(0))
+        
+        m = self.keyword_re.search(name)
+        if m:
+            return BasemapVerdict(True, 'keyword', m.group(0).lower())
+        
+        if self.user_re is not None:
+            m = self.user_re.search(name) or self.user_re.search(source)
+            if m:
+                matched = next(p for i, p in enumerate(self.user_patterns) if m.group(f'p{i}') is not None)
+                return BasemapVerdict(True, 'pattern', matched)
+        
+        return NOT_BASEMAP
+    
+    def classifyCached(self, layer_id, provider, source, name):
+        """classify() with the verdict cached per layer id/source/name"""
+        key = (layer_id, source, name)
+        verdict = self.verdicts.get(key)
+        if verdict is None:
+            verdict = self.remember(key, self.classify(provider, source, name))
+        return verdict
+    
+    def classifyLayer(self, layer):
+        """Return the (cached) BasemapVerdict for a map layer"""
+        source = layer.source()
+        name = layer.name()
+        key = (layer.id(), source, name)
+        verdict = self.verdicts.get(key)
+        if verdict is None:
+            try:
+                provider = layer.dataProvider().name() if layer.dataProvider() else ""
+            except Exception:
+                provider = ""
+            verdict = self.remember(key, self.classify(provider, source, name))
+        return verdict
+    
+    def remember(self, key, verdict):
+        if len(self.verdicts) >= self.MAX_CACHED:
+            self.verdicts.clear()
+        self.verdicts[key] = verdict
+        return verdict
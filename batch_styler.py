@@ -0,0 +1,244 @@
+"""
+Auto Style Manager - headless batch styler
+Applies one profile file to many projects and GeoPackages in a pool of headless
+QGIS processes and writes a JSON throughput report.
+
+Usage (with the folder containing the plugin on PYTHONPATH):
+    python -m auto_style_manager.batch_styler --profile office.asmprofile
+        [--workers 4] [--force] [--report report.json] PATH [PATH ...]
+
+PATH may be a .qgz/.qgs project, a .gpkg file or a directory searched recursively.
+Projects are saved in place; GeoPackage vector layers get the style as their
+default in the layer_styles table.
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import replace
+
+from .style_profile import readProfileFile
+
+PROJECT_SUFFIXES = ('.qgz', '.qgs')
+GEOPACKAGE_SUFFIXES = ('.gpkg',)
+
+# Per-process state set up by initWorker()
+_worker = {}
+
+
+class StaticProfileStore:
+    """ProfileStore stand-in that always returns one profile and never touches QSettings"""
+    
+    def __init__(self, profile):
+        self._profile = profile
+    
+    def profile(self):
+        return self._profile
+
+
+def findFiles(paths):
+    """Expand files and directories into the sorted list of files to style"""
+    suffixes = PROJECT_SUFFIXES + GEOPACKAGE_SUFFIXES
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _dirs, names in os.walk(path):
+                found.update(os.path.join(root, name) for name in names
+                             if name.lower().endswith(suffixes))
+        elif path.lower().endswith(suffixes):
+            found.add(path)
+    return sorted(os.path.abspath(path) for path in found)
+
+
+def initWorker(profile_path, force, cache_dir):
+    """Start a headless QGIS in this worker process and build its styler
+    
+    Each worker keeps its own stretch cache in cache_dir, seeded from the
+    user's; mergeStretchCaches() folds them back once every file is done.
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from qgis.core import QgsApplication
+    from .layer_styler import LayerStyler
+    from .raster_stats import RasterStretcher
+    
+    app = QgsApplication([], False)
+    app.initQgis()
+    _name, profile = readProfileFile(profile_path)
+    # Background overview/index tasks would outlive the file they were started for
+    profile = replace(profile, build_overviews=False, build_indexes=False)
+    styler = LayerStyler(StaticProfileStore(profile))
+    # Nothing runs tasks before the file is saved: classify in place
+    styler.auto_classifier.background = False
+    styler.stretcher = RasterStretcher(os.path.join(cache_dir, f"stretch_{os.getpid()}.json"))
+    styler.stretcher.cache.load().update(RasterStretcher().cache.load())
+    _worker.update(app=app, profile=profile, force=force, styler=styler)
+
+
+def styleProject(path, styler, profile, force):
+    """Style every layer of a project and save it in place; return (layers, styled)"""
+    from qgis.core import QgsProject
+    
+    project = QgsProject.instance()
+    project.clear()
+    if not project.read(path):
+        raise RuntimeError(project.error() or "could not read the project")
+    layers = list(project.mapLayers().values())
+    styled = styler.styleLayers(layers, profile, repaint=False, force=force)
+    if styled and not project.write(path):
+        raise RuntimeError(project.error() or "could not write the project")
+    project.clear()
+    return len(layers), len(styled)
+
+
+def styleGeoPackage(path, styler, profile, force):
+    """Style every vector table of a GeoPackage and store it as the default style"""
+    from osgeo import ogr
+    from qgis.core import QgsVectorLayer
+    
+    ds = ogr.Open(path)
+    if ds is None:
+        raise RuntimeError("could not open the GeoPackage")
+    names = [ds.GetLayer(i).GetName() for i in range(ds.GetLayerCount())]
+    ds = None
+    
+    styled = 0
+    for name in names:
+        layer = QgsVectorLayer(f"{path}|layername={name}", name, 'ogr')
+        if not layer.isValid() or not styler.styleLayers([layer], profile, repaint=False, force=force):
+            continue
+        error = layer.saveStyleToDatabase(name, "Auto Style Manager", True, "")
+        if error:
+            raise RuntimeError(f"{name}: {error}")
+        styled += 1
+    return len(names), styled
+
+
+def styleFile(path):
+    """Worker entry point: style one file and return its report record"""
+    styler = _worker['styler']
+    failures = styler.diagnostics.failureCount()
+    record = {'path': path, 'status': 'ok', 'layers': 0, 'styled': 0, 'error': None}
+    start = time.perf_counter()
+    try:
+        if path.lower().endswith(GEOPACKAGE_SUFFIXES):
+            record['kind'] = 'geopackage'
+            record['layers'], record['styled'] = styleGeoPackage(path, styler, _worker['profile'], _worker['force'])
+        else:
+            record['kind'] = 'project'
+            record['layers'], record['styled'] = styleProject(path, styler, _worker['profile'], _worker['force'])
+    except Exception as e:
+        record['status'] = 'failed'
+        record['error'] = str(e) or type(e).__name__
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    record['layer_failures'] = styler.diagnostics.failureCount() - failures
+    return record
+
+
+def mergeStretchCaches(cache_dir):
+    """Fold the stretch caches of every worker into the user's one
+    
+    Submitted once all files are done, so exactly one process writes the shared file.
+    """
+    from .raster_stats import RasterStretcher
+    
+    cache = RasterStretcher().cache
+    for name in sorted(os.listdir(cache_dir)):
+        for key, limits in RasterStretcher(os.path.join(cache_dir, name)).cache.load().items():
+            cache.put(key, limits)
+    cache.save()
+
+
+def run(files, profile_path, workers, force=False, progress=None):
+    """Style files in a pool of workers and return the report dict"""
+    records = []
+    start = time.perf_counter()
+    # QGIS is not fork safe; every worker starts its own interpreter
+    context = multiprocessing.get_context('spawn')
+    cache_dir = tempfile.mkdtemp(prefix='auto_style_manager_')
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context, initializer=initWorker,
+                                                    initargs=(profile_path, force, cache_dir)) as pool:
+            futures = [pool.submit(styleFile, path) for path in files]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # The worker itself died (crash in QGIS, broken pool)
+                    record = {'path': files[futures.index(future)], 'kind': None, 'status': 'failed',
+                              'layers': 0, 'styled': 0, 'error': str(e) or type(e).__name__,
+                              'seconds': None, 'layer_failures': 0}
+                records.append(record)
+                if progress:
+                    progress(len(records), len(files), record)
+            try:
+                pool.submit(mergeStretchCaches, cache_dir).result()
+            except Exception as e:
+                print(f"Could not merge the stretch caches: {e}", file=sys.stderr)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - start
+    
+    records.sort(key=lambda r: r['path'])
+    layers = sum(r['layers'] for r in records)
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'profile': os.path.abspath(profile_path),
+        'workers': workers,
+        'force': force,
+        'files': len(records),
+        'failed_files': sum(1 for r in records if r['status'] != 'ok'),
+        'layers': layers,
+        'styled_layers': sum(r['styled'] for r in records),
+        'seconds': round(elapsed, 3),
+        'files_per_second': round(len(records) / elapsed, 3) if elapsed else None,
+        'layers_per_second': round(layers / elapsed, 3) if elapsed else None,
+        'results': records,
+    }
+
+
+def printProgress(done, total, record):
+    if record['status'] == 'ok':
+        detail = f"{record['styled']}/{record['layers']} layers styled in {record['seconds']:.2f} s"
+    else:
+        detail = f"FAILED: {record['error']}"
+    print(f"[{done}/{total}] {record['path']}: {detail}", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply an Auto Style Manager profile to projects and GeoPackages")
+    parser.add_argument('paths', nargs='+', help=".qgz/.qgs/.gpkg files or directories")
+    parser.add_argument('--profile', required=True, help="profile file exported from the settings dialog")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="parallel QGIS processes")
+    parser.add_argument('--force', action='store_true', help="restyle layers already styled with this profile")
+    parser.add_argument('--report', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+    
+    try:
+        readProfileFile(args.profile)
+    except (OSError, ValueError) as e:
+        parser.error(f"cannot read profile {args.profile}: {e}")
+    files = findFiles(args.paths)
+    if not files:
+        parser.error("no .qgz, .qgs or .gpkg files found")
+    
+    workers = max(1, min(args.workers, len(files)))
+    report = run(files, args.profile, workers, args.force, printProgress)
+    
+    text = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 1 if report['failed_files'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+Auto Style Manager benchmarks
+Headless timing of the styling hot paths, see run.py
+"""
@@ -0,0 +1,690 @@
+"""
+Auto Style Manager benchmarks - QGIS stand-ins
+Lightweight replacements for the qgis modules so the styling hot paths can be
+timed on machines without QGIS. Only what the plugin touches per layer is
+modelled; everything else resolves to an inert stub.
+"""
+
+import sys
+import types
+
+
+class _Stub:
+    """Inert object: accepts any call, any attribute, and is falsy"""
+    
+    def __init__(self, *args, **kwargs):
+        pass
+    
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _Stub()
+    
+    def __call__(self, *args, **kwargs):
+        return _Stub()
+    
+    def __bool__(self):
+        return False
+    
+    def __iter__(self):
+        return iter(())
+    
+    def __or__(self, other):
+        return self
+    
+    __and__ = __ror__ = __rand__ = __or__
+    
+    def __int__(self):
+        return 0
+
+
+class _StubMeta(type):
+    """Unknown class attributes (enum values, flags) become stable stubs"""
+    
+    def __getattr__(cls, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        value = _Stub()
+        setattr(cls, name, value)
+        return value
+
+
+class StubClass(_Stub, metaclass=_StubMeta):
+    pass
+
+
+class _Fake(StubClass):
+    """Base for modelled stand-ins: real objects are truthy"""
+    
+    def __bool__(self):
+        return True
+
+
+def _stubModule(name, members):
+    """Module whose unknown attributes are generated StubClass subclasses"""
+    module = types.ModuleType(name)
+    module.__dict__.update(members)
+    
+    def __getattr__(attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        cls = _StubMeta(attr, (StubClass,), {})
+        setattr(module, attr, cls)
+        return cls
+    
+    module.__getattr__ = __getattr__
+    return module
+
+
+# ---------------------------------------------------------------- QtCore
+
+class _BoundSignal:
+    def __init__(self):
+        self.slots = []
+    
+    def connect(self, slot):
+        self.slots.append(slot)
+    
+    def disconnect(self, slot=None):
+        if slot is None:
+            self.slots = []
+        else:
+            self.slots.remove(slot)
+    
+    def emit(self, *args):
+        for slot in list(self.slots):
+            slot(*args)
+
+
+class pyqtSignal:
+    def __init__(self, *types, **kwargs):
+        self.name = None
+    
+    def __set_name__(self, owner, name):
+        self.name = '_signal_' + name
+    
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        signal = instance.__dict__.get(self.name)
+        if signal is None:
+            signal = instance.__dict__[self.name] = _BoundSignal()
+        return signal
+
+
+class QObject(_Fake):
+    def __init__(self, parent=None, *args, **kwargs):
+        self._parent = parent
+    
+    def parent(self):
+        return self._parent
+
+
+class QTimer(QObject):
+    """Timer that never fires on its own; benchmarks drive it by hand"""
+    timeout = pyqtSignal()
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.interval = None
+    
+    def start(self, interval=0):
+        self.interval = interval
+    
+    def stop(self):
+        self.interval = None
+    
+    def isActive(self):
+        return self.interval is not None
+    
+    def setSingleShot(self, single_shot):
+        pass
+    
+    @staticmethod
+    def singleShot(interval, slot):
+        slot()
+
+
+class QSettings:
+    """In-memory settings shared by every instance"""
+    store = {}
+    
+    IniFormat = 1
+    
+    def __init__(self, *args, **kwargs):
+        pass
+    
+    def fileName(self):
+        return ''
+    
+    def value(self, key, default=None, type=None):
+        value = self.store.get(key, default)
+        if type is bool and isinstance(value, str):
+            return value.lower() == 'true'
+        if type is not None and value is not None:
+            return type(value)
+        return value
+    
+    def setValue(self, key, value):
+        self.store[key] = value
+    
+    def contains(self, key):
+        return key in self.store
+    
+    def remove(self, key):
+        for k in [k for k in self.store if k == key or k.startswith(key + '/')]:
+            del self.store[k]
+    
+    def sync(self):
+        pass
+
+
+# ---------------------------------------------------------------- QtGui
+
+class QColor:
+    HexRgb = 0
+    HexArgb = 1
+    
+    def __init__(self, *args):
+        self.rgba = (0, 0, 0, 255)
+        if len(args) == 1 and isinstance(args[0], QColor):
+            self.rgba = args[0].rgba
+        elif len(args) == 1 and isinstance(args[0], str):
+            text = args[0].lstrip('#')
+            if len(text) == 8:
+                a, r, g, b = (int(text[i:i + 2], 16) for i in range(0, 8, 2))
+            else:
+                r, g, b = (int(text[i:i + 2], 16) for i in range(0, 6, 2))
+                a = 255
+            self.rgba = (r, g, b, a)
+        elif len(args) >= 3:
+            self.rgba = tuple(args) + (255,) * (4 - len(args))
+    
+    def name(self, fmt=HexRgb):
+        r, g, b, a = self.rgba
+        if fmt == QColor.HexArgb:
+            return f'#{a:02x}{r:02x}{g:02x}{b:02x}'
+        return f'#{r:02x}{g:02x}{b:02x}'
+    
+    def __eq__(self, other):
+        return isinstance(other, QColor) and self.rgba == other.rgba
+
+
+# ---------------------------------------------------------------- qgis.core
+
+class QgsWkbTypes:
+    PointGeometry = 0
+    LineGeometry = 1
+    PolygonGeometry = 2
+    UnknownGeometry = 3
+    NullGeometry = 4
+
+
+class QgsFeatureSource:
+    SpatialIndexUnknown = 0
+    SpatialIndexNotPresent = 1
+    SpatialIndexPresent = 2
+
+
+class QgsVectorDataProvider:
+    CreateSpatialIndex = 1 << 6
+
+
+class QgsField:
+    def __init__(self, name, type_name='String'):
+        self._name = name
+        self._type_name = type_name
+    
+    def name(self):
+        return self._name
+    
+    def typeName(self):
+        return self._type_name
+
+
+class FakeProvider(_Fake):
+    def __init__(self, name):
+        self._name = name
+    
+    def name(self):
+        return self._name
+
+
+class QgsMapLayer(_Fake):
+    _next_id = 0
+    
+    def __init__(self, source='', name='', provider=''):
+        QgsMapLayer._next_id += 1
+        self._id = f'{name}_{QgsMapLayer._next_id}'
+        self._source = source
+        self._name = name
+        self._provider = FakeProvider(provider)
+        self._properties = {}
+        self.repaints = 0
+    
+    def id(self):
+        return self._id
+    
+    def name(self):
+        return self._name
+    
+    def source(self):
+        return self._source
+    
+    def isValid(self):
+        return True
+    
+    def dataProvider(self):
+        return self._provider
+    
+    def providerType(self):
+        return self._provider.name()
+    
+    def customProperty(self, key, default=None):
+        return self._properties.get(key, default)
+    
+    def setCustomProperty(self, key, value):
+        self._properties[key] = value
+    
+    def removeCustomProperty(self, key):
+        self._properties.pop(key, None)
+    
+    def triggerRepaint(self, deferred=False):
+        self.repaints += 1
+
+
+class FakeSymbolLayer(_Fake):
+    def __init__(self):
+        self.stroke_color = None
+        self.stroke_width = None
+    
+    def setStrokeColor(self, color):
+        self.stroke_color = color
+    
+    def setStrokeWidth(self, width):
+        self.stroke_width = width
+    
+    def clone(self):
+        copy = FakeSymbolLayer()
+        copy.__dict__.update(self.__dict__)
+        return copy
+
+
+class QgsSymbol(_Fake):
+    def __init__(self, *args):
+        self.color = QColor()
+        self.size = 2.0
+        self.width = 0.26
+        self.layers = [FakeSymbolLayer()]
+    
+    @staticmethod
+    def defaultSymbol(geom_type):
+        return {QgsWkbTypes.PointGeometry: QgsMarkerSymbol,
+                QgsWkbTypes.LineGeometry: QgsLineSymbol,
+                QgsWkbTypes.PolygonGeometry: QgsFillSymbol}.get(geom_type, QgsSymbol)()
+    
+    def setColor(self, color):
+        self.color = QColor(color)
+    
+    def setSize(self, size):
+        self.size = size
+    
+    def setWidth(self, width):
+        self.width = width
+    
+    def symbolLayerCount(self):
+        return len(self.layers)
+    
+    def symbolLayer(self, index):
+        return self.layers[index]
+    
+    def clone(self):
+        copy = type(self)()
+        copy.color = QColor(self.color)
+        copy.size = self.size
+        copy.width = self.width
+        copy.layers = [layer.clone() for layer in self.layers]
+        return copy
+
+
+class QgsMarkerSymbol(QgsSymbol):
+    pass
+
+
+class QgsLineSymbol(QgsSymbol):
+    pass
+
+
+class QgsFillSymbol(QgsSymbol):
+    pass
+
+
+class QgsSingleSymbolRenderer(_Fake):
+    def __init__(self, symbol=None):
+        self._symbol = symbol
+    
+    def type(self):
+        return 'singleSymbol'
+    
+    def symbol(self):
+        return self._symbol
+    
+    def setSymbol(self, symbol):
+        self._symbol = symbol
+
+
+class QgsRasterRenderer(_Fake):
+    def __init__(self):
+        self._opacity = 1.0
+    
+    def opacity(self):
+        return self._opacity
+    
+    def setOpacity(self, opacity):
+        self._opacity = opacity
+
+
+class QgsTextBufferSettings(_Fake):
+    def __init__(self, other=None):
+        self.__dict__.update(getattr(other, '__dict__', {}))
+    
+    def setEnabled(self, enabled):
+        self.enabled = enabled
+    
+    def setSize(self, size):
+        self.size = size
+    
+    def setColor(self, color):
+        self.color = QColor(color)
+
+
+class QgsTextFormat(_Fake):
+    def __init__(self, other=None):
+        self._size = 10.0
+        self.color = QColor()
+        self.buffer_settings = QgsTextBufferSettings()
+        if other is not None:
+            self.__dict__.update(other.__dict__)
+    
+    def size(self):
+        return self._size
+    
+    def setSize(self, size):
+        self._size = size
+    
+    def setColor(self, color):
+        self.color = QColor(color)
+    
+    def setBuffer(self, buffer):
+        self.buffer_settings = QgsTextBufferSettings(buffer)
+    
+    def buffer(self):
+        return self.buffer_settings
+
+
+class QgsPalLayerSettings(_Fake):
+    AroundPoint = 0
+    OverPoint = 1
+    Line = 2
+    Curved = 3
+    Horizontal = 4
+    Free = 5
+    
+    def __init__(self, other=None):
+        self.fieldName = ''
+        self.enabled = False
+        self.placement = QgsPalLayerSettings.AroundPoint
+        self.text_format = QgsTextFormat()
+        if other is not None:
+            self.__dict__.update(other.__dict__)
+    
+    def setFormat(self, text_format):
+        self.text_format = QgsTextFormat(text_format)
+    
+    def format(self):
+        return QgsTextFormat(self.text_format)
+
+
+class QgsVectorLayerSimpleLabeling(_Fake):
+    def __init__(self, settings):
+        self._settings = QgsPalLayerSettings(settings)
+    
+    def settings(self, provider_id=''):
+        return QgsPalLayerSettings(self._settings)
+    
+    def setSettings(self, settings, provider_id=''):
+        self._settings = QgsPalLayerSettings(settings)
+
+
+_GEOMETRY_PREFIXES = {'point': QgsWkbTypes.PointGeometry, 'multipoint': QgsWkbTypes.PointGeometry,
+                      'linestring': QgsWkbTypes.LineGeometry, 'multilinestring': QgsWkbTypes.LineGeometry,
+                      'polygon': QgsWkbTypes.PolygonGeometry, 'multipolygon': QgsWkbTypes.PolygonGeometry}
+
+
+class QgsVectorLayer(QgsMapLayer):
+    """Vector stand-in; memory-style URIs (Point?field=name:string) set geometry and fields"""
+    
+    def __init__(self, source='', name='', provider='memory'):
+        super().__init__(source, name, provider)
+        head, _, query = source.partition('?')
+        self._geometry_type = _GEOMETRY_PREFIXES.get(head.lower(), QgsWkbTypes.UnknownGeometry)
+        self._fields = []
+        for part in query.split('&'):
+            key, _, value = part.partition('=')
+            if key == 'field':
+                field_name, _, type_name = value.partition(':')
+                self._fields.append(QgsField(field_name, type_name or 'string'))
+        self._renderer = QgsSingleSymbolRenderer(QgsSymbol.defaultSymbol(self._geometry_type))
+        self._labeling = None
+        self._labels_enabled = False
+        self.feature_count = 0
+    
+    def geometryType(self):
+        return self._geometry_type
+    
+    def fields(self):
+        return list(self._fields)
+    
+    def featureCount(self):
+        return self.feature_count
+    
+    def renderer(self):
+        return self._renderer
+    
+    def setRenderer(self, renderer):
+        self._renderer = renderer
+    
+    def labeling(self):
+        return self._labeling
+    
+    def setLabeling(self, labeling):
+        self._labeling = labeling
+    
+    def labelsEnabled(self):
+        return self._labels_enabled
+    
+    def setLabelsEnabled(self, enabled):
+        self._labels_enabled = enabled
+
+
+class QgsRasterLayer(QgsMapLayer):
+    def __init__(self, source='', name='', provider='gdal'):
+        super().__init__(source, name, provider)
+        self._renderer = QgsRasterRenderer()
+    
+    def renderer(self):
+        return self._renderer
+    
+    def bandCount(self):
+        return 1
+
+
+class QgsProject(QObject):
+    layersAdded = pyqtSignal(list)
+    layersWillBeRemoved = pyqtSignal(list)
+    writeMapLayer = pyqtSignal(object, object, object)
+    cleared = pyqtSignal()
+    loadingLayer = pyqtSignal(str)
+    readProject = pyqtSignal(object)
+    _instance = None
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.layers = {}
+        self.entries = {}
+    
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+    
+    def mapLayers(self):
+        return dict(self.layers)
+    
+    def mapLayer(self, layer_id):
+        return self.layers.get(layer_id)
+    
+    def addMapLayers(self, layers, add_to_legend=True):
+        for layer in layers:
+            self.layers[layer.id()] = layer
+        self.layersAdded.emit(list(layers))
+        return layers
+    
+    def addMapLayer(self, layer, add_to_legend=True):
+        self.addMapLayers([layer], add_to_legend)
+        return layer
+    
+    def removeAllMapLayers(self):
+        self.layers.clear()
+    
+    def readEntry(self, scope, key, default=''):
+        value = self.entries.get((scope, key))
+        return (value, True) if value is not None else (default, False)
+    
+    def writeEntry(self, scope, key, value):
+        self.entries[(scope, key)] = value
+        return True
+
+
+class QgsTask(QObject):
+    CanCancel = 1
+    taskCompleted = pyqtSignal()
+    taskTerminated = pyqtSignal()
+    
+    def __init__(self, description='', flags=0):
+        super().__init__()
+        self._description = description
+        self._canceled = False
+        self._progress = 0.0
+    
+    def description(self):
+        return self._description
+    
+    def isCanceled(self):
+        return self._canceled
+    
+    def cancel(self):
+        self._canceled = True
+    
+    def setProgress(self, progress):
+        self._progress = progress
+    
+    def finished(self, result):
+        pass
+
+
+class FakeTaskManager:
+    """Runs tasks synchronously on submission"""
+    
+    def addTask(self, task):
+        result = task.run()
+        task.finished(result)
+        (task.taskCompleted if result else task.taskTerminated).emit()
+        return 1
+
+
+class QgsRuntimeProfilerNode(_Fake):
+    class CustomRole:
+        # Qt.UserRole + 1 onwards, in QGIS order
+        Name = 257
+        Group = 258
+        Elapsed = 259
+        ParentElapsed = 260
+        Id = 261
+
+
+class QgsApplication(_Fake):
+    _task_manager = FakeTaskManager()
+    
+    @staticmethod
+    def taskManager():
+        return QgsApplication._task_manager
+    
+    @staticmethod
+    def qgisSettingsDirPath():
+        import tempfile
+        return tempfile.gettempdir()
+
+
+# ---------------------------------------------------------------- iface
+
+class FakeCanvas(_Fake):
+    def __init__(self):
+        self.refreshes = 0
+        self.frozen = False
+    
+    def freeze(self, frozen=True):
+        self.frozen = frozen
+    
+    def refresh(self):
+        self.refreshes += 1
+    
+    def cache(self):
+        return None
+
+
+class FakeIface(_Fake):
+    """Minimal QgisInterface: a canvas and no-op GUI hooks"""
+    
+    def __init__(self):
+        self.canvas = FakeCanvas()
+    
+    def mapCanvas(self):
+        return self.canvas
+
+
+# ---------------------------------------------------------------- install
+
+def install():
+    """Register the stand-in qgis modules unless real QGIS is importable"""
+    try:
+        import qgis.core  # noqa: F401
+        return False
+    except ImportError:
+        pass
+    
+    qtcore = _stubModule('qgis.PyQt.QtCore', {
+        'QObject': QObject, 'QTimer': QTimer, 'QSettings': QSettings, 'pyqtSignal': pyqtSignal,
+    })
+    qtgui = _stubModule('qgis.PyQt.QtGui', {'QColor': QColor})
+    core_members = {name: value for name, value in globals().items()
+                    if name.startswith('Qgs') and isinstance(value, type)}
+    core = _stubModule('qgis.core', core_members)
+    modules = {
+        'qgis': _stubModule('qgis', {}),
+        'qgis.PyQt': _stubModule('qgis.PyQt', {}),
+        'qgis.PyQt.QtCore': qtcore,
+        'qgis.PyQt.QtGui': qtgui,
+        'qgis.PyQt.QtSvg': _stubModule('qgis.PyQt.QtSvg', {}),
+        'qgis.PyQt.QtWidgets': _stubModule('qgis.PyQt.QtWidgets', {}),
+        'qgis.core': core,
+        'qgis.gui': _stubModule('qgis.gui', {}),
+    }
+    modules['qgis'].PyQt = modules['qgis.PyQt']
+    modules['qgis'].core = core
+    modules['qgis'].gui = modules['qgis.gui']
+    for name in ('QtCore', 'QtGui', 'QtSvg', 'QtWidgets'):
+        setattr(modules['qgis.PyQt'], name, modules['qgis.PyQt.' + name])
+    sys.modules.update(modules)
+    return True
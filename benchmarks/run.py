@@ -0,0 +1,328 @@
+"""
+Auto Style Manager benchmarks - runner
+Times the per-layer styling hot paths and burst handling for synthetic
+projects and writes the results as JSON.
+
+Usage (from the plugin directory):
+    python -m benchmarks [--sizes 10,1000,10000] [--output results.json]
+
+Plugin startup cost is measured separately by startup.py.
+"""
+
+import argparse
+import datetime
+import importlib
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = 'auto_style_manager'
+
+DEFAULT_SIZES = (10, 1000, 10000)
+
+# Rule set sizes for the rule matching benchmark
+RULE_COUNTS = (10, 1000)
+
+# Share of each layer kind in the synthetic projects
+LAYER_MIX = (
+    ('Point', 0.3),
+    ('LineString', 0.25),
+    ('Polygon', 0.3),
+    ('raster', 0.1),
+    ('basemap', 0.05),
+)
+
+
+def startQgis():
+    """Return (mode, app): an offscreen QgsApplication, or the stand-ins"""
+    from . import fakes
+    if fakes.install():
+        return 'stand-in', None
+    
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from qgis.core import QgsApplication
+    app = QgsApplication([], False)
+    app.initQgis()
+    return 'qgis', app
+
+
+def loadPlugin():
+    """Import the plugin directory as a package regardless of its folder name"""
+    if PACKAGE_NAME not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE_NAME, os.path.join(PLUGIN_DIR, '__init__.py'),
+            submodule_search_locations=[PLUGIN_DIR])
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE_NAME] = package
+        spec.loader.exec_module(package)
+    return importlib.import_module(PACKAGE_NAME + '.auto_style_manager')
+
+
+class ManualTimer:
+    """Stands in for the plugin's debounce timer; flushes are driven explicitly"""
+    
+    def start(self, interval=0):
+        pass
+    
+    def stop(self):
+        pass
+
+
+def benchIface():
+    """A QgisInterface stand-in with a map canvas that only counts refreshes"""
+    from .fakes import FakeIface
+    return FakeIface()
+
+
+def makeRasterSource(tmp_dir):
+    """Return a raster path usable by QgsRasterLayer (real QGIS only)"""
+    from osgeo import gdal
+    path = os.path.join(tmp_dir, 'bench.tif')
+    if not os.path.exists(path):
+        ds = gdal.GetDriverByName('GTiff').Create(path, 16, 16, 1, gdal.GDT_Byte)
+        ds.SetGeoTransform((0, 1, 0, 16, 0, -1))
+        ds.FlushCache()
+        ds = None
+    return path
+
+
+def makeLayers(count, raster_source='/data/bench.tif'):
+    """Build count synthetic layers following LAYER_MIX"""
+    from qgis.core import QgsRasterLayer, QgsVectorLayer
+    
+    layers = []
+    for i in range(count):
+        # Stride through the mix so even small projects get every kind
+        position = (i * 37 % 100) / 100.0
+        cumulative = 0.0
+        for kind, share in LAYER_MIX:
+            cumulative += share
+            if position < cumulative:
+                break
+        if kind == 'raster':
+            layer = QgsRasterLayer(raster_source, f'ortho_{i}')
+        elif kind == 'basemap':
+            layer = QgsRasterLayer('type=xyz&url=https://tile.openstreetmap.org/{z}/{x}/{y}.png',
+                                   f'OpenStreetMap {i}', 'wms')
+        else:
+            # Half of the vectors share a schema so the caches get exercised
+            fields = 'field=NAME:string&field=id:integer' if i % 2 else f'field=label_{i % 7}:string'
+            layer = QgsVectorLayer(f'{kind}?crs=EPSG:4326&{fields}', f'{kind.lower()}_{i}', 'memory')
+        layers.append(layer)
+    return layers
+
+
+def makeRules(count):
+    """Style rules mixing exact, prefix, glob, provider and geometry conditions"""
+    lines = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            lines.append(f"name=point_{i} -> point_size={1 + i % 5}")
+        elif kind == 1:
+            lines.append(f"name=linestring_{i}* geometry=line -> line_width={0.2 + i % 3}")
+        elif kind == 2:
+            lines.append(f"name=*_{i}?x provider=memory -> polygon_width={0.1 + i % 4}")
+        else:
+            lines.append(f"provider=gdal source=/data/set{i}/ -> opacity=0.{1 + i % 9}")
+    return "\n".join(lines)
+
+
+def summarize(name, size, samples, total):
+    """Turn per-layer samples (seconds) into a result record"""
+    ordered = sorted(samples)
+    count = len(ordered)
+    
+    def percentile(p):
+        return ordered[min(count - 1, int(p * count))] if count else 0.0
+    
+    return {
+        'benchmark': name,
+        'layers': size,
+        'total_s': round(total, 6),
+        'layers_per_s': round(size / total, 1) if total > 0 else None,
+        'per_layer_us': {
+            'mean': round(statistics.fmean(ordered) * 1e6, 2) if count else None,
+            'p50': round(percentile(0.50) * 1e6, 2),
+            'p95': round(percentile(0.95) * 1e6, 2),
+            'max': round(ordered[-1] * 1e6, 2) if count else None,
+        },
+    }
+
+
+def timePerLayer(name, layers, func):
+    """Call func(layer) for every layer, timing each call"""
+    samples = []
+    clock = time.perf_counter
+    start = clock()
+    for layer in layers:
+        t0 = clock()
+        func(layer)
+        samples.append(clock() - t0)
+    return summarize(name, len(layers), samples, clock() - start)
+
+
+def timeBurst(name, layers, func):
+    """Time a single call handling the whole burst"""
+    start = time.perf_counter()
+    func(layers)
+    total = time.perf_counter() - start
+    return summarize(name, len(layers), [total / max(len(layers), 1)] * len(layers), total)
+
+
+def runSize(module, size, raster_source, tmp_dir):
+    """Run every benchmark for one project size"""
+    from qgis.PyQt.QtCore import QSettings
+    from qgis.core import QgsProject, QgsRasterLayer, QgsVectorLayer
+    from dataclasses import replace
+    
+    plugin = module.AutoStyleManager(benchIface())
+    # Keep the benchmark profile away from the user's real settings
+    settings = QSettings(os.path.join(tmp_dir, 'bench_settings.ini'), QSettings.IniFormat)
+    plugin.profile_store = module.ProfileStore(settings)
+    profile = replace(plugin.profile_store.profile(), labels_enabled=True)
+    plugin.profile_store.save(profile)
+    profile = plugin.profile_store.profile()
+    styler = plugin.layerStyler()
+    
+    layers = makeLayers(size, raster_source)
+    project = QgsProject.instance()
+    project.removeAllMapLayers()
+    project.addMapLayers(layers, False)
+    vectors = [layer for layer in layers if isinstance(layer, QgsVectorLayer)]
+    rasters = [layer for layer in layers if isinstance(layer, QgsRasterLayer)]
+    
+    results = [
+        timePerLayer('isBasemapLayer.cold', rasters,
+                     lambda layer: styler.isBasemapLayer(layer, profile)),
+        timePerLayer('isBasemapLayer.warm', rasters,
+                     lambda layer: styler.isBasemapLayer(layer, profile)),
+        timePerLayer('applyLabels', vectors,
+                     lambda layer: styler.applyLabels(layer, profile, repaint=False)),
+        timePerLayer('styleVectorLayer', vectors,
+                     lambda layer: styler.styleVectorLayer(layer, profile, repaint=False, force=True)),
+        timePerLayer('styleRasterLayer', rasters,
+                     lambda layer: styler.styleRasterLayer(layer, profile, repaint=False, force=True)),
+        timePerLayer('styleVectorLayer.unchanged', vectors,
+                     lambda layer: styler.styleVectorLayer(layer, profile, repaint=False)),
+    ]
+    
+    # Re-applying after a settings change: full restyle against only the changed parts
+    label_profile = replace(profile, label_size=profile.label_size + 2)
+    label_profile2 = replace(profile, label_size=profile.label_size + 4)
+    opacity_profile = replace(profile, opacity=profile.opacity / 2)
+    vector_opacity_profile = replace(label_profile2, opacity=opacity_profile.opacity)
+    results += [
+        timePerLayer('styleVectorLayer.labelChange', vectors,
+                     lambda layer: styler.styleVectorLayer(layer, label_profile, repaint=False, force=True)),
+        timePerLayer('updateLayer.labelFormat', vectors,
+                     lambda layer: styler.updateLayer(layer, label_profile2, repaint=False)),
+        timePerLayer('updateLayer.opacity.rasters', rasters,
+                     lambda layer: styler.updateLayer(layer, opacity_profile, repaint=False)),
+        timePerLayer('updateLayer.opacity.vectors', vectors,
+                     lambda layer: styler.updateLayer(layer, vector_opacity_profile, repaint=False)),
+    ]
+    
+    # Rule matching should not grow with the number of rules; the cold pass
+    # also builds one profile variant per distinct rule combination
+    for rule_count in RULE_COUNTS:
+        rules_profile = replace(profile, style_rules=makeRules(rule_count))
+        engine = styler.ruleEngine(rules_profile)
+        results += [
+            timePerLayer(f'ruleMatch.{rule_count}rules', layers,
+                         lambda layer: engine.matchKey(engine.layerKey(layer))),
+            timePerLayer(f'layerProfile.{rule_count}rules.cold', layers,
+                         lambda layer: styler.layerProfile(layer, rules_profile)),
+            timePerLayer(f'layerProfile.{rule_count}rules.warm', layers,
+                         lambda layer: styler.layerProfile(layer, rules_profile)),
+        ]
+    
+    # Burst handling: fresh layers so the fingerprints do not short-circuit
+    layers = makeLayers(size, raster_source)
+    project.addMapLayers(layers, False)
+    plugin.profile_store.save(replace(profile, batch_enabled=False))
+    results.append(timeBurst('onLayersAdded.immediate', layers, plugin.onLayersAdded))
+    
+    layers = makeLayers(size, raster_source)
+    project.addMapLayers(layers, False)
+    plugin.profile_store.save(replace(profile, batch_enabled=True))
+    plugin.batch_timer = ManualTimer()
+    
+    def batched(burst):
+        plugin.onLayersAdded(burst)
+        while plugin.pending_layer_ids:
+            plugin.flushPendingLayers()
+    
+    results.append(timeBurst('onLayersAdded.batched', layers, batched))
+    
+    # Opening a saved project: what the read itself pays, then the deferred pass
+    for mode in ('skip', 'defer'):
+        layers = makeLayers(size, raster_source)
+        project.addMapLayers(layers, False)
+        plugin.profile_store.save(replace(profile, project_load_mode=mode))
+        
+        def projectRead(burst):
+            plugin.onLoadingLayer('')
+            plugin.onLayersAdded(burst)
+            plugin.onProjectRead()
+        
+        results.append(timeBurst(f'projectLoad.{mode}', layers, projectRead))
+    
+    def firstRender(burst):
+        plugin.onFirstRender()
+        while plugin.pending_layer_ids:
+            plugin.flushPendingLayers()
+    
+    results.append(timeBurst('projectLoad.defer.afterRender', layers, firstRender))
+    project.removeAllMapLayers()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Auto Style Manager styling hot paths")
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help="comma separated project sizes (number of layers)")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+    
+    mode, app = startQgis()
+    module = loadPlugin()
+    
+    tmp_dir = tempfile.mkdtemp(prefix='asm_bench_')
+    raster_source = '/data/bench.tif'
+    if mode == 'qgis':
+        raster_source = makeRasterSource(tmp_dir)
+    
+    results = []
+    for size in (int(s) for s in args.sizes.split(',') if s.strip()):
+        results.extend(runSize(module, size, raster_source, tmp_dir))
+    
+    report = {
+        'meta': {
+            'mode': mode,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        },
+        'results': results,
+    }
+    if mode == 'qgis':
+        from qgis.core import Qgis
+        report['meta']['qgis'] = Qgis.QGIS_VERSION
+    
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    
+    if app is not None:
+        app.exitQgis()
+    return 0
@@ -0,0 +1,86 @@
+"""
+Auto Style Manager benchmarks - startup
+Times what QGIS pays when it loads the plugin (package import, classFactory()
+and initGui()) in fresh interpreters, and compares it with also importing the
+settings dialog and the styling engine up front, as the plugin used to.
+
+Usage (from the plugin directory):
+    python -m benchmarks.startup [--runs 10] [--output startup.json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from .run import PACKAGE_NAME, PLUGIN_DIR
+
+MODES = ('bootstrap', 'eager')
+
+# Runs in a fresh interpreter so nothing is cached in sys.modules
+CHILD = """
+import importlib, json, sys, time
+from benchmarks import run
+mode = sys.argv[1]
+qgis_mode, app = run.startQgis()
+before = set(sys.modules)
+start = time.perf_counter()
+run.loadPlugin()
+plugin = sys.modules[run.PACKAGE_NAME].classFactory(run.benchIface())
+plugin.initGui()
+if mode == 'eager':
+    importlib.import_module(run.PACKAGE_NAME + '.dialog')
+    importlib.import_module(run.PACKAGE_NAME + '.layer_styler')
+elapsed = time.perf_counter() - start
+loaded = set(sys.modules) - before
+print(json.dumps({
+    'qgis_mode': qgis_mode,
+    'ms': elapsed * 1000.0,
+    'plugin_modules': sorted(m[len(run.PACKAGE_NAME) + 1:] for m in loaded
+                             if m.startswith(run.PACKAGE_NAME + '.')),
+    'numpy_loaded': 'numpy' in loaded,
+}))
+"""
+
+
+def measure(mode):
+    """Run one startup in a child interpreter and return its JSON record"""
+    output = subprocess.run([sys.executable, '-c', CHILD, mode], cwd=PLUGIN_DIR,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time Auto Style Manager plugin startup")
+    parser.add_argument('--runs', type=int, default=10, help="fresh interpreters per mode")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+    
+    report = {'package': PACKAGE_NAME, 'runs': args.runs, 'results': {}}
+    for mode in MODES:
+        records = [measure(mode) for _ in range(args.runs)]
+        samples = [record['ms'] for record in records]
+        report['qgis_mode'] = records[-1]['qgis_mode']
+        report['results'][mode] = {
+            'median_ms': round(statistics.median(samples), 2),
+            'min_ms': round(min(samples), 2),
+            'max_ms': round(max(samples), 2),
+            'plugin_modules': records[-1]['plugin_modules'],
+            'numpy_loaded': records[-1]['numpy_loaded'],
+        }
+    bootstrap = report['results']['bootstrap']['median_ms']
+    eager = report['results']['eager']['median_ms']
+    report['reduction_pct'] = round(100.0 * (eager - bootstrap) / eager, 1) if eager else None
+    
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Auto Style Manager - diagnostics
+Always-on per-stage timings, per-provider histograms and failure counters
+"""
+
+import csv
+import time
+from collections import OrderedDict
+
+
+STAGES = ('classification', 'performance', 'symbol', 'classes', 'stretch', 'labels', 'repaint')
+
+# Upper bounds (ms) of the per-provider latency histogram buckets; the last one is open
+HISTOGRAM_BOUNDS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500)
+
+MAX_FAILED_LAYERS = 1000
+
+
+class LayerTimer:
+    """Time the stages of styling one layer; stages close when the next one starts"""
+    __slots__ = ('diagnostics', 'layer', 'stage', 'started', 'mark')
+    
+    def __init__(self, diagnostics, layer, stage):
+        self.diagnostics = diagnostics
+        self.layer = layer
+        self.stage = stage
+        self.started = self.mark = time.perf_counter()
+    
+    def next(self, stage):
+        """Close the current stage and start another"""
+        now = time.perf_counter()
+        self.diagnostics.addStage(self.stage, now - self.mark)
+        self.stage = stage
+        self.mark = now
+    
+    def skip(self):
+        """Close the current stage; the layer needed no styling"""
+        self.diagnostics.addStage(self.stage, time.perf_counter() - self.mark)
+    
+    def finish(self):
+        """Close the current stage and record the layer total"""
+        now = time.perf_counter()
+        self.diagnostics.addStage(self.stage, now - self.mark)
+        self.diagnostics.addLayer(self.layer, now - self.started)
+    
+    def fail(self, exc):
+        """Record a failure in the current stage; returns True the first time it is seen"""
+        self.diagnostics.addStage(self.stage, time.perf_counter() - self.mark)
+        return self.diagnostics.recordFailure(self.layer, self.stage, exc)
+
+
+class StylingDiagnostics:
+    """Cheap counters describing where styling time goes and what fails"""
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        # stage -> [count, total seconds, max seconds]
+        self.stages = OrderedDict((stage, [0, 0.0, 0.0]) for stage in STAGES)
+        # provider -> bucket counts (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.providers = {}
+        # stage -> failure count
+        self.failures = {}
+        # layer id -> (layer name, stage, error text, unix time)
+        self.last_errors = OrderedDict()
+        self.failure_kinds = set()
+        self.styled_layers = 0
+        # event name -> count, for work done outside the styling stages
+        self.counters = OrderedDict()
+    
+    def timer(self, layer, stage='classification'):
+        return LayerTimer(self, layer, stage)
+    
+    def addStage(self, stage, seconds):
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        if seconds > entry[2]:
+            entry[2] = seconds
+    
+    def addLayer(self, layer, seconds):
+        """Count a styled layer in its provider's latency histogram"""
+        self.styled_layers += 1
+        provider = layer.providerType() or 'unknown'
+        buckets = self.providers.get(provider)
+        if buckets is None:
+            buckets = self.providers[provider] = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        ms = seconds * 1000.0
+        for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if ms <= bound:
+                buckets[i] += 1
+                break
+        else:
+            buckets[-1] += 1
+    
+    def count(self, name, n=1):
+        """Increment a named event counter"""
+        self.counters[name] = self.counters.get(name, 0) + n
+    
+    def recordFailure(self, layer, stage, exc):
+        """Count a failure and keep the last error per layer"""
+        self.failures[stage] = self.failures.get(stage, 0) + 1
+        try:
+            layer_id, layer_name = layer.id(), layer.name()
+        except Exception:
+            layer_id = layer_name = '?'
+        self.last_errors.pop(layer_id, None)
+        self.last_errors[layer_id] = (layer_name, stage, f"{type(exc).__name__}: {exc}", time.time())
+        if len(self.last_errors) > MAX_FAILED_LAYERS:
+            self.last_errors.popitem(last=False)
+        
+        kind = (stage, type(exc).__name__)
+        if kind in self.failure_kinds:
+            return False
+        self.failure_kinds.add(kind)
+        return True
+    
+    def failureCount(self):
+        return sum(self.failures.values())
+    
+    @staticmethod
+    def bucketLabels():
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS]
+        labels.append(f">{HISTOGRAM_BOUNDS_MS[-1]}ms")
+        return labels
+    
+    def reportLines(self):
+        """Human readable summary, one line per entry"""
+        lines = [f"Styled layers: {self.styled_layers}    Failures: {self.failureCount()}", "",
+                 "Stage            calls   total ms   mean ms    max ms"]
+        for stage, (count, total, peak) in self.stages.items():
+            mean = total / count if count else 0.0
+            lines.append(f"{stage:<15}{count:>7}{total * 1000:>11.1f}{mean * 1000:>10.3f}{peak * 1000:>10.2f}")
+        
+        if self.providers:
+            lines += ["", "Per-provider layer latency: " + "  ".join(self.bucketLabels())]
+            for provider, buckets in sorted(self.providers.items()):
+                lines.append(f"{provider:<15}" + "  ".join(str(n) for n in buckets))
+        
+        if self.counters:
+            lines += ["", "Background work:"]
+            for name, count in self.counters.items():
+                lines.append(f"{name:<30}{count:>7}")
+        
+        if self.last_errors:
+            lines += ["", "Last error per layer:"]
+            for layer_id, (name, stage, error, _when) in reversed(self.last_errors.items()):
+                lines.append(f"{name} [{stage}] {error}")
+        return lines
+    
+    def writeCsv(self, path):
+        """Export every counter as section,key,... rows"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['section', 'key', 'count', 'total_ms', 'mean_ms', 'max_ms'])
+            for stage, (count, total, peak) in self.stages.items():
+                mean = total / count if count else 0.0
+                writer.writerow(['stage', stage, count, f"{total * 1000:.3f}",
+                                 f"{mean * 1000:.3f}", f"{peak * 1000:.3f}"])
+            
+            writer.writerow([])
+            writer.writerow(['section', 'provider'] + self.bucketLabels())
+            for provider, buckets in sorted(self.providers.items()):
+                writer.writerow(['histogram', provider] + buckets)
+            
+            writer.writerow([])
+            writer.writerow(['section', 'event', 'count'])
+            for name, count in self.counters.items():
+                writer.writerow(['counter', name, count])
+            
+            writer.writerow([])
+            writer.writerow(['section', 'layer_id', 'layer_name', 'stage', 'error', 'unix_time'])
+            for layer_id, (name, stage, error, when) in self.last_errors.items():
+                writer.writerow(['failure', layer_id, name, stage, error, f"{when:.0f}"])
@@ -0,0 +1,1153 @@
+"""
+Auto Style Manager - settings dialog
+Imported on the first run() so QGIS startup does not build the widget tree
+"""
+
+import os
+from qgis.PyQt.QtCore import Qt
+from qgis.PyQt.QtGui import QColor, QFontDatabase
+from qgis.PyQt.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel,
+                                 QSpinBox, QDoubleSpinBox, QPushButton, QCheckBox,
+                                 QComboBox, QTabWidget, QWidget, QMessageBox, QLineEdit,
+                                 QPlainTextEdit, QFileDialog, QListWidget, QListWidgetItem)
+from qgis.core import Qgis, QgsMessageLog, QgsProject, QgsVectorLayer
+from qgis.gui import QgsColorButton
+
+from .style_profile import PROJECT_LOAD_ENTRY, PROJECT_LOAD_MODES, SETTINGS_GROUP, StyleProfile, ProfileStore
+from .apply_job import ApplyToExistingJob
+from .auto_classify import CLASSIFY_METHODS, CLASSIFY_MODES
+from .label_fields import DEFAULT_LABEL_PRIORITY
+from .label_guardrails import estimateLabelLoad, labelLoadLines
+from .label_sampling import MAX_SAMPLE_ROWS
+from .raster_stats import numpyAvailable
+from .raster_overviews import RESAMPLING_METHODS
+from .render_budget import levelName, recordingAvailable
+from .rule_engine import RuleEngine, RULES_HELP
+from .vector_cache import ORIGINAL_SOURCE_PROPERTY
+
+
+PROFILE_FILE_SUFFIX = ".asmprofile"
+PROFILE_FILE_FILTER = f"Auto Style Manager profiles (*{PROFILE_FILE_SUFFIX} *.json)"
+
+
+class AutoStyleManagerDialog(QDialog):
+    def __init__(self, parent=None, plugin=None):
+        super().__init__(parent)
+        self.setWindowTitle("Auto Style Manager")
+        self.setMinimumWidth(550)
+        self.plugin = plugin
+        self.profile_store = plugin.profile_store if plugin else ProfileStore()
+        self.apply_job = None
+        self.initUI()
+        self.loadSettings()
+        
+    def initUI(self):
+        layout = QVBoxLayout()
+        
+        # Create tab widget
+        tabs = QTabWidget()
+        
+        # ==================== RASTER TAB ====================
+        raster_tab = QWidget()
+        raster_layout = QVBoxLayout()
+        
+        # Enable raster auto-styling
+        self.raster_enabled = QCheckBox("Enable automatic raster styling")
+        raster_layout.addWidget(self.raster_enabled)
+        
+        # Exclude basemaps
+        self.exclude_basemaps = QCheckBox("Exclude WMS/XYZ/basemap layers (e.g., Google, OSM)")
+        self.exclude_basemaps.setChecked(True)
+        raster_layout.addWidget(self.exclude_basemaps)
+        
+        # Extra basemap patterns
+        patterns_layout = QHBoxLayout()
+        patterns_layout.addWidget(QLabel("Extra basemap patterns:"))
+        self.basemap_patterns = QLineEdit()
+        self.basemap_patterns.setPlaceholderText("e.g., ^ortho_;tiles\\.example\\.com")
+        self.basemap_patterns.setToolTip("Semicolon separated regular expressions matched against layer name and source")
+        patterns_layout.addWidget(self.basemap_patterns)
+        raster_layout.addLayout(patterns_layout)
+        
+        # Raster opacity
+        opacity_group = QGroupBox("Default Raster Opacity")
+        opacity_layout = QHBoxLayout()
+        opacity_layout.addWidget(QLabel("Opacity:"))
+        self.opacity_spin = QDoubleSpinBox()
+        self.opacity_spin.setRange(0.0, 1.0)
+        self.opacity_spin.setValue(0.7)
+        self.opacity_spin.setSingleStep(0.05)
+        self.opacity_spin.setDecimals(2)
+        opacity_layout.addWidget(self.opacity_spin)
+        opacity_layout.addWidget(QLabel("(0.0 = transparent, 1.0 = opaque)"))
+        opacity_layout.addStretch()
+        opacity_group.setLayout(opacity_layout)
+        raster_layout.addWidget(opacity_group)
+        
+        # Percentile contrast stretch from a sample of the raster
+        stretch_group = QGroupBox("Automatic Contrast Stretch")
+        stretch_layout = QVBoxLayout()
+        self.auto_stretch = QCheckBox("Stretch from sampled percentiles (skips full statistics scans)")
+        stretch_layout.addWidget(self.auto_stretch)
+        
+        limits_layout = QHBoxLayout()
+        limits_layout.addWidget(QLabel("Low %:"))
+        self.stretch_low = QDoubleSpinBox()
+        self.stretch_low.setRange(0.0, 50.0)
+        self.stretch_low.setValue(2.0)
+        self.stretch_low.setSingleStep(0.5)
+        limits_layout.addWidget(self.stretch_low)
+        limits_layout.addWidget(QLabel("High %:"))
+        self.stretch_high = QDoubleSpinBox()
+        self.stretch_high.setRange(50.0, 100.0)
+        self.stretch_high.setValue(98.0)
+        self.stretch_high.setSingleStep(0.5)
+        limits_layout.addWidget(self.stretch_high)
+        limits_layout.addStretch()
+        stretch_layout.addLayout(limits_layout)
+        
+        if not numpyAvailable():
+            self.auto_stretch.setEnabled(False)
+            stretch_layout.addWidget(QLabel("NumPy is not available; QGIS default stretch is used."))
+        stretch_group.setLayout(stretch_layout)
+        raster_layout.addWidget(stretch_group)
+        
+        # Pyramids for large rasters, built in the background
+        overview_group = QGroupBox("Overviews (Pyramids)")
+        overview_layout = QVBoxLayout()
+        self.build_overviews = QCheckBox("Build missing overviews for large rasters when added")
+        overview_layout.addWidget(self.build_overviews)
+        
+        overview_options = QHBoxLayout()
+        overview_options.addWidget(QLabel("Larger than:"))
+        self.overview_threshold = QSpinBox()
+        self.overview_threshold.setRange(1, 100000)
+        self.overview_threshold.setValue(64)
+        self.overview_threshold.setSuffix(" MP")
+        overview_options.addWidget(self.overview_threshold)
+        overview_options.addWidget(QLabel("Resampling:"))
+        self.overview_resampling = QComboBox()
+        self.overview_resampling.addItems(RESAMPLING_METHODS)
+        overview_options.addWidget(self.overview_resampling)
+        overview_options.addStretch()
+        overview_layout.addLayout(overview_options)
+        self.fast_resampling = QCheckBox("Use nearest neighbour resampling (fastest to draw)")
+        overview_layout.addWidget(self.fast_resampling)
+        overview_group.setLayout(overview_layout)
+        raster_layout.addWidget(overview_group)
+        
+        # One VRT instead of hundreds of tile layers
+        mosaic_group = QGroupBox("Tile Mosaics")
+        mosaic_layout = QHBoxLayout()
+        self.mosaic_tiles = QCheckBox("Replace bursts of compatible tiles with one VRT, from")
+        self.mosaic_tiles.setToolTip("Local GDAL rasters added together with the same CRS, band count "
+                                     "and data type are mosaicked in the background")
+        mosaic_layout.addWidget(self.mosaic_tiles)
+        self.mosaic_min_tiles = QSpinBox()
+        self.mosaic_min_tiles.setRange(2, 100000)
+        self.mosaic_min_tiles.setValue(20)
+        self.mosaic_min_tiles.setSuffix(" tiles")
+        mosaic_layout.addWidget(self.mosaic_min_tiles)
+        mosaic_layout.addStretch()
+        mosaic_group.setLayout(mosaic_layout)
+        raster_layout.addWidget(mosaic_group)
+        
+        raster_layout.addStretch()
+        raster_tab.setLayout(raster_layout)
+        tabs.addTab(raster_tab, "Raster Layers")
+        
+        # ==================== VECTOR TAB ====================
+        vector_tab = QWidget()
+        vector_layout = QVBoxLayout()
+        
+        # Enable vector auto-styling
+        self.vector_enabled = QCheckBox("Enable automatic vector styling")
+        vector_layout.addWidget(self.vector_enabled)
+        
+        # Point styling
+        point_group = QGroupBox("Point Layers")
+        point_layout = QVBoxLayout()
+        
+        point_color_layout = QHBoxLayout()
+        point_color_layout.addWidget(QLabel("Fill Color:"))
+        self.point_color = QgsColorButton()
+        self.point_color.setColor(QColor("#e74c3c"))
+        point_color_layout.addWidget(self.point_color)
+        point_color_layout.addStretch()
+        point_layout.addLayout(point_color_layout)
+        
+        point_size_layout = QHBoxLayout()
+        point_size_layout.addWidget(QLabel("Size (mm):"))
+        self.point_size = QDoubleSpinBox()
+        self.point_size.setRange(0.1, 50)
+        self.point_size.setValue(2.5)
+        self.point_size.setSingleStep(0.5)
+        point_size_layout.addWidget(self.point_size)
+        point_size_layout.addStretch()
+        point_layout.addLayout(point_size_layout)
+        
+        point_group.setLayout(point_layout)
+        vector_layout.addWidget(point_group)
+        
+        # Line styling
+        line_group = QGroupBox("Line Layers")
+        line_layout = QVBoxLayout()
+        
+        line_color_layout = QHBoxLayout()
+        line_color_layout.addWidget(QLabel("Color:"))
+        self.line_color = QgsColorButton()
+        self.line_color.setColor(QColor("#3498db"))
+        line_color_layout.addWidget(self.line_color)
+        line_color_layout.addStretch()
+        line_layout.addLayout(line_color_layout)
+        
+        line_width_layout = QHBoxLayout()
+        line_width_layout.addWidget(QLabel("Width (mm):"))
+        self.line_width = QDoubleSpinBox()
+        self.line_width.setRange(0.1, 20)
+        self.line_width.setValue(0.4)
+        self.line_width.setSingleStep(0.1)
+        line_width_layout.addWidget(self.line_width)
+        line_width_layout.addStretch()
+        line_layout.addLayout(line_width_layout)
+        
+        line_group.setLayout(line_layout)
+        vector_layout.addWidget(line_group)
+        
+        # Polygon styling
+        polygon_group = QGroupBox("Polygon Layers")
+        polygon_layout = QVBoxLayout()
+        
+        poly_fill_layout = QHBoxLayout()
+        poly_fill_layout.addWidget(QLabel("Fill Color:"))
+        self.polygon_fill = QgsColorButton()
+        self.polygon_fill.setColor(QColor(144, 238, 144, 100))
+        poly_fill_layout.addWidget(self.polygon_fill)
+        poly_fill_layout.addStretch()
+        polygon_layout.addLayout(poly_fill_layout)
+        
+        poly_stroke_layout = QHBoxLayout()
+        poly_stroke_layout.addWidget(QLabel("Stroke Color:"))
+        self.polygon_stroke = QgsColorButton()
+        self.polygon_stroke.setColor(QColor("#2ecc71"))
+        poly_stroke_layout.addWidget(self.polygon_stroke)
+        poly_stroke_layout.addStretch()
+        polygon_layout.addLayout(poly_stroke_layout)
+        
+        poly_width_layout = QHBoxLayout()
+        poly_width_layout.addWidget(QLabel("Stroke Width (mm):"))
+        self.polygon_width = QDoubleSpinBox()
+        self.polygon_width.setRange(0.1, 10)
+        self.polygon_width.setValue(0.4)
+        self.polygon_width.setSingleStep(0.1)
+        poly_width_layout.addWidget(self.polygon_width)
+        poly_width_layout.addStretch()
+        polygon_layout.addLayout(poly_width_layout)
+        
+        polygon_group.setLayout(polygon_layout)
+        vector_layout.addWidget(polygon_group)
+        
+        # Cheaper rendering for layers with many features
+        perf_group = QGroupBox("Large Layer Performance")
+        perf_layout = QVBoxLayout()
+        self.perf_profile = QCheckBox("Adapt rendering to the layer's feature count")
+        perf_layout.addWidget(self.perf_profile)
+        
+        tiers_layout = QHBoxLayout()
+        tiers_layout.addWidget(QLabel("Heavy from:"))
+        self.heavy_features = QSpinBox()
+        self.heavy_features.setRange(1, 100000000)
+        self.heavy_features.setValue(50000)
+        self.heavy_features.setSuffix(" features")
+        tiers_layout.addWidget(self.heavy_features)
+        tiers_layout.addWidget(QLabel("Dense from:"))
+        self.dense_features = QSpinBox()
+        self.dense_features.setRange(1, 100000000)
+        self.dense_features.setValue(500000)
+        self.dense_features.setSuffix(" features")
+        tiers_layout.addWidget(self.dense_features)
+        tiers_layout.addStretch()
+        perf_layout.addLayout(tiers_layout)
+        
+        scales_layout = QHBoxLayout()
+        scales_layout.addWidget(QLabel("Hide beyond 1:"))
+        self.heavy_min_scale = QSpinBox()
+        self.heavy_min_scale.setRange(0, 100000000)
+        self.heavy_min_scale.setValue(1000000)
+        self.heavy_min_scale.setSpecialValueText("no limit")
+        scales_layout.addWidget(self.heavy_min_scale)
+        scales_layout.addWidget(QLabel("(heavy)  1:"))
+        self.dense_min_scale = QSpinBox()
+        self.dense_min_scale.setRange(0, 100000000)
+        self.dense_min_scale.setValue(250000)
+        self.dense_min_scale.setSpecialValueText("no limit")
+        scales_layout.addWidget(self.dense_min_scale)
+        scales_layout.addWidget(QLabel("(dense)"))
+        scales_layout.addStretch()
+        perf_layout.addLayout(scales_layout)
+        
+        simplify_layout = QHBoxLayout()
+        simplify_layout.addWidget(QLabel("Simplification (px):"))
+        self.simplify_threshold = QDoubleSpinBox()
+        self.simplify_threshold.setRange(0.0, 10.0)
+        self.simplify_threshold.setValue(1.0)
+        self.simplify_threshold.setSingleStep(0.25)
+        simplify_layout.addWidget(self.simplify_threshold)
+        self.dense_no_outline = QCheckBox("No polygon outlines on dense layers")
+        simplify_layout.addWidget(self.dense_no_outline)
+        simplify_layout.addStretch()
+        perf_layout.addLayout(simplify_layout)
+        
+        perf_group.setLayout(perf_layout)
+        vector_layout.addWidget(perf_group)
+        
+        # Spatial indexes for large files, created in the background
+        index_group = QGroupBox("Spatial Index")
+        index_layout = QHBoxLayout()
+        self.build_indexes = QCheckBox("Create missing spatial indexes above")
+        index_layout.addWidget(self.build_indexes)
+        self.index_threshold = QSpinBox()
+        self.index_threshold.setRange(0, 100000000)
+        self.index_threshold.setValue(10000)
+        self.index_threshold.setSuffix(" features")
+        index_layout.addWidget(self.index_threshold)
+        index_layout.addStretch()
+        index_group.setLayout(index_layout)
+        vector_layout.addWidget(index_group)
+        
+        # GeoPackage copies of sources that are re-parsed or re-fetched on every draw
+        cache_group = QGroupBox("Local Cache")
+        cache_layout = QVBoxLayout()
+        self.cache_sources = QCheckBox("Copy slow sources to an indexed local GeoPackage")
+        self.cache_sources.setToolTip("GeoJSON, CSV, KML, GML and GPX files, WFS and files read over HTTP. "
+                                      "Layers are styled right away and switched to the copy once it is ready")
+        cache_layout.addWidget(self.cache_sources)
+        
+        cache_options = QHBoxLayout()
+        cache_options.addWidget(QLabel("Local files from:"))
+        self.cache_min_mb = QSpinBox()
+        self.cache_min_mb.setRange(0, 100000)
+        self.cache_min_mb.setValue(10)
+        self.cache_min_mb.setSuffix(" MB")
+        cache_options.addWidget(self.cache_min_mb)
+        cache_options.addWidget(QLabel("Cache size limit:"))
+        self.cache_max_mb = QSpinBox()
+        self.cache_max_mb.setRange(10, 1000000)
+        self.cache_max_mb.setValue(2048)
+        self.cache_max_mb.setSuffix(" MB")
+        cache_options.addWidget(self.cache_max_mb)
+        cache_options.addStretch()
+        cache_layout.addLayout(cache_options)
+        
+        cache_buttons = QHBoxLayout()
+        self.cache_status = QLabel()
+        cache_buttons.addWidget(self.cache_status)
+        cache_buttons.addStretch()
+        refresh_cache_btn = QPushButton("Refresh Cached Layers")
+        refresh_cache_btn.setToolTip("Copy the cached project layers again from their original sources")
+        refresh_cache_btn.clicked.connect(self.refreshCachedLayers)
+        cache_buttons.addWidget(refresh_cache_btn)
+        restore_cache_btn = QPushButton("Use Original Sources")
+        restore_cache_btn.setToolTip("Point the cached project layers back at their original sources, "
+                                     "e.g. before sharing the project")
+        restore_cache_btn.clicked.connect(self.restoreCachedLayers)
+        cache_buttons.addWidget(restore_cache_btn)
+        cache_layout.addLayout(cache_buttons)
+        
+        cache_group.setLayout(cache_layout)
+        vector_layout.addWidget(cache_group)
+        
+        # Graduated / categorized renderers from a sample of a field
+        classify_group = QGroupBox("Automatic Classification")
+        classify_layout = QVBoxLayout()
+        self.classify_enabled = QCheckBox("Classify layers by a field instead of one flat color")
+        classify_layout.addWidget(self.classify_enabled)
+        
+        classify_field_layout = QHBoxLayout()
+        classify_field_layout.addWidget(QLabel("Field:"))
+        self.classify_field = QLineEdit()
+        self.classify_field.setPlaceholderText("first numeric field")
+        classify_field_layout.addWidget(self.classify_field)
+        self.classify_mode = QComboBox()
+        self.classify_mode.addItems(CLASSIFY_MODES)
+        classify_field_layout.addWidget(self.classify_mode)
+        self.classify_method = QComboBox()
+        self.classify_method.addItems(CLASSIFY_METHODS)
+        classify_field_layout.addWidget(self.classify_method)
+        classify_layout.addLayout(classify_field_layout)
+        
+        classify_options_layout = QHBoxLayout()
+        classify_options_layout.addWidget(QLabel("Classes:"))
+        self.classify_classes = QSpinBox()
+        self.classify_classes.setRange(2, 20)
+        self.classify_classes.setValue(5)
+        classify_options_layout.addWidget(self.classify_classes)
+        classify_options_layout.addWidget(QLabel("Sample:"))
+        self.classify_sample = QSpinBox()
+        self.classify_sample.setRange(100, 1000000)
+        self.classify_sample.setValue(10000)
+        self.classify_sample.setSuffix(" values")
+        classify_options_layout.addWidget(self.classify_sample)
+        classify_options_layout.addWidget(QLabel("Ramp:"))
+        self.classify_ramp = QLineEdit()
+        self.classify_ramp.setText("Viridis")
+        classify_options_layout.addWidget(self.classify_ramp)
+        classify_layout.addLayout(classify_options_layout)
+        
+        if not numpyAvailable():
+            self.classify_enabled.setEnabled(False)
+            classify_layout.addWidget(QLabel("NumPy is not available; classification is disabled."))
+        classify_group.setLayout(classify_layout)
+        vector_layout.addWidget(classify_group)
+        
+        vector_layout.addStretch()
+        vector_tab.setLayout(vector_layout)
+        tabs.addTab(vector_tab, "Vector Layers")
+        
+        # ==================== LABELS TAB ====================
+        labels_tab = QWidget()
+        labels_layout = QVBoxLayout()
+        
+        # Enable labels
+        self.labels_enabled = QCheckBox("Enable automatic labeling for vector layers")
+        labels_layout.addWidget(self.labels_enabled)
+        
+        labels_layout.addWidget(QLabel("<i>Note: If the primary field is missing, labels try the fallback fields in order.</i>"))
+        
+        # Label field
+        field_layout = QHBoxLayout()
+        field_layout.addWidget(QLabel("Primary Label Field:"))
+        self.label_field = QLineEdit()
+        self.label_field.setText("name")
+        self.label_field.setPlaceholderText("e.g., name, id, label")
+        field_layout.addWidget(self.label_field)
+        labels_layout.addLayout(field_layout)
+        
+        # Fallback fields
+        priority_layout = QHBoxLayout()
+        priority_layout.addWidget(QLabel("Fallback Fields:"))
+        self.label_priority = QLineEdit()
+        self.label_priority.setText(DEFAULT_LABEL_PRIORITY)
+        self.label_priority.setToolTip("Comma separated field names tried in order (case-sensitive)")
+        priority_layout.addWidget(self.label_priority)
+        labels_layout.addLayout(priority_layout)
+        
+        # Content sampling
+        sampling_layout = QHBoxLayout()
+        self.label_sampling = QCheckBox("Pick the field from sampled content, up to")
+        self.label_sampling.setToolTip("Score text fields on non-empty ratio, uniqueness and length "
+                                       "using the first features of each layer (attributes only)")
+        sampling_layout.addWidget(self.label_sampling)
+        self.label_sample_rows = QSpinBox()
+        self.label_sample_rows.setRange(10, MAX_SAMPLE_ROWS)
+        self.label_sample_rows.setValue(500)
+        sampling_layout.addWidget(self.label_sample_rows)
+        sampling_layout.addWidget(QLabel("features"))
+        sampling_layout.addStretch()
+        labels_layout.addLayout(sampling_layout)
+        
+        # Font size
+        font_size_layout = QHBoxLayout()
+        font_size_layout.addWidget(QLabel("Font Size (pt):"))
+        self.label_size = QDoubleSpinBox()
+        self.label_size.setRange(4, 72)
+        self.label_size.setValue(10)
+        self.label_size.setSingleStep(1)
+        font_size_layout.addWidget(self.label_size)
+        font_size_layout.addStretch()
+        labels_layout.addLayout(font_size_layout)
+        
+        # Font color
+        font_color_layout = QHBoxLayout()
+        font_color_layout.addWidget(QLabel("Font Color:"))
+        self.label_color = QgsColorButton()
+        self.label_color.setColor(QColor("#000000"))
+        font_color_layout.addWidget(self.label_color)
+        font_color_layout.addStretch()
+        labels_layout.addLayout(font_color_layout)
+        
+        # Buffer
+        self.label_buffer = QCheckBox("Enable text buffer (outline)")
+        self.label_buffer.setChecked(True)
+        labels_layout.addWidget(self.label_buffer)
+        
+        buffer_size_layout = QHBoxLayout()
+        buffer_size_layout.addWidget(QLabel("Buffer Size (mm):"))
+        self.buffer_size = QDoubleSpinBox()
+        self.buffer_size.setRange(0.1, 10)
+        self.buffer_size.setValue(1.0)
+        self.buffer_size.setSingleStep(0.1)
+        buffer_size_layout.addWidget(self.buffer_size)
+        buffer_size_layout.addStretch()
+        labels_layout.addLayout(buffer_size_layout)
+        
+        buffer_color_layout = QHBoxLayout()
+        buffer_color_layout.addWidget(QLabel("Buffer Color:"))
+        self.buffer_color = QgsColorButton()
+        self.buffer_color.setColor(QColor("#ffffff"))
+        buffer_color_layout.addWidget(self.buffer_color)
+        buffer_color_layout.addStretch()
+        labels_layout.addLayout(buffer_color_layout)
+        
+        # Guardrails for layers in the heavy/dense tiers of the Vector tab
+        guard_group = QGroupBox("Label Performance")
+        guard_layout = QVBoxLayout()
+        self.adaptive_labels = QCheckBox("Limit labels on heavy and dense layers")
+        guard_layout.addWidget(self.adaptive_labels)
+        
+        guard_scales_layout = QHBoxLayout()
+        guard_scales_layout.addWidget(QLabel("Labels beyond 1:"))
+        self.label_heavy_scale = QSpinBox()
+        self.label_heavy_scale.setRange(0, 100000000)
+        self.label_heavy_scale.setValue(50000)
+        self.label_heavy_scale.setSpecialValueText("no limit")
+        guard_scales_layout.addWidget(self.label_heavy_scale)
+        guard_scales_layout.addWidget(QLabel("(heavy)  1:"))
+        self.label_dense_scale = QSpinBox()
+        self.label_dense_scale.setRange(0, 100000000)
+        self.label_dense_scale.setValue(10000)
+        self.label_dense_scale.setSpecialValueText("no limit")
+        guard_scales_layout.addWidget(self.label_dense_scale)
+        guard_scales_layout.addWidget(QLabel("(dense) are hidden"))
+        guard_scales_layout.addStretch()
+        guard_layout.addLayout(guard_scales_layout)
+        
+        limit_layout = QHBoxLayout()
+        limit_layout.addWidget(QLabel("Max labels per layer:"))
+        self.label_limit = QSpinBox()
+        self.label_limit.setRange(0, 1000000)
+        self.label_limit.setValue(2000)
+        self.label_limit.setSpecialValueText("no limit")
+        limit_layout.addWidget(self.label_limit)
+        self.dense_label_obstacles = QCheckBox("Dense layers act as label obstacles")
+        limit_layout.addWidget(self.dense_label_obstacles)
+        limit_layout.addStretch()
+        guard_layout.addLayout(limit_layout)
+        
+        guard_group.setLayout(guard_layout)
+        labels_layout.addWidget(guard_group)
+        
+        # Estimated labeling cost of the current project
+        load_group = QGroupBox("Estimated Label Load")
+        load_layout = QVBoxLayout()
+        self.label_load_view = QPlainTextEdit()
+        self.label_load_view.setReadOnly(True)
+        self.label_load_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.label_load_view.setMaximumHeight(120)
+        load_layout.addWidget(self.label_load_view)
+        estimate_btn = QPushButton("Estimate")
+        estimate_btn.clicked.connect(self.refreshLabelLoad)
+        load_layout.addWidget(estimate_btn)
+        load_group.setLayout(load_layout)
+        labels_layout.addWidget(load_group)
+        
+        labels_layout.addStretch()
+        labels_tab.setLayout(labels_layout)
+        tabs.addTab(labels_tab, "Labels")
+        
+        # ==================== PERFORMANCE TAB ====================
+        performance_tab = QWidget()
+        performance_layout = QVBoxLayout()
+        
+        # Batching of layersAdded bursts
+        batch_group = QGroupBox("Batch Layer Additions")
+        batch_layout = QVBoxLayout()
+        
+        self.batch_enabled = QCheckBox("Style added layers in batches with a single canvas refresh")
+        self.batch_enabled.setChecked(True)
+        batch_layout.addWidget(self.batch_enabled)
+        
+        batch_size_layout = QHBoxLayout()
+        batch_size_layout.addWidget(QLabel("Max layers per batch:"))
+        self.batch_size = QSpinBox()
+        self.batch_size.setRange(1, 10000)
+        self.batch_size.setValue(200)
+        batch_size_layout.addWidget(self.batch_size)
+        batch_size_layout.addStretch()
+        batch_layout.addLayout(batch_size_layout)
+        
+        batch_interval_layout = QHBoxLayout()
+        batch_interval_layout.addWidget(QLabel("Debounce interval (ms):"))
+        self.batch_interval = QSpinBox()
+        self.batch_interval.setRange(0, 5000)
+        self.batch_interval.setValue(150)
+        self.batch_interval.setSingleStep(50)
+        batch_interval_layout.addWidget(self.batch_interval)
+        batch_interval_layout.addStretch()
+        batch_layout.addLayout(batch_interval_layout)
+        
+        batch_group.setLayout(batch_layout)
+        performance_layout.addWidget(batch_group)
+        
+        # Layers added by opening a project already carry their saved styles
+        load_group = QGroupBox("Opening Projects")
+        load_layout = QVBoxLayout()
+        load_layout.addWidget(QLabel("<i>skip: keep saved styles; defer: style after the first map render; "
+                                     "style: style while loading</i>"))
+        
+        load_mode_layout = QHBoxLayout()
+        load_mode_layout.addWidget(QLabel("Layers of an opened project:"))
+        self.project_load_mode = QComboBox()
+        self.project_load_mode.addItems(PROJECT_LOAD_MODES)
+        load_mode_layout.addWidget(self.project_load_mode)
+        load_mode_layout.addStretch()
+        load_layout.addLayout(load_mode_layout)
+        
+        project_mode_layout = QHBoxLayout()
+        project_mode_layout.addWidget(QLabel("Override for the current project:"))
+        self.project_override = QComboBox()
+        self.project_override.addItem("(use the setting above)", "")
+        for mode in PROJECT_LOAD_MODES:
+            self.project_override.addItem(mode, mode)
+        self.project_override.setToolTip("Stored in the project file; takes effect the next time it is opened")
+        project_mode_layout.addWidget(self.project_override)
+        project_mode_layout.addStretch()
+        load_layout.addLayout(project_mode_layout)
+        
+        load_group.setLayout(load_layout)
+        performance_layout.addWidget(load_group)
+        
+        # Cheaper styling for layers that keep rendering slowly
+        budget_group = QGroupBox("Render Budget")
+        budget_layout = QVBoxLayout()
+        self.render_budget = QCheckBox("Make layers cheaper when they keep going over the render budget")
+        budget_layout.addWidget(self.render_budget)
+        
+        budget_options = QHBoxLayout()
+        budget_options.addWidget(QLabel("Budget per layer:"))
+        self.render_budget_ms = QSpinBox()
+        self.render_budget_ms.setRange(10, 600000)
+        self.render_budget_ms.setValue(500)
+        self.render_budget_ms.setSuffix(" ms")
+        budget_options.addWidget(self.render_budget_ms)
+        budget_options.addWidget(QLabel("after"))
+        self.render_budget_strikes = QSpinBox()
+        self.render_budget_strikes.setRange(1, 100)
+        self.render_budget_strikes.setValue(3)
+        self.render_budget_strikes.setSuffix(" renders in a row")
+        budget_options.addWidget(self.render_budget_strikes)
+        budget_options.addStretch()
+        budget_layout.addLayout(budget_options)
+        
+        self.render_status = QLabel()
+        budget_layout.addWidget(self.render_status)
+        self.render_list = QListWidget()
+        self.render_list.setSelectionMode(QListWidget.ExtendedSelection)
+        budget_layout.addWidget(self.render_list)
+        
+        render_buttons = QHBoxLayout()
+        render_refresh_btn = QPushButton("Refresh")
+        render_refresh_btn.clicked.connect(self.refreshRenderTimes)
+        render_buttons.addWidget(render_refresh_btn)
+        render_buttons.addStretch()
+        revert_btn = QPushButton("Revert Selected")
+        revert_btn.setToolTip("Restore the regular styling of the selected adjusted layers")
+        revert_btn.clicked.connect(self.revertSelectedLayers)
+        render_buttons.addWidget(revert_btn)
+        revert_all_btn = QPushButton("Revert All")
+        revert_all_btn.clicked.connect(self.revertAllLayers)
+        render_buttons.addWidget(revert_all_btn)
+        budget_layout.addLayout(render_buttons)
+        
+        budget_group.setLayout(budget_layout)
+        performance_layout.addWidget(budget_group)
+        
+        performance_layout.addStretch()
+        performance_tab.setLayout(performance_layout)
+        tabs.addTab(performance_tab, "Performance")
+        self.performance_tab = performance_tab
+        
+        # ==================== RULES TAB ====================
+        rules_tab = QWidget()
+        rules_layout = QVBoxLayout()
+        
+        rules_help = QLabel(RULES_HELP)
+        rules_help.setWordWrap(True)
+        rules_layout.addWidget(rules_help)
+        
+        self.style_rules = QPlainTextEdit()
+        self.style_rules.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.style_rules.setPlaceholderText("name=roads_* geometry=line -> line_color=#808080 line_width=1.2")
+        rules_layout.addWidget(self.style_rules)
+        
+        rules_buttons = QHBoxLayout()
+        check_rules_btn = QPushButton("Check Rules")
+        check_rules_btn.setToolTip("Compile the rules and list the project layers they match")
+        check_rules_btn.clicked.connect(self.checkRules)
+        rules_buttons.addWidget(check_rules_btn)
+        rules_buttons.addStretch()
+        rules_layout.addLayout(rules_buttons)
+        
+        self.rules_report = QPlainTextEdit()
+        self.rules_report.setReadOnly(True)
+        self.rules_report.setMaximumHeight(120)
+        rules_layout.addWidget(self.rules_report)
+        
+        rules_tab.setLayout(rules_layout)
+        tabs.addTab(rules_tab, "Rules")
+        
+        # ==================== DIAGNOSTICS TAB ====================
+        self.diagnostics_tab = QWidget()
+        diagnostics_layout = QVBoxLayout()
+        
+        self.diagnostics_view = QPlainTextEdit()
+        self.diagnostics_view.setReadOnly(True)
+        self.diagnostics_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        diagnostics_layout.addWidget(self.diagnostics_view)
+        
+        diagnostics_buttons = QHBoxLayout()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.refreshDiagnostics)
+        diagnostics_buttons.addWidget(refresh_btn)
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.resetDiagnostics)
+        diagnostics_buttons.addWidget(reset_btn)
+        diagnostics_buttons.addStretch()
+        log_btn = QPushButton("Write to Log")
+        log_btn.setToolTip("Write the summary to the QGIS message log")
+        log_btn.clicked.connect(self.logDiagnostics)
+        diagnostics_buttons.addWidget(log_btn)
+        csv_btn = QPushButton("Export CSV...")
+        csv_btn.clicked.connect(self.exportDiagnostics)
+        diagnostics_buttons.addWidget(csv_btn)
+        diagnostics_layout.addLayout(diagnostics_buttons)
+        
+        self.diagnostics_tab.setLayout(diagnostics_layout)
+        tabs.addTab(self.diagnostics_tab, "Diagnostics")
+        tabs.currentChanged.connect(self.onTabChanged)
+        self.tabs = tabs
+        
+        layout.addWidget(tabs)
+        
+        # ==================== BUTTONS ====================
+        button_layout = QHBoxLayout()
+        
+        self.force_restyle = QCheckBox("Force")
+        self.force_restyle.setToolTip("Also restyle layers already styled with the current settings")
+        button_layout.addWidget(self.force_restyle)
+        
+        self.apply_existing_btn = QPushButton("Apply to Existing Layers")
+        self.apply_existing_btn.setToolTip("Save settings and apply them to all layers currently in the project")
+        self.apply_existing_btn.clicked.connect(self.applyToExisting)
+        button_layout.addWidget(self.apply_existing_btn)
+        
+        button_layout.addStretch()
+        
+        import_btn = QPushButton("Import...")
+        import_btn.setToolTip("Load a profile file and make it the active profile")
+        import_btn.clicked.connect(self.importProfile)
+        button_layout.addWidget(import_btn)
+        
+        export_btn = QPushButton("Export...")
+        export_btn.setToolTip("Save the current settings as a named profile file")
+        export_btn.clicked.connect(self.exportProfile)
+        button_layout.addWidget(export_btn)
+        
+        save_btn = QPushButton("Save Settings")
+        save_btn.clicked.connect(self.saveSettings)
+        button_layout.addWidget(save_btn)
+        
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(close_btn)
+        
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+    
+    def onTabChanged(self, index):
+        if self.tabs.widget(index) is self.diagnostics_tab:
+            self.refreshDiagnostics()
+        elif self.tabs.widget(index) is self.performance_tab:
+            self.refreshRenderTimes()
+    
+    def renderBudget(self):
+        """The plugin's render budget, or None before anything was styled"""
+        styler = self.plugin.styler if self.plugin else None
+        return styler.render_budget if styler else None
+    
+    def refreshRenderTimes(self):
+        """List the recorded render times per layer and what was adjusted"""
+        self.render_list.clear()
+        budget = self.renderBudget()
+        if not recordingAvailable():
+            self.render_status.setText("Per-layer render times: unavailable (requires QGIS 3.34 or later)")
+            return
+        if budget is None or budget.available is None:
+            self.render_status.setText("Per-layer render times: no render recorded yet")
+            return
+        if not budget.available:
+            self.render_status.setText("Per-layer render times: unavailable from the last render")
+            return
+        
+        project = QgsProject.instance()
+        rows = [row for row in budget.rows() if project.mapLayer(row.layer_id) is not None]
+        adjusted = sum(1 for row in rows if row.level)
+        self.render_status.setText(f"{len(rows)} layer(s) timed, {adjusted} adjusted")
+        for row in rows:
+            item = QListWidgetItem(f"{row.name}: {row.mean_ms:.0f} ms average, {row.last_ms:.0f} ms last "
+                                   f"({row.renders} renders) - {levelName(row.level, row.raster)}")
+            item.setData(Qt.UserRole, row.layer_id)
+            self.render_list.addItem(item)
+    
+    def revertLayers(self, layer_ids):
+        budget = self.renderBudget()
+        if budget is None:
+            return
+        profile = self.profile_store.profile()
+        project = QgsProject.instance()
+        for layer_id in layer_ids:
+            layer = project.mapLayer(layer_id)
+            if layer is not None:
+                budget.revert(layer, profile)
+        self.refreshRenderTimes()
+    
+    def revertSelectedLayers(self):
+        self.revertLayers([item.data(Qt.UserRole) for item in self.render_list.selectedItems()])
+    
+    def revertAllLayers(self):
+        budget = self.renderBudget()
+        if budget is not None:
+            self.revertLayers(list(budget.levels))
+    
+    def refreshDiagnostics(self):
+        """Show the plugin's styling diagnostics"""
+        if not self.plugin:
+            self.diagnostics_view.setPlainText("Plugin reference not available!")
+            return
+        self.diagnostics_view.setPlainText("\n".join(self.plugin.diagnostics.reportLines()))
+    
+    def resetDiagnostics(self):
+        if self.plugin:
+            self.plugin.diagnostics.reset()
+        self.refreshDiagnostics()
+    
+    def logDiagnostics(self):
+        """Write the diagnostics summary to the QGIS message log"""
+        if not self.plugin:
+            return
+        for line in self.plugin.diagnostics.reportLines():
+            if line:
+                QgsMessageLog.logMessage(line, "Auto Style Manager", Qgis.Info)
+    
+    def exportDiagnostics(self):
+        """Export the diagnostics counters to a CSV file"""
+        if not self.plugin:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Diagnostics", "", "CSV files (*.csv)")
+        if not path:
+            return
+        try:
+            self.plugin.diagnostics.writeCsv(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not write {path}:\n{e}")
+    
+    def cachedLayers(self):
+        return [layer for layer in QgsProject.instance().mapLayers().values()
+                if isinstance(layer, QgsVectorLayer) and layer.customProperty(ORIGINAL_SOURCE_PROPERTY)]
+    
+    def refreshCacheStatus(self):
+        cache = self.plugin.styler.vector_cache if self.plugin and self.plugin.styler else None
+        if cache is None:
+            self.cache_status.setText("")
+            return
+        entries, size = cache.usage()
+        self.cache_status.setText(f"{entries} cached source(s), {size / 1048576.0:.1f} MB")
+    
+    def refreshCachedLayers(self):
+        """Re-copy every cached project layer from its original source in the background"""
+        if not self.plugin:
+            return
+        cache = self.plugin.layerStyler().vector_cache
+        profile = self.profile_store.profile()
+        started = sum(1 for layer in self.cachedLayers() if cache.refresh(layer, profile))
+        QMessageBox.information(self, "Local Cache", f"Refreshing {started} cached layer(s) in the background.")
+    
+    def restoreCachedLayers(self):
+        if not self.plugin:
+            return
+        cache = self.plugin.layerStyler().vector_cache
+        restored = sum(1 for layer in self.cachedLayers() if cache.restore(layer))
+        self.refreshCacheStatus()
+        QMessageBox.information(self, "Local Cache", f"{restored} layer(s) use their original source again.")
+    
+    def checkRules(self):
+        """Compile the rule text and show errors and per-layer matches"""
+        engine = RuleEngine(self.style_rules.toPlainText(), StyleProfile)
+        lines = [f"{len(engine.rules)} rule(s) compiled, {len(engine.errors)} error(s)"]
+        lines += engine.errors
+        matched = 0
+        for layer in QgsProject.instance().mapLayers().values():
+            rules = engine.matchingRules(layer)
+            if rules:
+                matched += 1
+                lines.append(f"{layer.name()}: lines " + ", ".join(str(rule.line) for rule in rules))
+        lines.insert(1, f"{matched} project layer(s) matched")
+        self.rules_report.setPlainText("\n".join(lines))
+    
+    def refreshLabelLoad(self):
+        """Estimate the labels each vector layer would ask for with the current settings
+        
+        Only layers the settings label are counted (rules may turn labels on or
+        off per layer). With labeling off everywhere the report instead shows
+        what enabling it would cost.
+        """
+        profile = self.currentProfile()
+        styler = self.plugin.layerStyler() if self.plugin else None
+        labelable, labeled = [], []
+        for layer in QgsProject.instance().mapLayers().values():
+            if not isinstance(layer, QgsVectorLayer) or not layer.isValid():
+                continue
+            layer_profile = styler.layerProfile(layer, profile) if styler else profile
+            if styler and not styler.label_resolver.resolve(
+                    layer.fields(), layer_profile.label_field, layer_profile.labelPriority()):
+                continue
+            labelable.append(layer)
+            if layer_profile.labels_enabled:
+                labeled.append(layer)
+        if labeled or profile.labels_enabled:
+            lines = labelLoadLines(estimateLabelLoad(labeled, profile))
+        else:
+            lines = labelLoadLines(estimateLabelLoad(labelable, profile), hypothetical=True)
+        self.label_load_view.setPlainText("\n".join(lines))
+    
+    def loadSettings(self, profile=None):
+        """Load settings from the shared style profile, or from profile if given"""
+        if profile is None:
+            profile = self.profile_store.profile()
+        self.raster_enabled.setChecked(profile.raster_enabled)
+        self.exclude_basemaps.setChecked(profile.exclude_basemaps)
+        self.basemap_patterns.setText(profile.basemap_patterns)
+        self.opacity_spin.setValue(profile.opacity)
+        self.auto_stretch.setChecked(profile.auto_stretch and numpyAvailable())
+        self.stretch_low.setValue(profile.stretch_low)
+        self.stretch_high.setValue(profile.stretch_high)
+        self.build_overviews.setChecked(profile.build_overviews)
+        self.overview_threshold.setValue(profile.overview_threshold)
+        self.overview_resampling.setCurrentText(profile.overview_resampling)
+        self.fast_resampling.setChecked(profile.fast_resampling)
+        self.mosaic_tiles.setChecked(profile.mosaic_tiles)
+        self.mosaic_min_tiles.setValue(profile.mosaic_min_tiles)
+        
+        self.vector_enabled.setChecked(profile.vector_enabled)
+        
+        self.point_color.setColor(profile.color('point_color'))
+        self.point_size.setValue(profile.point_size)
+        
+        self.line_color.setColor(profile.color('line_color'))
+        self.line_width.setValue(profile.line_width)
+        
+        self.polygon_fill.setColor(profile.color('polygon_fill'))
+        self.polygon_stroke.setColor(profile.color('polygon_stroke'))
+        self.polygon_width.setValue(profile.polygon_width)
+        
+        self.perf_profile.setChecked(profile.perf_profile)
+        self.heavy_features.setValue(profile.heavy_features)
+        self.dense_features.setValue(profile.dense_features)
+        self.heavy_min_scale.setValue(profile.heavy_min_scale)
+        self.dense_min_scale.setValue(profile.dense_min_scale)
+        self.simplify_threshold.setValue(profile.simplify_threshold)
+        self.dense_no_outline.setChecked(profile.dense_no_outline)
+        self.build_indexes.setChecked(profile.build_indexes)
+        self.index_threshold.setValue(profile.index_threshold)
+        self.cache_sources.setChecked(profile.cache_sources)
+        self.cache_min_mb.setValue(profile.cache_min_mb)
+        self.cache_max_mb.setValue(profile.cache_max_mb)
+        self.refreshCacheStatus()
+        self.classify_enabled.setChecked(profile.classify_enabled and numpyAvailable())
+        self.classify_field.setText(profile.classify_field)
+        self.classify_mode.setCurrentText(profile.classify_mode)
+        self.classify_method.setCurrentText(profile.classify_method)
+        self.classify_classes.setValue(profile.classify_classes)
+        self.classify_sample.setValue(profile.classify_sample)
+        self.classify_ramp.setText(profile.classify_ramp)
+        
+        self.labels_enabled.setChecked(profile.labels_enabled)
+        self.label_field.setText(profile.label_field)
+        self.label_priority.setText(profile.label_priority)
+        self.label_size.setValue(profile.label_size)
+        self.label_color.setColor(profile.color('label_color'))
+        
+        self.label_buffer.setChecked(profile.label_buffer)
+        self.buffer_size.setValue(profile.buffer_size)
+        self.buffer_color.setColor(profile.color('buffer_color'))
+        
+        self.adaptive_labels.setChecked(profile.adaptive_labels)
+        self.label_heavy_scale.setValue(profile.label_heavy_scale)
+        self.label_dense_scale.setValue(profile.label_dense_scale)
+        self.label_limit.setValue(profile.label_limit)
+        self.dense_label_obstacles.setChecked(profile.dense_label_obstacles)
+        self.label_sampling.setChecked(profile.label_sampling)
+        self.label_sample_rows.setValue(profile.label_sample_rows)
+        
+        self.batch_enabled.setChecked(profile.batch_enabled)
+        self.batch_size.setValue(profile.batch_size)
+        self.batch_interval.setValue(profile.batch_interval)
+        self.project_load_mode.setCurrentText(profile.project_load_mode)
+        self.render_budget.setChecked(profile.render_budget)
+        self.render_budget_ms.setValue(profile.render_budget_ms)
+        self.render_budget_strikes.setValue(profile.render_budget_strikes)
+        override, _ok = QgsProject.instance().readEntry(SETTINGS_GROUP, PROJECT_LOAD_ENTRY, "")
+        self.project_override.setCurrentIndex(max(0, self.project_override.findData(override)))
+        
+        self.style_rules.setPlainText(profile.style_rules)
+    
+    def currentProfile(self):
+        """Build a StyleProfile from the current widget values"""
+        return StyleProfile(
+            raster_enabled=self.raster_enabled.isChecked(),
+            exclude_basemaps=self.exclude_basemaps.isChecked(),
+            basemap_patterns=self.basemap_patterns.text(),
+            opacity=self.opacity_spin.value(),
+            auto_stretch=self.auto_stretch.isChecked(),
+            stretch_low=self.stretch_low.value(),
+            stretch_high=max(self.stretch_high.value(), self.stretch_low.value()),
+            build_overviews=self.build_overviews.isChecked(),
+            overview_threshold=self.overview_threshold.value(),
+            overview_resampling=self.overview_resampling.currentText(),
+            fast_resampling=self.fast_resampling.isChecked(),
+            mosaic_tiles=self.mosaic_tiles.isChecked(),
+            mosaic_min_tiles=self.mosaic_min_tiles.value(),
+            vector_enabled=self.vector_enabled.isChecked(),
+            point_color=self.point_color.color().name(QColor.HexArgb),
+            point_size=self.point_size.value(),
+            line_color=self.line_color.color().name(QColor.HexArgb),
+            line_width=self.line_width.value(),
+            polygon_fill=self.polygon_fill.color().name(QColor.HexArgb),
+            polygon_stroke=self.polygon_stroke.color().name(QColor.HexArgb),
+            polygon_width=self.polygon_width.value(),
+            perf_profile=self.perf_profile.isChecked(),
+            heavy_features=self.heavy_features.value(),
+            dense_features=max(self.dense_features.value(), self.heavy_features.value()),
+            simplify_threshold=self.simplify_threshold.value(),
+            heavy_min_scale=self.heavy_min_scale.value(),
+            dense_min_scale=self.dense_min_scale.value(),
+            dense_no_outline=self.dense_no_outline.isChecked(),
+            build_indexes=self.build_indexes.isChecked(),
+            index_threshold=self.index_threshold.value(),
+            cache_sources=self.cache_sources.isChecked(),
+            cache_min_mb=self.cache_min_mb.value(),
+            cache_max_mb=self.cache_max_mb.value(),
+            classify_enabled=self.classify_enabled.isChecked(),
+            classify_field=self.classify_field.text().strip(),
+            classify_mode=self.classify_mode.currentText(),
+            classify_method=self.classify_method.currentText(),
+            classify_classes=self.classify_classes.value(),
+            classify_sample=self.classify_sample.value(),
+            classify_ramp=self.classify_ramp.text().strip(),
+            labels_enabled=self.labels_enabled.isChecked(),
+            label_field=self.label_field.text(),
+            label_priority=self.label_priority.text(),
+            label_size=self.label_size.value(),
+            label_color=self.label_color.color().name(QColor.HexArgb),
+            label_buffer=self.label_buffer.isChecked(),
+            buffer_size=self.buffer_size.value(),
+            buffer_color=self.buffer_color.color().name(QColor.HexArgb),
+            adaptive_labels=self.adaptive_labels.isChecked(),
+            label_heavy_scale=self.label_heavy_scale.value(),
+            label_dense_scale=self.label_dense_scale.value(),
+            label_limit=self.label_limit.value(),
+            dense_label_obstacles=self.dense_label_obstacles.isChecked(),
+            label_sampling=self.label_sampling.isChecked(),
+            label_sample_rows=self.label_sample_rows.value(),
+            batch_enabled=self.batch_enabled.isChecked(),
+            batch_size=self.batch_size.value(),
+            batch_interval=self.batch_interval.value(),
+            project_load_mode=self.project_load_mode.currentText(),
+            render_budget=self.render_budget.isChecked(),
+            render_budget_ms=self.render_budget_ms.value(),
+            render_budget_strikes=self.render_budget_strikes.value(),
+            style_rules=self.style_rules.toPlainText(),
+        )
+    
+    def saveProjectOverride(self):
+        """Store the project load override in the current project, only when it changed"""
+        project = QgsProject.instance()
+        override = self.project_override.currentData() or ""
+        if project.readEntry(SETTINGS_GROUP, PROJECT_LOAD_ENTRY, "")[0] != override:
+            project.writeEntry(SETTINGS_GROUP, PROJECT_LOAD_ENTRY, override)
+    
+    def afterSave(self, profile):
+        """Apply the parts of saved settings that live outside the profile"""
+        self.saveProjectOverride()
+        if self.plugin:
+            self.plugin.watchRenderTimes(profile.render_budget)
+    
+    def saveSettings(self):
+        """Save settings to QSettings"""
+        self.afterSave(self.profile_store.save(self.currentProfile()))
+        
+        QMessageBox.information(self, "Success", "Settings saved successfully!")
+    
+    def exportProfile(self):
+        """Write the current settings to a named profile file"""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Profile", "", PROFILE_FILE_FILTER)
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += PROFILE_FILE_SUFFIX
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            self.profile_store.exportProfile(path, name, self.currentProfile())
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not write {path}:\n{e}")
+    
+    def importProfile(self):
+        """Make a profile file the active profile and show its values"""
+        path, _ = QFileDialog.getOpenFileName(self, "Import Profile", "", PROFILE_FILE_FILTER)
+        if not path:
+            return
+        try:
+            name, profile = self.profile_store.importProfile(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Could not import {path}:\n{e}")
+            return
+        self.loadSettings(profile)
+        if self.plugin:
+            self.plugin.watchRenderTimes(profile.render_budget)
+        QMessageBox.information(self, "Success", f"Profile '{name or os.path.basename(path)}' imported and saved.")
+    
+    def applyToExisting(self):
+        """Apply current settings to all existing layers"""
+        if not self.plugin:
+            QMessageBox.warning(self, "Error", "Plugin reference not available!")
+            return
+        
+        if self.apply_job:
+            return  # Already running
+        
+        # First, save the current settings
+        profile = self.profile_store.save(self.currentProfile())
+        self.afterSave(profile)
+        
+        # Restyle in chunks so the GUI stays responsive on big projects
+        self.apply_existing_btn.setEnabled(False)
+        self.apply_job = ApplyToExistingJob(self.plugin, profile, self,
+                                            force=self.force_restyle.isChecked())
+        self.apply_job.finished.connect(self.onApplyFinished)
+        self.apply_job.start()
+    
+    def onApplyFinished(self, raster_count, vector_count, label_count, unchanged_count, cancelled):
+        """Report the outcome of an apply-to-existing job"""
+        job = self.apply_job
+        self.apply_job = None
+        self.apply_existing_btn.setEnabled(True)
+        
+        total = raster_count + vector_count
+        if cancelled:
+            msg = f"Cancelled - styling applied to {total} layer(s) so far.\n\n"
+        else:
+            msg = f"Styling applied to {total} layer(s)!\n\n"
+        if raster_count > 0:
+            msg += f"• {raster_count} raster layer(s)\n"
+        if vector_count > 0:
+            msg += f"• {vector_count} vector layer(s)\n"
+        if label_count > 0:
+            msg += f"• {label_count} layer(s) labeled\n"
+        if unchanged_count > 0:
+            msg += f"• {unchanged_count} layer(s) already up to date\n"
+        if job is not None:
+            for line in job.indexSummary():
+                msg += f"• {line}\n"
+        
+        QMessageBox.information(self, "Cancelled" if cancelled else "Success", msg)
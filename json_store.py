@@ -0,0 +1,59 @@
+"""
+Auto Style Manager - JSON stores
+Small on-disk caches: a dict loaded on first use and written atomically
+"""
+
+import json
+import os
+
+
+class JsonStore:
+    """A dict kept in a JSON file
+    
+    save() writes through a temporary file and os.replace, so a crash never
+    leaves half a file; flush() only writes when put() changed something.
+    A store that cannot be read or written behaves as an empty, in-memory one.
+    """
+    
+    def __init__(self, path, max_entries=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = None
+        self.dirty = False
+    
+    def load(self):
+        if self.entries is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+        return self.entries
+    
+    def get(self, key):
+        return self.load().get(key)
+    
+    def put(self, key, value):
+        """Store value as the newest entry, dropping the oldest beyond max_entries"""
+        entries = self.load()
+        entries.pop(key, None)
+        entries[key] = value
+        if self.max_entries is not None:
+            while len(entries) > self.max_entries:
+                entries.pop(next(iter(entries)))
+        self.dirty = True
+    
+    def save(self):
+        self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.load(), f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # The stores are caches; losing one only costs recomputing it
+    
+    def flush(self):
+        if self.dirty:
+            self.save()
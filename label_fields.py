@@ -0,0 +1,82 @@
+"""
+Auto Style Manager - label field resolution
+Memoized choice of the label field, keyed by layer schema
+"""
+
+from collections import OrderedDict
+
+
+# Fallback field names tried in order when the configured field is missing
+DEFAULT_LABEL_PRIORITY = "name, NAME, Name, id, ID, Id, label, LABEL, Label, text, TEXT, Text"
+
+
+def parseFieldList(text):
+    """Split a comma separated list of field names"""
+    return tuple(name.strip() for name in text.split(',') if name.strip())
+
+
+class LabelFieldResolver:
+    """Pick the label field for a layer, caching the answer per schema"""
+    
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+        self.schemas = OrderedDict()
+    
+    @staticmethod
+    def schemaFingerprint(fields):
+        """Identify a layer schema by its field names and types"""
+        return tuple((field.name(), field.typeName()) for field in fields)
+    
+    def resolve(self, fields, label_field, priority):
+        """Return the field to label with, or None if nothing suitable exists"""
+        key = (self.schemaFingerprint(fields), label_field, priority)
+        try:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        except KeyError:
+            pass
+        
+        matching_field = self.pickField(self.schemaIndex(key[0]), label_field, priority)
+        self.cache[key] = matching_field
+        if len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+        return matching_field
+    
+    def schemaIndex(self, fingerprint):
+        """Return (names, lowercase -> real name) for a schema, built once"""
+        try:
+            self.schemas.move_to_end(fingerprint)
+            return self.schemas[fingerprint]
+        except KeyError:
+            pass
+        
+        names = set()
+        by_lower = {}
+        for name, _type in fingerprint:
+            names.add(name)
+            by_lower.setdefault(name.lower(), name)
+        self.schemas[fingerprint] = (names, by_lower)
+        if len(self.schemas) > self.max_entries:
+            self.schemas.popitem(last=False)
+        return names, by_lower
+    
+    def pickField(self, index, label_field, priority):
+        """Resolve against a schema: exact, case-insensitive, then priority list"""
+        names, by_lower = index
+        
+        # Try exact match first, then case-insensitive match
+        if label_field in names:
+            return label_field
+        if label_field.lower() in by_lower:
+            return by_lower[label_field.lower()]
+        
+        # If no match, try the configured fallback names
+        for candidate in priority:
+            if candidate in names:
+                return candidate
+        return None
+    
+    def clear(self):
+        self.cache.clear()
+        self.schemas.clear()
@@ -0,0 +1,108 @@
+"""
+Auto Style Manager - labeling guardrails
+Feature-count driven limits that keep the labeling engine affordable
+"""
+
+from collections import namedtuple
+from qgis.core import QgsPalLayerSettings, QgsWkbTypes
+
+from .vector_performance import TIER_DENSE, TIER_NORMAL, featureCount, layerTier
+
+
+# min_scale 0 and limit 0 mean unrestricted; placement None keeps the template's
+LabelGuard = namedtuple('LabelGuard', ['tier', 'count', 'min_scale', 'limit', 'placement', 'obstacle'])
+
+NO_GUARD = LabelGuard(TIER_NORMAL, -1, 0, 0, None, True)
+
+# One row of the label load estimate shown in the dialog
+LabelLoad = namedtuple('LabelLoad', ['name', 'tier', 'count', 'labels', 'min_scale'])
+
+
+def labelGuard(count, geom_type, profile):
+    """Return the LabelGuard for a layer with count features of geom_type"""
+    tier = layerTier(count, profile)
+    if tier == TIER_NORMAL:
+        return NO_GUARD._replace(count=count)
+    
+    min_scale = profile.label_dense_scale if tier == TIER_DENSE else profile.label_heavy_scale
+    placement = None
+    obstacle = True
+    if tier == TIER_DENSE:
+        # A single candidate position instead of the ring / interior search
+        if geom_type in (QgsWkbTypes.PointGeometry, QgsWkbTypes.PolygonGeometry):
+            placement = QgsPalLayerSettings.OverPoint
+        obstacle = profile.dense_label_obstacles
+    return LabelGuard(tier, count, min_scale, profile.label_limit, placement, obstacle)
+
+
+def layerLabelGuard(layer, profile):
+    """labelGuard() for a map layer, or NO_GUARD when adaptive labeling is off"""
+    if not profile.adaptive_labels:
+        return NO_GUARD
+    return labelGuard(featureCount(layer), layer.geometryType(), profile)
+
+
+def applyLabelGuard(settings, guard):
+    """Apply guard to a QgsPalLayerSettings copy in place"""
+    if guard.tier == TIER_NORMAL:
+        return settings
+    
+    if guard.min_scale > 0:
+        settings.scaleVisibility = True
+        settings.minimumScale = guard.min_scale
+        settings.maximumScale = 0
+    
+    if guard.limit > 0:
+        thinning = settings.thinningSettings()
+        thinning.setLimitNumberLabelsEnabled(True)
+        thinning.setMaximumNumberLabels(guard.limit)
+        settings.setThinningSettings(thinning)
+    
+    if guard.placement is not None:
+        settings.placement = guard.placement
+    
+    obstacles = settings.obstacleSettings()
+    obstacles.setIsObstacle(guard.obstacle)
+    settings.setObstacleSettings(obstacles)
+    return settings
+
+
+def estimateLabelLoad(layers, profile):
+    """Estimate how many labels each labeled vector layer asks the engine to place"""
+    rows = []
+    for layer in layers:
+        count = featureCount(layer)
+        guard = labelGuard(count, layer.geometryType(), profile) if profile.adaptive_labels else NO_GUARD
+        if count < 0:
+            labels = -1
+        elif guard.limit > 0:
+            labels = min(count, guard.limit)
+        else:
+            labels = count
+        rows.append(LabelLoad(layer.name(), guard.tier, count, labels, guard.min_scale))
+    return rows
+
+
+def labelLoadLines(rows, hypothetical=False):
+    """Human readable report for estimateLabelLoad() rows, heaviest first
+    
+    hypothetical titles the report as the load if labels were enabled.
+    """
+    if not rows:
+        if hypothetical:
+            return ["Labels are disabled, and no vector layer has a field to label."]
+        return ["No labeled vector layers in the project."]
+    
+    known = [row.labels for row in rows if row.labels >= 0]
+    title = "Labelable layers" if hypothetical else "Labeled layers"
+    lines = [f"{title}: {len(rows)}    Estimated labels: {sum(known)}"
+             + ("" if len(known) == len(rows) else " (some counts unknown)")]
+    if hypothetical:
+        lines.append("Labels are disabled: this is an estimate if labels were enabled.")
+    lines.append("")
+    for row in sorted(rows, key=lambda r: r.labels, reverse=True):
+        count = "?" if row.count < 0 else str(row.count)
+        labels = "?" if row.labels < 0 else str(row.labels)
+        scale = f", hidden beyond 1:{row.min_scale}" if row.min_scale else ""
+        lines.append(f"{row.name}: {count} features, ~{labels} labels [{row.tier}{scale}]")
+    return lines
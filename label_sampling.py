@@ -0,0 +1,124 @@
+"""
+Auto Style Manager - label field sampling
+Scores candidate label fields on a capped, geometry-free sample of their content
+"""
+
+from collections import OrderedDict, namedtuple
+from qgis.core import NULL, QgsFeatureRequest
+
+from .auto_classify import ID_FIELD_NAMES
+
+
+# Hard caps: rows read per layer and fields scored per layer
+MAX_SAMPLE_ROWS = 5000
+MAX_SCORED_FIELDS = 16
+
+# Label lengths (characters) that read well on a map
+GOOD_LENGTH = (2, 30)
+
+# Tie-break in favour of the field the name rules picked, unless it is an identifier
+NAMED_FIELD_BONUS = 1.25
+IDENTIFIER_PENALTY = 0.5
+
+FieldScore = namedtuple('FieldScore', ['name', 'score', 'non_null', 'unique', 'length'])
+
+
+def scoreValues(name, values, rows):
+    """Score one field from its sampled values; rows is the number of features read"""
+    present = [str(value).strip() for value in values
+               if value is not None and value != NULL and str(value).strip()]
+    if not rows or not present:
+        return FieldScore(name, 0.0, 0.0, 0.0, 0.0)
+    non_null = len(present) / rows
+    unique = len(set(present)) / len(present)
+    length = sum(len(text) for text in present) / len(present)
+    
+    low, high = GOOD_LENGTH
+    if length < low:
+        fit = 0.3
+    elif length > high:
+        fit = high / length  # Descriptions and remarks make poor labels
+    else:
+        fit = 1.0
+    score = non_null * (0.4 + 0.6 * unique) * fit
+    return FieldScore(name, score, non_null, unique, length)
+
+
+class LabelFieldSampler:
+    """Pick the label field from sampled content, caching the answer per layer source"""
+    
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+    
+    @staticmethod
+    def isIdentifier(fields, name):
+        """Numeric fields and id-like names are unique but rarely useful labels"""
+        index = fields.lookupField(name)
+        return name.lower() in ID_FIELD_NAMES or (index >= 0 and fields.at(index).isNumeric())
+    
+    @staticmethod
+    def candidates(fields, named):
+        """Text fields worth scoring plus the field the name rules picked, capped"""
+        names = [named] if named else []
+        for field in fields:
+            name = field.name()
+            if len(names) >= MAX_SCORED_FIELDS:
+                break
+            if name != named and not field.isNumeric() and name.lower() not in ID_FIELD_NAMES:
+                names.append(name)
+        return names
+    
+    def cacheKey(self, layer, named, rows):
+        schema = tuple((field.name(), field.typeName()) for field in layer.fields())
+        return (layer.source(), layer.subsetString(), schema, named, rows)
+    
+    def sample(self, layer, names, rows):
+        """Read at most rows features, attributes only, and score each named field"""
+        fields = layer.fields()
+        indexes = [fields.lookupField(name) for name in names]
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes(names, fields)
+        request.setLimit(rows)
+        
+        columns = [[] for _ in names]
+        read = 0
+        for feature in layer.getFeatures(request):
+            attributes = feature.attributes()
+            for column, index in zip(columns, indexes):
+                column.append(attributes[index])
+            read += 1
+        return [scoreValues(name, column, read) for name, column in zip(names, columns)]
+    
+    def scores(self, layer, named, rows):
+        """Return the FieldScores for layer, best first, cached per source"""
+        rows = max(1, min(rows, MAX_SAMPLE_ROWS))
+        key = self.cacheKey(layer, named, rows)
+        try:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        except KeyError:
+            pass
+        
+        fields = layer.fields()
+        names = self.candidates(fields, named)
+        scores = self.sample(layer, names, rows) if names else []
+        if named and scores:
+            factor = IDENTIFIER_PENALTY if self.isIdentifier(fields, named) else NAMED_FIELD_BONUS
+            scores[0] = scores[0]._replace(score=scores[0].score * factor)
+        scores.sort(key=lambda score: score.score, reverse=True)
+        self.cache[key] = scores
+        if len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+        return scores
+    
+    def pick(self, layer, named, profile):
+        """Return the best sampled field, or named when nothing scores above zero"""
+        scores = self.scores(layer, named, profile.label_sample_rows)
+        if scores and scores[0].score > 0:
+            return scores[0].name
+        return named
+    
+    def clear(self):
+        self.cache.clear()
@@ -0,0 +1,418 @@
+"""
+Auto Style Manager - layer styling engine
+Applies a StyleProfile to map layers; needs no QgisInterface
+"""
+
+from collections import OrderedDict
+from qgis.core import (Qgis, QgsMessageLog, QgsRasterLayer, QgsSingleSymbolRenderer, QgsVectorLayer,
+                       QgsVectorLayerSimpleLabeling)
+
+from .style_profile import StyleProfile, FINGERPRINT_PROPERTY
+from .auto_classify import AutoClassifier, CLASSIFIED_RENDERERS
+from .style_templates import StyleTemplates
+from .profile_diff import (ASPECT_ALL, ASPECT_LABEL_FORMAT, ASPECT_LABELS, ASPECT_OPACITY, ASPECT_RASTER,
+                           ASPECT_SYMBOLS, ASPECT_VECTOR, changedAspects)
+from .label_fields import LabelFieldResolver
+from .label_sampling import LabelFieldSampler
+from .basemap_classifier import BasemapClassifier, NOT_BASEMAP
+from .diagnostics import StylingDiagnostics
+from .raster_stats import RasterStretcher
+from .raster_mosaic import MosaicBuilder
+from .raster_overviews import OverviewBuilder
+from .render_budget import RenderBudget
+from .rule_engine import RuleEngine
+from .label_guardrails import layerLabelGuard
+from .spatial_index import SpatialIndexBuilder
+from .vector_cache import VectorCache
+from .vector_performance import (TIER_DENSE, TIER_NORMAL, applyPerformance, featureCount, layerTier,
+                                 resetPerformance)
+
+
+# Prototype sets kept for the base profile and its rule variants
+MAX_TEMPLATES = 64
+
+# Profile pairs whose changed aspects are remembered
+MAX_DIFFS = 64
+
+# Applied (per-layer) profiles remembered by fingerprint for incremental updates
+MAX_APPLIED = 512
+
+
+class LayerStyler:
+    """Style layers with the profile from a ProfileStore, caching everything derived from it"""
+    
+    def __init__(self, profile_store, diagnostics=None):
+        self.profile_store = profile_store
+        self.diagnostics = diagnostics if diagnostics is not None else StylingDiagnostics()
+        self.templates = OrderedDict()
+        self.diffs = OrderedDict()
+        self.applied = OrderedDict()
+        self.rules = None
+        self.label_resolver = LabelFieldResolver()
+        self.label_sampler = LabelFieldSampler()
+        self.classifier = None
+        self.stretcher = None
+        self.overviews = OverviewBuilder()
+        self.mosaics = MosaicBuilder(self.diagnostics)
+        self.spatial_indexes = SpatialIndexBuilder(self.diagnostics)
+        self.vector_cache = VectorCache(self.diagnostics)
+        self.auto_classifier = AutoClassifier(on_ready=self.onClassesReady)
+        self.render_budget = RenderBudget(self)
+    
+    def cancelBackgroundTasks(self):
+        """Cancel classification, overview, mosaic, spatial index and cache builds still running"""
+        self.auto_classifier.cancelAll()
+        self.overviews.cancelAll()
+        self.mosaics.cancelAll()
+        self.spatial_indexes.cancelAll()
+        self.vector_cache.cancelAll()
+    
+    def styleTemplates(self, profile):
+        """Return the prototype symbols/labels for profile, kept per fingerprint for rule variants"""
+        key = profile.fingerprint()
+        try:
+            self.templates.move_to_end(key)
+            return self.templates[key]
+        except KeyError:
+            pass
+        templates = self.templates[key] = StyleTemplates(profile)
+        if len(self.templates) > MAX_TEMPLATES:
+            self.templates.popitem(last=False)
+        return templates
+    
+    def changedAspects(self, old, new):
+        """Return the aspects that differ between two profiles, kept per fingerprint pair"""
+        key = (old.fingerprint(), new.fingerprint())
+        try:
+            self.diffs.move_to_end(key)
+            return self.diffs[key]
+        except KeyError:
+            pass
+        aspects = self.diffs[key] = changedAspects(old, new)
+        if len(self.diffs) > MAX_DIFFS:
+            self.diffs.popitem(last=False)
+        return aspects
+    
+    def ruleEngine(self, profile):
+        """Return the compiled style rules, rebuilt when the rule text changes"""
+        if self.rules is None or self.rules.text != profile.style_rules:
+            self.rules = RuleEngine(profile.style_rules, StyleProfile)
+        return self.rules
+    
+    def layerProfile(self, layer, profile):
+        """Return profile with the overrides of the rules matching layer
+        
+        Layers made cheaper by the render budget get the cheaper variant on top.
+        """
+        if profile.style_rules:
+            profile = self.ruleEngine(profile).profileFor(layer, profile)
+        if self.render_budget.levels:
+            profile = self.render_budget.layerProfile(layer, profile)
+        return profile
+    
+    def styleLayers(self, layers, profile, repaint=True, force=False):
+        """Style a list of layers and return the ones that were styled"""
+        styled = []
+        for layer in layers:
+            if not layer or not layer.isValid():
+                continue
+            
+            layer_profile = self.layerProfile(layer, profile)
+            if isinstance(layer, QgsRasterLayer):
+                if layer_profile.raster_enabled and self.styleRasterLayer(layer, layer_profile, repaint, force=force):
+                    styled.append(layer)
+                if layer_profile.build_overviews:
+                    try:
+                        self.overviews.maybeBuild(layer, layer_profile)
+                    except Exception as e:
+                        self.reportFailure(layer, 'overviews', e)
+            elif isinstance(layer, QgsVectorLayer):
+                if layer_profile.vector_enabled and self.styleVectorLayer(layer, layer_profile, repaint, force=force):
+                    styled.append(layer)
+                if layer_profile.build_indexes:
+                    try:
+                        self.spatial_indexes.maybeBuild(layer, layer_profile)
+                    except Exception as e:
+                        self.reportFailure(layer, 'spatial index', e)
+        self.saveCaches()
+        return styled
+    
+    def saveCaches(self):
+        """Write the on-disk caches changed since the last call"""
+        if self.stretcher is not None:
+            self.stretcher.cache.flush()
+    
+    def basemapClassifier(self, profile=None):
+        """Return the compiled basemap classifier, rebuilt when the patterns change"""
+        if profile is None:
+            profile = self.profile_store.profile()
+        if self.classifier is None or self.classifier.user_patterns != profile.basemapPatterns():
+            self.classifier = BasemapClassifier(profile.basemapPatterns())
+        return self.classifier
+    
+    def isBasemapLayer(self, layer, profile=None):
+        """Check if layer is a basemap/WMS/XYZ layer that should be excluded"""
+        return self.basemapVerdict(layer, profile).is_basemap
+    
+    def basemapVerdict(self, layer, profile=None):
+        """Return the BasemapVerdict for a layer, including the rule that matched"""
+        if not isinstance(layer, QgsRasterLayer):
+            return NOT_BASEMAP
+        return self.basemapClassifier(profile).classifyLayer(layer)
+    
+    def reportFailure(self, layer, stage, exc, timer=None):
+        """Count a styling failure and log the first of each kind to the message log"""
+        if timer is not None:
+            first = timer.fail(exc)
+        else:
+            first = self.diagnostics.recordFailure(layer, stage, exc)
+        if first:
+            QgsMessageLog.logMessage(
+                f"{stage} failed for layer '{layer.name()}': {exc} "
+                "(further failures of this kind are only counted, see the Diagnostics tab)",
+                "Auto Style Manager", Qgis.Warning)
+    
+    def rasterStretcher(self):
+        """Return the raster stretcher, created on first use"""
+        if self.stretcher is None:
+            self.stretcher = RasterStretcher()
+        return self.stretcher
+    
+    def markStyled(self, layer, profile):
+        """Stamp layer with the fingerprint of profile and remember profile for later diffs"""
+        key = profile.fingerprint()
+        layer.setCustomProperty(FINGERPRINT_PROPERTY, key)
+        self.applied[key] = profile
+        self.applied.move_to_end(key)
+        if len(self.applied) > MAX_APPLIED:
+            self.applied.popitem(last=False)
+    
+    def appliedProfile(self, layer):
+        """Return the profile layer was last styled with in this session, or None"""
+        key = layer.customProperty(FINGERPRINT_PROPERTY)
+        profile = self.applied.get(key) if key else None
+        if profile is not None:
+            self.applied.move_to_end(key)
+        return profile
+    
+    def isStyledWith(self, layer, profile):
+        """Check whether layer was already styled with this exact profile"""
+        return layer.customProperty(FINGERPRINT_PROPERTY) == profile.fingerprint()
+    
+    def styleRasterLayer(self, layer, profile=None, repaint=True, basemap=None, force=False):
+        """Apply default styling to raster layer, return True if it was changed
+        
+        basemap is a verdict precomputed by the caller, None to classify here.
+        Layers already styled with the same profile are skipped unless force is set.
+        """
+        if profile is None:
+            profile = self.profile_store.profile()
+        
+        timer = self.diagnostics.timer(layer)
+        
+        # Check if we should exclude basemaps
+        if basemap is None:
+            basemap = profile.exclude_basemaps and self.isBasemapLayer(layer, profile)
+        if basemap:
+            timer.skip()
+            return False  # Skip styling for basemap layers
+        
+        if not force and self.isStyledWith(layer, profile):
+            timer.skip()
+            return False
+        
+        try:
+            timer.next('symbol')
+            # Only set opacity (and resampling when asked), don't touch the renderer
+            # Use the renderer's opacity setting
+            if layer.renderer():
+                layer.renderer().setOpacity(profile.opacity)
+                resampler = layer.resampleFilter() if profile.fast_resampling else None
+                if resampler:
+                    # Nearest neighbour without oversampling is the cheapest to draw
+                    resampler.setZoomedInResampler(None)
+                    resampler.setZoomedOutResampler(None)
+                    resampler.setMaxOversampling(1.0)
+                if profile.auto_stretch:
+                    timer.next('stretch')
+                    self.rasterStretcher().stretchLayer(layer, profile.stretch_low, profile.stretch_high)
+                self.markStyled(layer, profile)
+                timer.next('repaint')
+                if repaint:
+                    layer.triggerRepaint()
+                timer.finish()
+                return True
+            timer.skip()
+        except Exception as e:
+            self.reportFailure(layer, timer.stage, e, timer)
+        return False
+    
+    def styleVectorLayer(self, layer, profile=None, repaint=True, force=False):
+        """Apply default styling to vector layer, return True if it was changed
+        
+        Layers already styled with the same profile are skipped unless force is set.
+        """
+        if profile is None:
+            profile = self.profile_store.profile()
+        
+        timer = self.diagnostics.timer(layer)
+        if not force and self.isStyledWith(layer, profile):
+            timer.skip()
+            return False
+        
+        try:
+            geom_type = layer.geometryType()
+            renderer = layer.renderer()
+            kind = renderer.type() if renderer else None
+            
+            # Restyle single symbol renderers and classes generated by an earlier run
+            if kind != 'singleSymbol' and not (kind in CLASSIFIED_RENDERERS and
+                                               layer.customProperty(FINGERPRINT_PROPERTY)):
+                timer.skip()
+                return False
+            
+            timer.next('performance')
+            tier = TIER_NORMAL
+            if profile.perf_profile:
+                tier = layerTier(featureCount(layer), profile)
+                applyPerformance(layer, tier, profile)
+            else:
+                resetPerformance(layer)
+            
+            timer.next('symbol')
+            # Swap in a copy of the prototype symbol for the geometry type
+            dense = tier == TIER_DENSE and profile.dense_no_outline
+            symbol = self.styleTemplates(profile).symbol(geom_type, dense)
+            classified = None
+            if profile.classify_enabled:
+                timer.next('classes')
+                classified = self.auto_classifier.renderer(layer, profile, symbol)
+            
+            if classified is not None:
+                layer.setRenderer(classified)
+            elif symbol is not None:
+                if kind == 'singleSymbol':
+                    renderer.setSymbol(symbol)
+                else:
+                    layer.setRenderer(QgsSingleSymbolRenderer(symbol))
+            
+            # Apply labels if enabled
+            timer.next('labels')
+            if profile.labels_enabled:
+                self.applyLabels(layer, profile, repaint=False)
+            
+            timer.next('repaint')
+            self.markStyled(layer, profile)
+            if repaint:
+                layer.triggerRepaint()
+            timer.finish()
+            return True
+            
+        except Exception as e:
+            self.reportFailure(layer, timer.stage, e, timer)
+        return False
+    
+    def updateLayer(self, layer, new, repaint=True):
+        """Bring layer from the profile it was styled with up to new, touching only what changed
+        
+        Returns True if the styling was changed, False if only the fingerprint
+        was, and None when the change needs a full restyle (or the profile the
+        layer was styled with is not known).
+        """
+        old = self.appliedProfile(layer)
+        if old is None:
+            return None
+        aspects = self.changedAspects(old, new)
+        if ASPECT_ALL in aspects:
+            return None
+        raster = isinstance(layer, QgsRasterLayer)
+        if (ASPECT_RASTER if raster else ASPECT_VECTOR) in aspects:
+            return None
+        
+        timer = self.diagnostics.timer(layer)
+        try:
+            changed = False
+            if raster:
+                if ASPECT_OPACITY in aspects and layer.renderer():
+                    timer.next('symbol')
+                    layer.renderer().setOpacity(new.opacity)
+                    changed = True
+            else:
+                renderer = layer.renderer()
+                if ASPECT_SYMBOLS in aspects:
+                    # Classes are derived from the base symbol; rebuild them the usual way
+                    if renderer is None or renderer.type() != 'singleSymbol':
+                        timer.skip()
+                        return None
+                    timer.next('symbol')
+                    tier = layerTier(featureCount(layer), new) if new.perf_profile else TIER_NORMAL
+                    symbol = self.styleTemplates(new).symbol(layer.geometryType(),
+                                                             tier == TIER_DENSE and new.dense_no_outline)
+                    if symbol is not None:
+                        renderer.setSymbol(symbol)
+                        changed = True
+                if ASPECT_LABELS in aspects:
+                    timer.next('labels')
+                    if new.labels_enabled:
+                        self.applyLabels(layer, new, repaint=False)
+                        changed = True
+                elif ASPECT_LABEL_FORMAT in aspects and new.labels_enabled and layer.labelsEnabled():
+                    # Keep the field, placement and guard; swap in the new text format
+                    labeling = layer.labeling()
+                    if isinstance(labeling, QgsVectorLayerSimpleLabeling):
+                        timer.next('labels')
+                        settings = labeling.settings()
+                        settings.setFormat(self.styleTemplates(new).text_format)
+                        labeling.setSettings(settings)
+                        changed = True
+            
+            timer.next('repaint')
+            self.markStyled(layer, new)
+            if not changed:
+                timer.skip()
+                return False
+            self.diagnostics.count('incremental updates')
+            if repaint:
+                layer.triggerRepaint()
+            timer.finish()
+            return True
+        except Exception as e:
+            self.reportFailure(layer, timer.stage, e, timer)
+        return None
+    
+    def onClassesReady(self, layer):
+        """Restyle a layer whose classes were computed in the background"""
+        profile = self.layerProfile(layer, self.profile_store.profile())
+        # Unless it was restyled with other settings meanwhile
+        if self.isStyledWith(layer, profile):
+            self.styleVectorLayer(layer, profile, force=True)
+    
+    def applyLabels(self, layer, profile=None, repaint=True):
+        """Apply default labels to vector layer"""
+        if profile is None:
+            profile = self.profile_store.profile()
+        
+        try:
+            # Resolve the field once per schema (exact, case-insensitive, fallbacks)
+            matching_field = self.label_resolver.resolve(
+                layer.fields(), profile.label_field, profile.labelPriority())
+            if profile.label_sampling:
+                # Let a capped sample of the content overrule a poor name match
+                matching_field = self.label_sampler.pick(layer, matching_field, profile)
+            
+            # If still no field found, skip labeling
+            if not matching_field:
+                return
+            
+            # Clone the prototype labeling for this layer
+            templates = self.styleTemplates(profile)
+            guard = layerLabelGuard(layer, profile)
+            layer.setLabeling(templates.labeling(layer.geometryType(), matching_field, guard))
+            layer.setLabelsEnabled(True)
+            
+            # Force refresh
+            if repaint:
+                layer.triggerRepaint()
+            
+        except Exception as e:
+            self.reportFailure(layer, 'labels', e)
@@ -0,0 +1,101 @@
+"""
+Auto Style Manager - profile diffs
+Which parts of a layer's styling a change between two profiles affects
+"""
+
+from dataclasses import fields
+
+
+# Aspects of the styling a profile field feeds
+ASPECT_NONE = 'none'                  # Background work, batching, new layers only
+ASPECT_OPACITY = 'opacity'            # Raster renderer opacity
+ASPECT_RASTER = 'raster'              # Anything else on rasters: full raster restyle
+ASPECT_SYMBOLS = 'symbols'            # Single symbol colors and sizes
+ASPECT_LABEL_FORMAT = 'label_format'  # Text format of existing labels
+ASPECT_LABELS = 'labels'              # Label field, placement and guards: labeling rebuilt
+ASPECT_VECTOR = 'vector'              # Anything else on vectors: full vector restyle
+ASPECT_ALL = 'all'                    # Every layer is fully restyled
+
+FIELD_ASPECTS = {
+    'opacity': ASPECT_OPACITY,
+    'raster_enabled': ASPECT_RASTER,
+    'exclude_basemaps': ASPECT_RASTER,
+    'basemap_patterns': ASPECT_RASTER,
+    'auto_stretch': ASPECT_RASTER,
+    'stretch_low': ASPECT_RASTER,
+    'stretch_high': ASPECT_RASTER,
+    'fast_resampling': ASPECT_RASTER,
+    'point_color': ASPECT_SYMBOLS,
+    'point_size': ASPECT_SYMBOLS,
+    'line_color': ASPECT_SYMBOLS,
+    'line_width': ASPECT_SYMBOLS,
+    'polygon_fill': ASPECT_SYMBOLS,
+    'polygon_stroke': ASPECT_SYMBOLS,
+    'polygon_width': ASPECT_SYMBOLS,
+    'label_size': ASPECT_LABEL_FORMAT,
+    'label_color': ASPECT_LABEL_FORMAT,
+    'label_buffer': ASPECT_LABEL_FORMAT,
+    'buffer_size': ASPECT_LABEL_FORMAT,
+    'buffer_color': ASPECT_LABEL_FORMAT,
+    'labels_enabled': ASPECT_LABELS,
+    'label_field': ASPECT_LABELS,
+    'label_priority': ASPECT_LABELS,
+    'adaptive_labels': ASPECT_LABELS,
+    'label_heavy_scale': ASPECT_LABELS,
+    'label_dense_scale': ASPECT_LABELS,
+    'label_limit': ASPECT_LABELS,
+    'dense_label_obstacles': ASPECT_LABELS,
+    'label_sampling': ASPECT_LABELS,
+    'label_sample_rows': ASPECT_LABELS,
+    'vector_enabled': ASPECT_VECTOR,
+    'perf_profile': ASPECT_VECTOR,
+    'heavy_features': ASPECT_VECTOR,
+    'dense_features': ASPECT_VECTOR,
+    'simplify_threshold': ASPECT_VECTOR,
+    'heavy_min_scale': ASPECT_VECTOR,
+    'dense_min_scale': ASPECT_VECTOR,
+    'dense_no_outline': ASPECT_VECTOR,
+    'classify_enabled': ASPECT_VECTOR,
+    'classify_field': ASPECT_VECTOR,
+    'classify_mode': ASPECT_VECTOR,
+    'classify_method': ASPECT_VECTOR,
+    'classify_classes': ASPECT_VECTOR,
+    'classify_sample': ASPECT_VECTOR,
+    'classify_ramp': ASPECT_VECTOR,
+    'build_overviews': ASPECT_NONE,
+    'overview_threshold': ASPECT_NONE,
+    'overview_resampling': ASPECT_NONE,
+    'mosaic_tiles': ASPECT_NONE,
+    'mosaic_min_tiles': ASPECT_NONE,
+    'build_indexes': ASPECT_NONE,
+    'index_threshold': ASPECT_NONE,
+    'cache_sources': ASPECT_NONE,
+    'cache_min_mb': ASPECT_NONE,
+    'cache_max_mb': ASPECT_NONE,
+    'batch_enabled': ASPECT_NONE,
+    'batch_size': ASPECT_NONE,
+    'batch_interval': ASPECT_NONE,
+    'project_load_mode': ASPECT_NONE,
+    'render_budget': ASPECT_NONE,
+    'render_budget_ms': ASPECT_NONE,
+    'render_budget_strikes': ASPECT_NONE,
+    'style_rules': ASPECT_ALL,  # Rules change the per-layer profiles themselves
+}
+
+
+def changedFields(old, new):
+    """Names of the profile fields whose values differ"""
+    return [f.name for f in fields(new) if getattr(old, f.name) != getattr(new, f.name)]
+
+
+def changedAspects(old, new):
+    """Return the frozenset of aspects touched going from profile old to new
+    
+    Fields missing from FIELD_ASPECTS count as ASPECT_ALL, so a new setting
+    falls back to a full restyle until it is classified here.
+    """
+    if old.fingerprint() == new.fingerprint():
+        return frozenset()
+    aspects = {FIELD_ASPECTS.get(name, ASPECT_ALL) for name in changedFields(old, new)}
+    aspects.discard(ASPECT_NONE)
+    return frozenset(aspects)
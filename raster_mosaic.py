@@ -0,0 +1,166 @@
+"""
+Auto Style Manager - raster tile mosaics
+Replaces a burst of compatible raster tiles with one GDAL VRT built in the background
+"""
+
+import hashlib
+import os
+from qgis.core import Qgis, QgsApplication, QgsMessageLog, QgsProject, QgsRasterLayer, QgsTask
+
+from .raster_stats import RasterStretcher
+from .task_registry import TaskRegistry
+
+
+# Layer custom property holding the number of tiles behind a mosaic
+MOSAIC_PROPERTY = "AutoStyleManager/mosaic_tiles"
+
+
+def tileKey(layer):
+    """Return (crs, band count, data type) of a local GDAL raster, or None"""
+    provider = layer.dataProvider()
+    if provider is None or RasterStretcher.layerPath(layer) is None:
+        return None
+    crs = layer.crs()
+    # Custom CRSs all have an empty authid; their definition tells them apart
+    return (crs.authid() or crs.toWkt(), layer.bandCount(), int(provider.dataType(1)))
+
+
+def groupTiles(layers, min_tiles):
+    """Split layers into (groups of compatible tiles, everything else)
+    
+    Groups smaller than min_tiles are left alone.
+    """
+    groups = {}
+    rest = []
+    for layer in layers:
+        key = tileKey(layer) if isinstance(layer, QgsRasterLayer) and layer.isValid() else None
+        if key is None:
+            rest.append(layer)
+        else:
+            groups.setdefault(key, []).append(layer)
+    mosaics = []
+    for tiles in groups.values():
+        if len(tiles) >= min_tiles:
+            mosaics.append(tiles)
+        else:
+            rest.extend(tiles)
+    return mosaics, rest
+
+
+class BuildVrtTask(QgsTask):
+    """Build a VRT over tile files, then swap the tile layers for one mosaic layer"""
+    
+    def __init__(self, layer_ids, paths, vrt_path, name, diagnostics, fallback=None):
+        super().__init__(f"Auto Style Manager: mosaicking {len(paths)} tiles", QgsTask.CanCancel)
+        self.layer_ids = layer_ids
+        self.paths = paths
+        self.vrt_path = vrt_path
+        self.name = name
+        self.diagnostics = diagnostics
+        self.fallback = fallback
+        self.error = None
+    
+    def run(self):
+        try:
+            from osgeo import gdal
+        except ImportError:
+            self.error = "GDAL Python bindings are not available"
+            return False
+        
+        def progress(complete, _message, _data):
+            self.setProgress(complete * 100.0)
+            return 0 if self.isCanceled() else 1
+        
+        os.makedirs(os.path.dirname(self.vrt_path), exist_ok=True)
+        gdal.ErrorReset()
+        ds = gdal.BuildVRT(self.vrt_path, self.paths, callback=progress)
+        if ds is None:
+            self.error = gdal.GetLastErrorMsg() or "BuildVRT failed"
+            return False
+        ds = None  # Flushes the VRT to disk
+        return True
+    
+    def finished(self, result):
+        project = QgsProject.instance()
+        tiles = [layer_id for layer_id in self.layer_ids if project.mapLayer(layer_id) is not None]
+        if not result:
+            if self.isCanceled():
+                self.diagnostics.count('mosaic cancelled')
+                return
+            QgsMessageLog.logMessage(f"Could not mosaic {len(self.paths)} tiles: {self.error}",
+                                     "Auto Style Manager", Qgis.Warning)
+            self.fail(tiles)
+            return
+        
+        mosaic = QgsRasterLayer(self.vrt_path, self.name, 'gdal')
+        if not mosaic.isValid():
+            self.fail(tiles)
+            return
+        if not tiles:
+            return  # The tiles were removed meanwhile
+        mosaic.setCustomProperty(MOSAIC_PROPERTY, len(self.paths))
+        
+        # Take the place of the first tile still in the layer tree
+        root = project.layerTreeRoot()
+        node = root.findLayer(tiles[0])
+        parent = node.parent() if node is not None else root
+        index = parent.children().index(node) if node is not None else 0
+        # layersAdded styles the mosaic through the usual styleRasterLayer path
+        project.addMapLayer(mosaic, False)
+        parent.insertLayer(index, mosaic)
+        project.removeMapLayers(tiles)
+        self.diagnostics.count('mosaic created')
+        QgsMessageLog.logMessage(f"Replaced {len(tiles)} raster tiles with the mosaic {self.vrt_path}",
+                                 "Auto Style Manager", Qgis.Info)
+    
+    def fail(self, tiles):
+        """Count the failure and hand the tiles back to be styled one by one"""
+        self.diagnostics.count('mosaic failed')
+        if self.fallback and tiles:
+            project = QgsProject.instance()
+            self.fallback([project.mapLayer(layer_id) for layer_id in tiles])
+
+
+class MosaicBuilder:
+    """Queue VRT mosaics for bursts of tiles"""
+    
+    def __init__(self, diagnostics, vrt_dir=None):
+        self.diagnostics = diagnostics
+        if vrt_dir is None:
+            vrt_dir = os.path.join(QgsApplication.qgisSettingsDirPath(), 'auto_style_manager', 'mosaics')
+        self.vrt_dir = vrt_dir
+        # VRT path -> running task, so the same burst is only mosaicked once
+        self.tasks = TaskRegistry()
+    
+    def vrtPath(self, paths):
+        """Stable VRT location for a set of tile files"""
+        digest = hashlib.sha1('\n'.join(sorted(paths)).encode()).hexdigest()[:16]
+        return os.path.join(self.vrt_dir, f"mosaic_{digest}.vrt")
+    
+    @staticmethod
+    def mosaicName(paths):
+        try:
+            folder = os.path.basename(os.path.commonpath([os.path.dirname(path) for path in paths]))
+        except ValueError:
+            folder = ''  # Tiles on different drives
+        return f"{folder or 'Tiles'} mosaic ({len(paths)} tiles)"
+    
+    def maybeBuild(self, layers, profile, fallback=None):
+        """Start a mosaic for each large compatible group; return the layers left to style
+        
+        fallback(layers) receives the tiles of a mosaic that could not be built.
+        """
+        groups, rest = groupTiles(layers, profile.mosaic_min_tiles)
+        for tiles in groups:
+            paths = [RasterStretcher.layerPath(layer) for layer in tiles]
+            vrt_path = self.vrtPath(paths)
+            if vrt_path in self.tasks:
+                rest.extend(tiles)
+                continue
+            self.diagnostics.count('mosaic started')
+            self.tasks.start(vrt_path, BuildVrtTask([layer.id() for layer in tiles], paths, vrt_path,
+                                                    self.mosaicName(paths), self.diagnostics, fallback))
+        return rest
+    
+    def cancelAll(self):
+        self.tasks.cancelAll()
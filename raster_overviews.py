@@ -0,0 +1,109 @@
+"""
+Auto Style Manager - raster overviews
+Background pyramid building for large rasters that have none
+"""
+
+import os
+from qgis.core import Qgis, QgsMessageLog, QgsProject, QgsTask
+
+from .raster_stats import RasterStretcher
+from .task_registry import TaskRegistry
+
+
+RESAMPLING_METHODS = ('NEAREST', 'AVERAGE', 'GAUSS', 'CUBIC', 'CUBICSPLINE', 'LANCZOS', 'MODE')
+
+# Stop adding overview levels once the smallest one fits in a tile of this size
+MIN_OVERVIEW_SIZE = 256
+
+
+def overviewLevels(width, height):
+    """Return the decimation factors 2, 4, 8, ... down to MIN_OVERVIEW_SIZE"""
+    levels = []
+    factor = 2
+    while max(width, height) / factor >= MIN_OVERVIEW_SIZE:
+        levels.append(factor)
+        factor *= 2
+    return levels or [2]
+
+
+class BuildOverviewsTask(QgsTask):
+    """Build external (.ovr) overviews for one raster file with GDAL"""
+    
+    def __init__(self, layer_id, path, resampling):
+        super().__init__(f"Auto Style Manager: building overviews for {os.path.basename(path)}",
+                         QgsTask.CanCancel)
+        self.layer_id = layer_id
+        self.path = path
+        self.resampling = resampling
+        self.error = None
+    
+    def run(self):
+        try:
+            from osgeo import gdal
+        except ImportError:
+            self.error = "GDAL Python bindings are not available"
+            return False
+        
+        # Read-only access makes GDAL write an external .ovr next to the file
+        ds = gdal.Open(self.path, gdal.GA_ReadOnly)
+        if ds is None:
+            self.error = gdal.GetLastErrorMsg() or "could not open the file"
+            return False
+        if ds.RasterCount and ds.GetRasterBand(1).GetOverviewCount() > 0:
+            return True  # Built meanwhile, nothing to do
+        
+        def progress(complete, _message, _data):
+            self.setProgress(complete * 100.0)
+            return 0 if self.isCanceled() else 1
+        
+        levels = overviewLevels(ds.RasterXSize, ds.RasterYSize)
+        result = ds.BuildOverviews(self.resampling, levels, progress)
+        ds = None
+        if result != 0:
+            self.error = gdal.GetLastErrorMsg() or "BuildOverviews failed"
+            return False
+        return True
+    
+    def finished(self, result):
+        layer = QgsProject.instance().mapLayer(self.layer_id)
+        if result:
+            if layer is not None:
+                layer.reload()
+                layer.triggerRepaint()
+            QgsMessageLog.logMessage(f"Built overviews for {self.path}",
+                                     "Auto Style Manager", Qgis.Info)
+        elif not self.isCanceled():
+            QgsMessageLog.logMessage(f"Could not build overviews for {self.path}: {self.error}",
+                                     "Auto Style Manager", Qgis.Warning)
+
+
+class OverviewBuilder:
+    """Queue overview builds for large rasters"""
+    
+    def __init__(self):
+        # path -> running task, so a raster added twice is only built once
+        self.tasks = TaskRegistry()
+    
+    @staticmethod
+    def needsOverviews(layer, threshold_mp):
+        """Return the local file of a raster over threshold_mp megapixels without overviews"""
+        path = RasterStretcher.layerPath(layer)
+        if path is None:
+            return None
+        if layer.width() * layer.height() < threshold_mp * 1000000:
+            return None
+        provider = layer.dataProvider()
+        if provider is None or provider.hasPyramids():
+            return None
+        return path
+    
+    def maybeBuild(self, layer, profile):
+        """Start a background build for layer if it needs one; True if queued"""
+        path = self.needsOverviews(layer, profile.overview_threshold)
+        if path is None or path in self.tasks:
+            return False
+        self.tasks.start(path, BuildOverviewsTask(layer.id(), path, profile.overview_resampling))
+        return True
+    
+    def cancelAll(self):
+        self.tasks.cancelAll()
@@ -0,0 +1,162 @@
+"""
+Auto Style Manager - raster statistics
+Sampled percentile contrast stretch with an on-disk cache
+"""
+
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from qgis.core import (Qgis, QgsApplication, QgsContrastEnhancement,
+                       QgsProviderRegistry, QgsRectangle)
+
+from .json_store import JsonStore
+
+
+# Sample a SAMPLE_GRID x SAMPLE_GRID grid of windows, WINDOW_SIZE pixels square
+SAMPLE_GRID = 4
+WINDOW_SIZE = 64
+
+MAX_CACHE_ENTRIES = 5000
+
+
+def numpyAvailable():
+    return np is not None
+
+
+def _numpyTypes():
+    return {
+        Qgis.Byte: np.uint8,
+        Qgis.UInt16: np.uint16,
+        Qgis.Int16: np.int16,
+        Qgis.UInt32: np.uint32,
+        Qgis.Int32: np.int32,
+        Qgis.Float32: np.float32,
+        Qgis.Float64: np.float64,
+    }
+
+
+def blockToArray(block, dtype):
+    """Return the valid (non-nodata, finite) values of a QgsRasterBlock as a 1-D array"""
+    data = np.frombuffer(bytes(block.data()), dtype=dtype).astype(np.float64)
+    if block.hasNoDataValue():
+        data = data[data != block.noDataValue()]
+    return data[np.isfinite(data)]
+
+
+class RasterStretcher:
+    """Compute approximate percentile limits from a bounded sample and apply them"""
+    
+    def __init__(self, cache_path=None):
+        if cache_path is None:
+            cache_path = os.path.join(QgsApplication.qgisSettingsDirPath(),
+                                      'auto_style_manager', 'stretch_cache.json')
+        # Band limits keyed by file path, size, mtime and percentiles; written once per burst
+        self.cache = JsonStore(cache_path, MAX_CACHE_ENTRIES)
+    
+    @staticmethod
+    def layerPath(layer):
+        """Local file behind a GDAL raster layer, or None"""
+        if layer.providerType() != 'gdal':
+            return None
+        path = QgsProviderRegistry.instance().decodeUri('gdal', layer.source()).get('path')
+        return path if path and os.path.isfile(path) else None
+    
+    def cacheKey(self, path, low, high):
+        st = os.stat(path)
+        return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{low:g}|{high:g}"
+    
+    def sampleWindows(self, layer):
+        """Yield (extent, width, height) for a strided grid of native resolution windows"""
+        extent = layer.extent()
+        cols, rows = layer.width(), layer.height()
+        if cols <= 0 or rows <= 0:
+            return
+        px_w = extent.width() / cols
+        px_h = extent.height() / rows
+        
+        if cols <= SAMPLE_GRID * WINDOW_SIZE and rows <= SAMPLE_GRID * WINDOW_SIZE:
+            # Small raster: the whole thing is cheaper than the grid
+            yield extent, cols, rows
+            return
+        
+        win_w = min(WINDOW_SIZE, cols)
+        win_h = min(WINDOW_SIZE, rows)
+        for gx in range(SAMPLE_GRID):
+            for gy in range(SAMPLE_GRID):
+                # Window origin in pixels, spread evenly across the raster
+                col = int((cols - win_w) * (gx + 0.5) / SAMPLE_GRID)
+                row = int((rows - win_h) * (gy + 0.5) / SAMPLE_GRID)
+                x_min = extent.xMinimum() + col * px_w
+                y_max = extent.yMaximum() - row * px_h
+                yield (QgsRectangle(x_min, y_max - win_h * px_h, x_min + win_w * px_w, y_max),
+                       win_w, win_h)
+    
+    def computeLimits(self, layer, bands, low, high):
+        """Return {band: (min, max)} from the sampled percentiles"""
+        provider = layer.dataProvider()
+        types = _numpyTypes()
+        windows = list(self.sampleWindows(layer))
+        limits = {}
+        for band in bands:
+            dtype = types.get(provider.dataType(band))
+            if dtype is None:
+                continue
+            samples = [blockToArray(provider.block(band, extent, width, height), dtype)
+                       for extent, width, height in windows]
+            values = np.concatenate(samples) if samples else np.empty(0)
+            if values.size:
+                lo, hi = np.percentile(values, [low, high])
+                limits[band] = (float(lo), float(hi))
+        return limits
+    
+    def enhancement(self, layer, band, limits):
+        ce = QgsContrastEnhancement(layer.dataProvider().dataType(band))
+        ce.setContrastEnhancementAlgorithm(QgsContrastEnhancement.StretchToMinimumMaximum)
+        ce.setMinimumValue(limits[0])
+        ce.setMaximumValue(limits[1])
+        return ce
+    
+    def stretchLayer(self, layer, low, high):
+        """Apply a percentile stretch to gray/multiband renderers; True if applied"""
+        if np is None:
+            return False
+        renderer = layer.renderer()
+        if renderer is None:
+            return False
+        kind = renderer.type()
+        if kind == 'singlebandgray':
+            bands = [renderer.grayBand()]
+        elif kind == 'multibandcolor':
+            bands = [renderer.redBand(), renderer.greenBand(), renderer.blueBand()]
+        else:
+            return False
+        bands = [band for band in bands if band > 0]
+        
+        path = self.layerPath(layer)
+        key = self.cacheKey(path, low, high) if path else None
+        cached = self.cache.get(key) if key else None
+        limits = {int(band): tuple(value) for band, value in cached.items()} if cached else {}
+        # Bands cached for another renderer are reused; only the missing ones are sampled
+        missing = [band for band in bands if band not in limits]
+        if missing:
+            computed = self.computeLimits(layer, missing, low, high)
+            if computed:
+                limits.update(computed)
+                if key:
+                    self.cache.put(key, {str(band): value for band, value in limits.items()})
+        if not all(band in limits for band in bands):
+            return False
+        
+        if kind == 'singlebandgray':
+            renderer.setContrastEnhancement(self.enhancement(layer, bands[0], limits[bands[0]]))
+        else:
+            setters = (renderer.setRedContrastEnhancement, renderer.setGreenContrastEnhancement,
+                       renderer.setBlueContrastEnhancement)
+            for setter, band in zip(setters, [renderer.redBand(), renderer.greenBand(), renderer.blueBand()]):
+                if band > 0:
+                    setter(self.enhancement(layer, band, limits[band]))
+        return True
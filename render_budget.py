@@ -0,0 +1,235 @@
+"""
+Auto Style Manager - render budget
+Per-layer render times from the canvas, and cheaper styling for layers that stay over budget
+"""
+
+from collections import OrderedDict, deque, namedtuple
+from dataclasses import replace
+from qgis.PyQt.QtCore import QModelIndex
+from qgis.core import Qgis, QgsApplication, QgsRasterLayer, QgsRuntimeProfilerNode, QgsVectorSimplifyMethod
+
+# Renders remembered per layer
+HISTORY = 5
+
+# QgsRuntimeProfiler group the map renderer records into
+PROFILE_GROUP = "rendering"
+
+# Adaptation levels: vectors go heavy, then dense; rasters switch to nearest neighbour
+VECTOR_LEVELS = 2
+RASTER_LEVELS = 1
+
+# One row of the per-layer report shown in the dialog
+LayerRender = namedtuple('LayerRender', ['layer_id', 'name', 'raster', 'renders', 'last_ms', 'mean_ms', 'level'])
+
+
+def levelName(level, raster):
+    if not level:
+        return "unchanged"
+    if raster:
+        return "nearest neighbour resampling"
+    return "simplified, heavy tier" if level < 2 else "simplified, dense tier"
+
+
+def recordingAvailable():
+    """True when QGIS can record per-layer render times (QGIS 3.34+)"""
+    return (hasattr(QgsApplication, 'profiler') and hasattr(Qgis, 'MapSettingsFlag')
+            and hasattr(Qgis.MapSettingsFlag, 'RecordProfile'))
+
+
+def setRecording(canvas, enabled):
+    """Turn per-layer render time recording on or off; False if unsupported"""
+    if not recordingAvailable():
+        return False
+    settings = canvas.mapSettings()
+    settings.setFlag(Qgis.MapSettingsFlag.RecordProfile, enabled)
+    canvas.setMapSettingsFlags(settings.flags())
+    return True
+
+
+def enableRecording(canvas):
+    """Ask the canvas renderer to record per-layer times; False if unsupported"""
+    return setRecording(canvas, True)
+
+
+def disableRecording(canvas):
+    """Stop recording render times, so rendering no longer pays for the profiler"""
+    return setRecording(canvas, False)
+
+
+def profilerRoles():
+    """Return the (group, id, elapsed) model roles of the runtime profiler"""
+    # QgsRuntimeProfilerNode.Roles became the scoped CustomRole in QGIS 3.36
+    roles = getattr(QgsRuntimeProfilerNode, 'CustomRole', QgsRuntimeProfilerNode)
+    return int(roles.Group), int(roles.Id), int(roles.Elapsed)
+
+
+def profilerTimes(group=PROFILE_GROUP):
+    """Return {layer id: seconds} of the last render, or None when unavailable
+    
+    Topics are told apart by the id the renderer records them with (the layer
+    id), so layers sharing a name keep their own times.
+    """
+    if not recordingAvailable():
+        return None
+    profiler = QgsApplication.profiler()
+    group_role, id_role, elapsed_role = profilerRoles()
+    times = {}
+    
+    def walk(parent):
+        for row in range(profiler.rowCount(parent)):
+            index = profiler.index(row, 0, parent)
+            topic_id = profiler.data(index, id_role)
+            if topic_id and profiler.data(index, group_role) == group:
+                elapsed = profiler.data(index, elapsed_role) or 0.0
+                times[topic_id] = times.get(topic_id, 0.0) + elapsed
+            walk(index)
+    
+    walk(QModelIndex())
+    return times
+
+
+def cheapProfile(profile, level, raster):
+    """Return profile with the cost cutting of an adaptation level"""
+    if raster:
+        return replace(profile, fast_resampling=True)
+    # Forcing the tier thresholds to zero reuses the performance profile and label guard
+    dense = profile.dense_features if level < 2 else 0
+    return replace(profile, perf_profile=True, heavy_features=0, dense_features=dense,
+                   dense_no_outline=True, adaptive_labels=True)
+
+
+class RenderBudget:
+    """Track render times per layer and restyle layers that keep exceeding the budget"""
+    
+    def __init__(self, styler):
+        self.styler = styler
+        self.available = None  # Unknown until the first render
+        self.history = {}
+        self.names = {}  # layer id -> (name, is raster)
+        self.strikes = {}
+        # layer id -> adaptation level, in the order they were applied
+        self.levels = OrderedDict()
+        # layer id -> settings changed by an adaptation that restyling does not reset
+        self.originals = {}
+    
+    def collect(self, canvas, profile):
+        """Record the last canvas render; return the layers that were made cheaper"""
+        times = profilerTimes()
+        self.available = bool(times)
+        if not times:
+            return []
+        adapted = []
+        for layer in canvas.layers():
+            seconds = times.get(layer.id())
+            if seconds is not None and self.record(layer, seconds * 1000.0, profile):
+                adapted.append(layer)
+        return adapted
+    
+    def record(self, layer, ms, profile):
+        """Add one render time; adapt the layer after render_budget_strikes renders over budget"""
+        layer_id = layer.id()
+        self.names[layer_id] = (layer.name(), isinstance(layer, QgsRasterLayer))
+        self.history.setdefault(layer_id, deque(maxlen=HISTORY)).append(ms)
+        if ms <= profile.render_budget_ms:
+            self.strikes[layer_id] = 0
+            return False
+        strikes = self.strikes.get(layer_id, 0) + 1
+        if strikes < profile.render_budget_strikes:
+            self.strikes[layer_id] = strikes
+            return False
+        self.strikes[layer_id] = 0
+        level = self.levels.get(layer_id, 0)
+        if level >= (RASTER_LEVELS if isinstance(layer, QgsRasterLayer) else VECTOR_LEVELS):
+            return False
+        return self.adapt(layer, level + 1, profile)
+    
+    def forget(self, layer_ids):
+        """Drop everything recorded for layers removed from the project"""
+        for layer_id in layer_ids:
+            for records in (self.history, self.names, self.strikes, self.levels, self.originals):
+                records.pop(layer_id, None)
+    
+    def layerProfile(self, layer, profile):
+        """Return the cheaper variant of profile for adapted layers"""
+        level = self.levels.get(layer.id())
+        if not level:
+            return profile
+        return cheapProfile(profile, level, isinstance(layer, QgsRasterLayer))
+    
+    def saveOriginals(self, layer):
+        if layer.id() in self.originals:
+            return
+        if isinstance(layer, QgsRasterLayer):
+            resampler = layer.resampleFilter()
+            if resampler is None:
+                return
+            zoomed_in = resampler.zoomedInResampler()
+            zoomed_out = resampler.zoomedOutResampler()
+            self.originals[layer.id()] = (zoomed_in.clone() if zoomed_in else None,
+                                          zoomed_out.clone() if zoomed_out else None,
+                                          resampler.maxOversampling())
+        else:
+            self.originals[layer.id()] = (QgsVectorSimplifyMethod(layer.simplifyMethod()),
+                                          layer.hasScaleBasedVisibility(),
+                                          layer.minimumScale(), layer.maximumScale())
+    
+    def restoreOriginals(self, layer):
+        original = self.originals.pop(layer.id(), None)
+        if original is None:
+            return
+        if isinstance(layer, QgsRasterLayer):
+            resampler = layer.resampleFilter()
+            if resampler is None:
+                return
+            resampler.setZoomedInResampler(original[0])
+            resampler.setZoomedOutResampler(original[1])
+            resampler.setMaxOversampling(original[2])
+        else:
+            layer.setSimplifyMethod(original[0])
+            layer.setScaleBasedVisibility(original[1])
+            layer.setMinimumScale(original[2])
+            layer.setMaximumScale(original[3])
+    
+    def restyle(self, layer, profile):
+        """Style layer with its current (possibly adapted) profile through the styler"""
+        layer_profile = self.styler.layerProfile(layer, profile)
+        if isinstance(layer, QgsRasterLayer):
+            styled = self.styler.styleRasterLayer(layer, layer_profile, force=True)
+            self.styler.saveCaches()
+            return styled
+        return self.styler.styleVectorLayer(layer, layer_profile, force=True)
+    
+    def adapt(self, layer, level, profile):
+        """Restyle layer at a cheaper level; True if the styler changed it"""
+        self.saveOriginals(layer)
+        previous = self.levels.get(layer.id(), 0)
+        self.levels[layer.id()] = level
+        if self.restyle(layer, profile):
+            self.styler.diagnostics.count('render budget adaptations')
+            return True
+        # Not a layer the plugin styles; leave it as it was
+        if previous:
+            self.levels[layer.id()] = previous
+        else:
+            del self.levels[layer.id()]
+            self.originals.pop(layer.id(), None)
+        return False
+    
+    def revert(self, layer, profile):
+        """Undo the adaptation of layer and restyle it with the regular profile"""
+        if self.levels.pop(layer.id(), None) is None:
+            return False
+        self.strikes.pop(layer.id(), None)
+        self.restoreOriginals(layer)
+        self.restyle(layer, profile)
+        return True
+    
+    def rows(self):
+        """LayerRender rows for every layer with recorded renders, slowest first"""
+        rows = []
+        for layer_id, times in self.history.items():
+            name, raster = self.names[layer_id]
+            rows.append(LayerRender(layer_id, name, raster, len(times), times[-1],
+                                    sum(times) / len(times), self.levels.get(layer_id, 0)))
+        rows.sort(key=lambda row: row.mean_ms, reverse=True)
+        return rows
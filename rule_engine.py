@@ -0,0 +1,264 @@
+"""
+Auto Style Manager - style rules
+Per-layer profile overrides compiled into one indexed matcher
+"""
+
+import fnmatch
+import re
+import shlex
+from collections import OrderedDict, namedtuple
+from dataclasses import fields, replace
+
+from qgis.core import QgsRasterLayer, QgsWkbTypes
+
+
+# Condition keys a rule may use; a missing key matches anything
+CONDITION_KEYS = ('name', 'provider', 'source', 'geometry', 'crs')
+
+GEOMETRY_NAMES = {
+    QgsWkbTypes.PointGeometry: 'point',
+    QgsWkbTypes.LineGeometry: 'line',
+    QgsWkbTypes.PolygonGeometry: 'polygon',
+}
+
+# Profile fields a rule may not override
+LOCKED_FIELDS = frozenset(['style_rules', 'project_load_mode', 'render_budget', 'render_budget_ms',
+                           'render_budget_strikes'])
+
+RULES_HELP = ("One rule per line: conditions -> overrides. Conditions: name=<glob> provider=<name> "
+              "source=<path prefix> geometry=point|line|polygon|raster crs=<authid>. "
+              "Overrides are profile settings, e.g. line_color=#808080 line_width=1.2. "
+              "Every matching rule applies, later lines win. Lines starting with # are ignored.")
+
+# Splits a glob into its literal fragments
+GLOB_SPECIALS = re.compile(r'\[[^\]]*\]|[*?]')
+
+StyleRule = namedtuple('StyleRule', ['line', 'conditions', 'overrides'])
+
+# Plain-data view of a layer used for matching
+LayerKey = namedtuple('LayerKey', ['name', 'provider', 'source', 'geometry', 'crs'])
+
+
+def _coerce(field_type, text):
+    """Convert override text to the type of the profile field"""
+    if field_type in (bool, 'bool'):
+        lowered = text.lower()
+        if lowered in ('1', 'true', 'yes', 'on'):
+            return True
+        if lowered in ('0', 'false', 'no', 'off'):
+            return False
+        raise ValueError(f"not a boolean: {text!r}")
+    if field_type in (int, 'int'):
+        return int(text)
+    if field_type in (float, 'float'):
+        return float(text)
+    return text
+
+
+def maskBits(mask):
+    """Yield the indexes of the set bits of mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def normalizeSource(source):
+    return source.replace('\\', '/').lower()
+
+
+def parseRules(text, profile_type):
+    """Parse rule text into (rules, errors); errors are 'line N: message' strings"""
+    types = {f.name: f.type for f in fields(profile_type) if f.name not in LOCKED_FIELDS}
+    rules, errors = [], []
+    for number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith('#'):
+            continue
+        head, arrow, tail = line.partition('->')
+        if not arrow:
+            errors.append(f"line {number}: missing '->'")
+            continue
+        try:
+            conditions = {}
+            for token in shlex.split(head):
+                key, eq, value = token.partition('=')
+                key = key.strip().lower()
+                if not eq or key not in CONDITION_KEYS:
+                    raise ValueError(f"unknown condition {token!r}")
+                conditions[key] = value.strip()
+            overrides = []
+            for token in shlex.split(tail):
+                key, eq, value = token.partition('=')
+                if not eq or key not in types:
+                    raise ValueError(f"unknown setting {token!r}")
+                overrides.append((key, _coerce(types[key], value)))
+        except ValueError as e:
+            errors.append(f"line {number}: {e}")
+            continue
+        if not overrides:
+            errors.append(f"line {number}: no overrides")
+            continue
+        rules.append(StyleRule(number, conditions, tuple(overrides)))
+    return rules, errors
+
+
+class PrefixTrie:
+    """Map string prefixes to rule bitmasks; walk() ORs every prefix of a text"""
+    
+    def __init__(self):
+        self.root = [0, {}]
+    
+    def add(self, prefix, bit):
+        node = self.root
+        for ch in prefix:
+            node = node[1].setdefault(ch, [0, {}])
+        node[0] |= bit
+    
+    def walk(self, text):
+        node = self.root
+        mask = node[0]
+        for ch in text:
+            node = node[1].get(ch)
+            if node is None:
+                break
+            mask |= node[0]
+        return mask
+
+
+class RuleEngine:
+    """All rules compiled into bitmask buckets, tries and one combined regex
+    
+    Rule i owns bit 1 << i. Each condition key maps a layer value to the mask of
+    rules accepting it, so matching is a few dict lookups and ANDs no matter how
+    many rules exist. Name globs that are neither exact nor a plain prefix fall
+    back to regexes, only run for rules whose longest literal fragment occurs in
+    the layer name (or, without one, when a combined pattern of them matches).
+    """
+    
+    MAX_VARIANTS = 512
+    
+    def __init__(self, text, profile_type):
+        self.text = text
+        self.rules, self.errors = parseRules(text, profile_type)
+        self.all_mask = (1 << len(self.rules)) - 1
+        self.buckets = {key: {} for key in ('provider', 'geometry', 'crs')}
+        self.any = {key: 0 for key in CONDITION_KEYS}
+        self.exact_names = {}
+        self.name_prefixes = PrefixTrie()
+        self.source_prefixes = PrefixTrie()
+        self.name_regexes = {}  # rule index -> compiled glob
+        self.regex_mask = 0
+        # Longest literal fragment of each glob -> mask, looked up by name substrings
+        self.name_literals = {}
+        self.literal_lengths = set()
+        self.unanchored_mask = 0
+        
+        for i, rule in enumerate(self.rules):
+            bit = 1 << i
+            for key in CONDITION_KEYS:
+                value = rule.conditions.get(key)
+                if value is None or value in ('', '*'):
+                    self.any[key] |= bit
+                elif key == 'name':
+                    self.addNamePattern(value.lower(), i)
+                elif key == 'source':
+                    self.source_prefixes.add(normalizeSource(value), bit)
+                else:
+                    value = value.upper() if key == 'crs' else value.lower()
+                    bucket = self.buckets[key]
+                    bucket[value] = bucket.get(value, 0) | bit
+        
+        # Globs without a literal fragment share one combined prefilter
+        unanchored = [self.name_regexes[i].pattern for i in maskBits(self.unanchored_mask)]
+        self.combined_re = re.compile('|'.join(f'(?:{p})' for p in unanchored)) if unanchored else None
+        self.variants = OrderedDict()
+    
+    def addNamePattern(self, pattern, index):
+        bit = 1 << index
+        wildcards = set('*?[')
+        if not wildcards & set(pattern):
+            self.exact_names[pattern] = self.exact_names.get(pattern, 0) | bit
+        elif pattern.endswith('*') and not wildcards & set(pattern[:-1]):
+            self.name_prefixes.add(pattern[:-1], bit)
+        else:
+            self.name_regexes[index] = re.compile(fnmatch.translate(pattern))
+            self.regex_mask |= bit
+            literal = max(GLOB_SPECIALS.split(pattern), key=len)
+            if literal:
+                self.name_literals[literal] = self.name_literals.get(literal, 0) | bit
+                self.literal_lengths.add(len(literal))
+            else:
+                self.unanchored_mask |= bit
+    
+    @staticmethod
+    def layerKey(layer):
+        if isinstance(layer, QgsRasterLayer):
+            geometry = 'raster'
+        else:
+            geometry = GEOMETRY_NAMES.get(layer.geometryType(), 'none')
+        try:
+            crs = layer.crs().authid().upper()
+        except Exception:
+            crs = ''
+        return LayerKey(layer.name().lower(), (layer.providerType() or '').lower(),
+                        normalizeSource(layer.source()), geometry, crs)
+    
+    def matchKey(self, key):
+        """Return the bitmask of rules matching a LayerKey"""
+        mask = self.all_mask
+        for dimension in ('provider', 'geometry', 'crs'):
+            mask &= self.buckets[dimension].get(getattr(key, dimension), 0) | self.any[dimension]
+            if not mask:
+                return 0
+        mask &= self.source_prefixes.walk(key.source) | self.any['source']
+        if not mask:
+            return 0
+        
+        name_mask = (self.any['name'] | self.exact_names.get(key.name, 0)
+                     | self.name_prefixes.walk(key.name))
+        pending = mask & self.regex_mask & ~name_mask
+        if pending:
+            name = key.name
+            candidates = 0
+            if pending & self.unanchored_mask and self.combined_re.match(name):
+                candidates = self.unanchored_mask
+            literals = self.name_literals
+            for length in self.literal_lengths:
+                for i in range(len(name) - length + 1):
+                    candidates |= literals.get(name[i:i + length], 0)
+            pending &= candidates
+            for i in maskBits(pending):
+                if self.name_regexes[i].match(name):
+                    name_mask |= 1 << i
+        return mask & name_mask
+    
+    def matchingRules(self, layer):
+        mask = self.matchKey(self.layerKey(layer))
+        return [self.rules[i] for i in maskBits(mask)]
+    
+    def profileFor(self, layer, profile):
+        """Return profile with the overrides of every matching rule, or profile itself"""
+        if not self.rules:
+            return profile
+        mask = self.matchKey(self.layerKey(layer))
+        if not mask:
+            return profile
+        
+        cache_key = (profile.fingerprint(), mask)
+        try:
+            self.variants.move_to_end(cache_key)
+            return self.variants[cache_key]
+        except KeyError:
+            pass
+        
+        overrides = {}
+        for i in maskBits(mask):
+            overrides.update(self.rules[i].overrides)
+        variant = replace(profile, **overrides)
+        if variant.fingerprint() == profile.fingerprint():
+            variant = profile  # The overrides restate the base values
+        self.variants[cache_key] = variant
+        if len(self.variants) > self.MAX_VARIANTS:
+            self.variants.popitem(last=False)
+        return variant
@@ -0,0 +1,156 @@
+"""
+Auto Style Manager - spatial indexes
+Background spatial index creation for large vector files that lack one
+"""
+
+import os
+from collections import OrderedDict
+from qgis.core import (Qgis, QgsFeatureSource, QgsMessageLog, QgsProject,
+                       QgsProviderRegistry, QgsTask, QgsVectorDataProvider)
+
+from .task_registry import TaskRegistry
+from .vector_performance import featureCount
+
+
+# Index outcomes per layer, reported in the add and apply summaries
+INDEX_QUEUED = 'started'
+INDEX_CREATED = 'created'
+INDEX_FAILED = 'failed'
+INDEX_CANCELLED = 'cancelled'
+INDEX_UNSUPPORTED = 'unsupported'
+
+MAX_RESULTS = 1000
+
+
+class CreateSpatialIndexTask(QgsTask):
+    """Create a spatial index through a separate OGR connection to the file"""
+    
+    def __init__(self, builder, layer, path, layer_name):
+        super().__init__(f"Auto Style Manager: indexing {os.path.basename(path)}", QgsTask.CanCancel)
+        self.builder = builder
+        self.layer_id = layer.id()
+        self.name = layer.name()
+        self.path = path
+        self.layer_name = layer_name
+        self.error = None
+    
+    def run(self):
+        try:
+            from osgeo import gdal, ogr
+        except ImportError:
+            self.error = "GDAL Python bindings are not available"
+            return False
+        
+        ds = ogr.Open(self.path, 1)
+        if ds is None:
+            self.error = gdal.GetLastErrorMsg() or "could not open the file for update"
+            return False
+        ogr_layer = ds.GetLayerByName(self.layer_name) if self.layer_name else ds.GetLayer(0)
+        if ogr_layer is None:
+            self.error = f"layer {self.layer_name!r} not found"
+            return False
+        # Shapefiles get a .qix, other OGR drivers their native index
+        gdal.ErrorReset()
+        ds.ExecuteSQL(f'CREATE SPATIAL INDEX ON "{ogr_layer.GetName()}"')
+        error = gdal.GetLastErrorMsg()
+        ds = None
+        if error:
+            self.error = error
+            return False
+        return True
+    
+    def finished(self, result):
+        if result:
+            layer = QgsProject.instance().mapLayer(self.layer_id)
+            if layer is not None:
+                layer.reload()
+            QgsMessageLog.logMessage(f"Created a spatial index for {self.path}",
+                                     "Auto Style Manager", Qgis.Info)
+            self.builder.record(self.layer_id, self.name, INDEX_CREATED)
+        elif self.isCanceled():
+            self.builder.record(self.layer_id, self.name, INDEX_CANCELLED)
+        else:
+            QgsMessageLog.logMessage(f"Could not create a spatial index for {self.path}: {self.error}",
+                                     "Auto Style Manager", Qgis.Warning)
+            self.builder.record(self.layer_id, self.name, INDEX_FAILED)
+
+
+class SpatialIndexBuilder:
+    """Queue spatial index creation for large layers"""
+    
+    def __init__(self, diagnostics):
+        self.diagnostics = diagnostics
+        # (path, layer name) -> running task, so a layer added twice is only indexed once
+        self.tasks = TaskRegistry()
+        # layer id -> (layer name, INDEX_* outcome) of the layers that needed an index
+        self.results = OrderedDict()
+        # Called with (layer name, outcome) when a background build succeeds or fails
+        self.on_result = None
+    
+    @staticmethod
+    def needsIndex(layer, threshold):
+        """Return (path, layer name) of an OGR layer over threshold features without an index
+        
+        INDEX_UNSUPPORTED when its provider cannot create one (GeoJSON, for one), else None.
+        """
+        provider = layer.dataProvider()
+        if provider is None or layer.providerType() != 'ogr':
+            return None
+        status = provider.hasSpatialIndex()
+        if status == QgsFeatureSource.SpatialIndexPresent or featureCount(layer) < threshold:
+            return None
+        if not provider.capabilities() & QgsVectorDataProvider.CreateSpatialIndex:
+            return INDEX_UNSUPPORTED
+        if status != QgsFeatureSource.SpatialIndexNotPresent:
+            return None
+        parts = QgsProviderRegistry.instance().decodeUri('ogr', layer.source())
+        path = parts.get('path')
+        if not path or not os.path.isfile(path):
+            return None
+        return path, parts.get('layerName') or ''
+    
+    def maybeBuild(self, layer, profile):
+        """Start a background index build for layer if it needs one; True if queued"""
+        target = self.needsIndex(layer, profile.index_threshold)
+        if target is None:
+            return False
+        if target == INDEX_UNSUPPORTED:
+            self.record(layer.id(), layer.name(), INDEX_UNSUPPORTED)
+            return False
+        path, layer_name = target
+        key = (path, layer_name)
+        if key in self.tasks:
+            return False
+        self.record(layer.id(), layer.name(), INDEX_QUEUED)
+        self.tasks.start(key, CreateSpatialIndexTask(self, layer, path, layer_name))
+        return True
+    
+    def record(self, layer_id, name, outcome):
+        """Keep the latest outcome per layer and count it in the diagnostics"""
+        self.results.pop(layer_id, None)
+        self.results[layer_id] = (name, outcome)
+        if len(self.results) > MAX_RESULTS:
+            self.results.popitem(last=False)
+        self.diagnostics.count(f'spatial index {outcome}')
+        if outcome in (INDEX_CREATED, INDEX_FAILED) and self.on_result is not None:
+            self.on_result(name, outcome)
+    
+    def summaryLines(self, layer_ids):
+        """Describe the index work for layer_ids, one line per outcome; [] when there was none"""
+        outcomes = {}
+        for layer_id in layer_ids:
+            if layer_id in self.results:
+                name, outcome = self.results[layer_id]
+                outcomes.setdefault(outcome, []).append(name)
+        lines = []
+        for outcome, text in ((INDEX_CREATED, "created"), (INDEX_QUEUED, "still being built"),
+                              (INDEX_FAILED, "failed"), (INDEX_CANCELLED, "cancelled")):
+            if outcome in outcomes:
+                lines.append(f"{len(outcomes[outcome])} spatial index(es) {text}")
+        if INDEX_UNSUPPORTED in outcomes:
+            names = ", ".join(sorted(outcomes[INDEX_UNSUPPORTED]))
+            lines.append(f"No spatial index, the provider cannot create one: {names}")
+        return lines
+    
+    def cancelAll(self):
+        self.tasks.cancelAll()
@@ -0,0 +1,320 @@
+"""
+Auto Style Manager - style profile
+Immutable snapshot of the plugin settings used by the styling hot paths
+"""
+
+import os
+import hashlib
+import json
+from dataclasses import dataclass, fields
+from qgis.PyQt.QtCore import QSettings
+from qgis.PyQt.QtGui import QColor
+from qgis.core import Qgis, QgsMessageLog
+
+from .label_fields import DEFAULT_LABEL_PRIORITY, parseFieldList
+from .basemap_classifier import parsePatternList
+
+
+SETTINGS_GROUP = "AutoStyleManager"
+
+# Single key holding the whole profile document
+PROFILE_KEY = f"{SETTINGS_GROUP}/profile"
+
+# Profile document format; bump PROFILE_VERSION and add a MIGRATIONS entry on layout changes
+PROFILE_FORMAT = "auto-style-manager-profile"
+PROFILE_VERSION = 1
+
+# Layer custom property holding the fingerprint of the profile it was styled with
+FINGERPRINT_PROPERTY = "AutoStyleManager/fingerprint"
+
+# What happens to layers added while a project file is being read
+PROJECT_LOAD_MODES = ('skip', 'defer', 'style')
+
+# Project entry (scope SETTINGS_GROUP) overriding project_load_mode for one project
+PROJECT_LOAD_ENTRY = "project_load_mode"
+
+# Profile fields holding colors; parsed into QColor once per profile
+COLOR_FIELDS = ('point_color', 'line_color', 'polygon_fill', 'polygon_stroke',
+                'label_color', 'buffer_color')
+
+
+@dataclass(frozen=True)
+class StyleProfile:
+    """Typed, read-only view of the AutoStyleManager settings"""
+    # Raster
+    raster_enabled: bool = True
+    exclude_basemaps: bool = True
+    basemap_patterns: str = ""
+    opacity: float = 0.7
+    auto_stretch: bool = False
+    stretch_low: float = 2.0
+    stretch_high: float = 98.0
+    build_overviews: bool = False
+    overview_threshold: int = 64
+    overview_resampling: str = "AVERAGE"
+    mosaic_tiles: bool = False
+    mosaic_min_tiles: int = 20
+    fast_resampling: bool = False
+    
+    # Vector
+    vector_enabled: bool = True
+    point_color: str = "#e74c3c"
+    point_size: float = 2.5
+    line_color: str = "#3498db"
+    line_width: float = 0.4
+    polygon_fill: str = "#90EE9064"
+    polygon_stroke: str = "#2ecc71"
+    polygon_width: float = 0.4
+    perf_profile: bool = False
+    heavy_features: int = 50000
+    dense_features: int = 500000
+    simplify_threshold: float = 1.0
+    heavy_min_scale: int = 1000000
+    dense_min_scale: int = 250000
+    dense_no_outline: bool = True
+    build_indexes: bool = False
+    index_threshold: int = 10000
+    cache_sources: bool = False
+    cache_min_mb: int = 10
+    cache_max_mb: int = 2048
+    classify_enabled: bool = False
+    classify_field: str = ""
+    classify_mode: str = "auto"
+    classify_method: str = "quantile"
+    classify_classes: int = 5
+    classify_sample: int = 10000
+    classify_ramp: str = "Viridis"
+    
+    # Labels
+    labels_enabled: bool = False
+    label_field: str = "name"
+    label_priority: str = DEFAULT_LABEL_PRIORITY
+    label_size: float = 10.0
+    label_color: str = "#000000"
+    label_buffer: bool = True
+    buffer_size: float = 1.0
+    buffer_color: str = "#ffffff"
+    adaptive_labels: bool = False
+    label_heavy_scale: int = 50000
+    label_dense_scale: int = 10000
+    label_limit: int = 2000
+    dense_label_obstacles: bool = False
+    label_sampling: bool = False
+    label_sample_rows: int = 500
+    
+    # Performance
+    batch_enabled: bool = True
+    batch_size: int = 200
+    batch_interval: int = 150
+    project_load_mode: str = "skip"
+    render_budget: bool = False
+    render_budget_ms: int = 500
+    render_budget_strikes: int = 3
+    
+    # Rules (per-layer overrides, see rule_engine.py)
+    style_rules: str = ""
+    
+    def __post_init__(self):
+        # Parse colors once so the per-layer path never touches the string form
+        colors = {name: QColor(getattr(self, name)) for name in COLOR_FIELDS}
+        object.__setattr__(self, '_colors', colors)
+        object.__setattr__(self, '_label_priority', parseFieldList(self.label_priority))
+        object.__setattr__(self, '_basemap_patterns', parsePatternList(self.basemap_patterns))
+        
+        values = {f.name: getattr(self, f.name) for f in fields(self)}
+        digest = hashlib.sha1(json.dumps(values, sort_keys=True).encode()).hexdigest()
+        object.__setattr__(self, '_fingerprint', digest[:16])
+    
+    def color(self, name):
+        """Return the parsed QColor for a color field"""
+        return self._colors[name]
+    
+    def fingerprint(self):
+        """Return a stable hash of every profile value"""
+        return self._fingerprint
+    
+    def labelPriority(self):
+        """Return the fallback label field names as a tuple"""
+        return self._label_priority
+    
+    def basemapPatterns(self):
+        """Return the user basemap patterns as a tuple"""
+        return self._basemap_patterns
+    
+    def values(self):
+        """Return every profile value as a plain dict"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+    
+    @classmethod
+    def fromValues(cls, values):
+        """Build a profile from a dict; unknown keys are ignored, missing keys use defaults"""
+        kwargs = {}
+        for f in fields(cls):
+            if f.name in values:
+                kwargs[f.name] = _coerceValue(f, values[f.name])
+        return cls(**kwargs)
+    
+    def toDocument(self, name=""):
+        """Return the versioned document stored in QSettings and profile files"""
+        return {
+            'format': PROFILE_FORMAT,
+            'version': PROFILE_VERSION,
+            'name': name,
+            'profile': self.values(),
+        }
+    
+    @classmethod
+    def fromDocument(cls, document):
+        """Return (name, profile) from a profile document, migrating older versions"""
+        if not isinstance(document, dict) or document.get('format') != PROFILE_FORMAT:
+            raise ValueError("not an Auto Style Manager profile")
+        document = migrateDocument(document)
+        values = document.get('profile')
+        if not isinstance(values, dict):
+            raise ValueError("profile document has no values")
+        return document.get('name', ""), cls.fromValues(values)
+    
+    @classmethod
+    def fromLegacySettings(cls, settings):
+        """Build a profile from the old one-key-per-field layout"""
+        values = {}
+        for f in fields(cls):
+            key = f"{SETTINGS_GROUP}/{f.name}"
+            values[f.name] = settings.value(key, f.default, type=f.type)
+        return cls(**values)
+    
+    @classmethod
+    def fromSettings(cls, settings):
+        """Build a profile from the single QSettings document, or None if there is none"""
+        text = settings.value(PROFILE_KEY, "", type=str)
+        if not text:
+            return None
+        try:
+            return cls.fromDocument(json.loads(text))[1]
+        except ValueError as e:
+            QgsMessageLog.logMessage(f"Ignoring unreadable stored profile: {e}",
+                                     "Auto Style Manager", Qgis.Warning)
+            return cls()
+    
+    def writeSettings(self, settings):
+        """Write the whole profile to QSettings as one document"""
+        settings.setValue(PROFILE_KEY, json.dumps(self.toDocument(), sort_keys=True))
+
+
+def _coerceValue(f, value):
+    """Convert a JSON value to the type of dataclass field f"""
+    if f.type in (bool, 'bool'):
+        if not isinstance(value, bool):
+            raise ValueError(f"{f.name}: not a boolean: {value!r}")
+        return value
+    try:
+        if f.type in (int, 'int'):
+            return int(value)
+        if f.type in (float, 'float'):
+            return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{f.name}: not a number: {value!r}")
+    if not isinstance(value, str):
+        raise ValueError(f"{f.name}: not a string: {value!r}")
+    return value
+
+
+# version -> function upgrading a document of that version to the next one
+MIGRATIONS = {}
+
+
+def migrateDocument(document):
+    """Upgrade a profile document to PROFILE_VERSION"""
+    version = document.get('version')
+    if not isinstance(version, int) or version < 1:
+        raise ValueError(f"invalid profile version {version!r}")
+    if version > PROFILE_VERSION:
+        raise ValueError(f"profile version {version} is newer than this plugin supports ({PROFILE_VERSION})")
+    while version < PROFILE_VERSION:
+        document = MIGRATIONS[version](dict(document))
+        version = document['version']
+    return document
+
+
+def readProfileFile(path):
+    """Return (name, profile) from a profile file; raises OSError or ValueError"""
+    with open(path, encoding='utf-8') as f:
+        document = json.load(f)
+    return StyleProfile.fromDocument(document)
+
+
+def writeProfileFile(path, profile, name=""):
+    """Write profile to path as a named document, replacing the file atomically"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profile.toDocument(name), f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+class ProfileStore:
+    """Owns the active StyleProfile and rebuilds it only when settings change"""
+    
+    def __init__(self, settings=None):
+        self.settings = settings if settings is not None else QSettings()
+        self._profile = None
+        self._stamp = None
+    
+    def _settingsStamp(self):
+        """Cheap change marker for the backing settings file (None if unknown)"""
+        try:
+            st = os.stat(self.settings.fileName())
+            return (st.st_mtime_ns, st.st_size)
+        except (OSError, TypeError):
+            # Registry backends have no file to stat
+            return None
+    
+    def profile(self):
+        """Return the cached profile, rebuilding it if QSettings changed on disk"""
+        stamp = self._settingsStamp()
+        if self._profile is None or stamp != self._stamp:
+            if self._profile is not None:
+                # Changed outside the plugin; pull the new values from disk
+                self.settings.sync()
+                stamp = self._settingsStamp()
+            profile = StyleProfile.fromSettings(self.settings)
+            if profile is None:
+                return self.migrate()
+            self._profile = profile
+            self._stamp = stamp
+        return self._profile
+    
+    def hasLegacySettings(self):
+        return any(self.settings.contains(f"{SETTINGS_GROUP}/{f.name}") for f in fields(StyleProfile))
+    
+    def migrate(self):
+        """Move the per-key settings of older versions into the profile document"""
+        if not self.hasLegacySettings():
+            return self.save(StyleProfile())
+        profile = StyleProfile.fromLegacySettings(self.settings)
+        for f in fields(StyleProfile):
+            self.settings.remove(f"{SETTINGS_GROUP}/{f.name}")
+        QgsMessageLog.logMessage("Migrated the settings to a single profile document",
+                                 "Auto Style Manager", Qgis.Info)
+        return self.save(profile)
+    
+    def save(self, profile):
+        """Persist a new profile and make it the active one"""
+        profile.writeSettings(self.settings)
+        self.settings.sync()
+        self._profile = profile
+        self._stamp = self._settingsStamp()
+        return profile
+    
+    def exportProfile(self, path, name, profile=None):
+        """Write the active (or given) profile to a named profile file"""
+        writeProfileFile(path, profile or self.profile(), name)
+    
+    def importProfile(self, path):
+        """Read a profile file, make it the active profile and return (name, profile)"""
+        name, profile = readProfileFile(path)
+        return name, self.save(profile)
+    
+    def invalidate(self):
+        """Force the next profile() call to re-read QSettings"""
+        self._profile = None
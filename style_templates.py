@@ -0,0 +1,106 @@
+"""
+Auto Style Manager - style templates
+Prototype symbols and label settings built once per profile and cloned per layer
+"""
+
+from qgis.PyQt.QtCore import Qt
+from qgis.core import (QgsSymbol, QgsMarkerSymbol, QgsLineSymbol, QgsFillSymbol,
+                       QgsWkbTypes, QgsPalLayerSettings, QgsTextFormat,
+                       QgsVectorLayerSimpleLabeling, QgsTextBufferSettings)
+
+from .label_guardrails import applyLabelGuard
+
+
+class StyleTemplates:
+    """Prebuilt symbols and label settings for one StyleProfile"""
+    
+    def __init__(self, profile):
+        self.profile = profile
+        self.symbols = {
+            QgsWkbTypes.PointGeometry: self.buildPointSymbol(),
+            QgsWkbTypes.LineGeometry: self.buildLineSymbol(),
+            QgsWkbTypes.PolygonGeometry: self.buildPolygonSymbol(),
+        }
+        # Cheaper variants for layers in the dense performance tier
+        self.dense_symbols = {
+            QgsWkbTypes.PolygonGeometry: self.buildPolygonSymbol(outline=False),
+        }
+        self.text_format = self.buildTextFormat()
+        self.label_settings = {
+            QgsWkbTypes.PointGeometry: self.buildLabelSettings(QgsPalLayerSettings.AroundPoint),
+            None: self.buildLabelSettings(QgsPalLayerSettings.Horizontal),
+        }
+    
+    def defaultSymbol(self, geom_type, fallback):
+        """Start from the user's default symbol for the geometry type"""
+        symbol = QgsSymbol.defaultSymbol(geom_type)
+        return symbol if symbol is not None else fallback()
+    
+    def buildPointSymbol(self):
+        symbol = self.defaultSymbol(QgsWkbTypes.PointGeometry, QgsMarkerSymbol)
+        symbol.setColor(self.profile.color('point_color'))
+        symbol.setSize(self.profile.point_size)
+        return symbol
+    
+    def buildLineSymbol(self):
+        symbol = self.defaultSymbol(QgsWkbTypes.LineGeometry, QgsLineSymbol)
+        symbol.setColor(self.profile.color('line_color'))
+        if hasattr(symbol, 'setWidth'):
+            symbol.setWidth(self.profile.line_width)
+        return symbol
+    
+    def buildPolygonSymbol(self, outline=True):
+        symbol = self.defaultSymbol(QgsWkbTypes.PolygonGeometry, QgsFillSymbol)
+        symbol.setColor(self.profile.color('polygon_fill'))
+        # Set outline color
+        if symbol.symbolLayerCount() > 0:
+            symbol_layer = symbol.symbolLayer(0)
+            if hasattr(symbol_layer, 'setStrokeColor'):
+                symbol_layer.setStrokeColor(self.profile.color('polygon_stroke'))
+            if hasattr(symbol_layer, 'setStrokeWidth'):
+                symbol_layer.setStrokeWidth(self.profile.polygon_width)
+            if not outline and hasattr(symbol_layer, 'setStrokeStyle'):
+                symbol_layer.setStrokeStyle(Qt.NoPen)
+        return symbol
+    
+    def buildTextFormat(self):
+        text_format = QgsTextFormat()
+        text_format.setSize(self.profile.label_size)
+        text_format.setColor(self.profile.color('label_color'))
+        
+        if self.profile.label_buffer:
+            buffer = QgsTextBufferSettings()
+            buffer.setEnabled(True)
+            buffer.setSize(self.profile.buffer_size)
+            buffer.setColor(self.profile.color('buffer_color'))
+            text_format.setBuffer(buffer)
+        return text_format
+    
+    def buildLabelSettings(self, placement):
+        label_settings = QgsPalLayerSettings()
+        label_settings.enabled = True
+        label_settings.placement = placement
+        label_settings.setFormat(self.text_format)
+        return label_settings
+    
+    def symbol(self, geom_type, dense=False):
+        """Return a fresh copy of the prototype symbol, or None for other geometries
+        
+        dense picks the cheaper variant where one exists.
+        """
+        prototype = self.dense_symbols.get(geom_type) if dense else None
+        if prototype is None:
+            prototype = self.symbols.get(geom_type)
+        return prototype.clone() if prototype is not None else None
+    
+    def labeling(self, geom_type, field_name, guard=None):
+        """Return a simple labeling for field_name copied from the prototype settings
+        
+        guard is an optional LabelGuard limiting the cost of dense layers.
+        """
+        key = geom_type if geom_type == QgsWkbTypes.PointGeometry else None
+        label_settings = QgsPalLayerSettings(self.label_settings[key])
+        label_settings.fieldName = field_name
+        if guard is not None:
+            applyLabelGuard(label_settings, guard)
+        return QgsVectorLayerSimpleLabeling(label_settings)
@@ -0,0 +1,44 @@
+"""
+Auto Style Manager - background task registry
+Running QgsTasks kept alive by key, so the same work is only queued once
+"""
+
+from qgis.core import QgsApplication
+
+
+class TaskRegistry:
+    """key -> running task; a task leaves the registry when it completes or terminates
+    
+    Holding the Python reference is what keeps a QgsTask subclass alive until
+    its finished() has run.
+    """
+    
+    def __init__(self):
+        self.tasks = {}
+    
+    def __contains__(self, key):
+        return key in self.tasks
+    
+    def __len__(self):
+        return len(self.tasks)
+    
+    def get(self, key):
+        return self.tasks.get(key)
+    
+    def start(self, key, task):
+        """Register task under key and hand it to the QGIS task manager"""
+        self.tasks[key] = task
+        task.taskCompleted.connect(lambda: self.discard(key, task))
+        task.taskTerminated.connect(lambda: self.discard(key, task))
+        QgsApplication.taskManager().addTask(task)
+        return task
+    
+    def discard(self, key, task):
+        # A newer task may have taken the key meanwhile
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+    
+    def cancelAll(self):
+        for task in list(self.tasks.values()):
+            task.cancel()
+        self.tasks.clear()
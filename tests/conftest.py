@@ -0,0 +1,21 @@
+"""
+Auto Style Manager tests - shared setup
+Installs the QGIS stand-ins from the benchmarks (unless QGIS is importable)
+and imports the plugin directory as the auto_style_manager package.
+
+Usage (from the plugin directory):
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PLUGIN_DIR not in sys.path:
+    sys.path.insert(0, PLUGIN_DIR)
+
+from benchmarks import fakes  # noqa: E402
+from benchmarks.run import loadPlugin  # noqa: E402
+
+fakes.install()
+loadPlugin()
@@ -0,0 +1,88 @@
+"""
+Auto Style Manager tests - automatic classification
+"""
+
+import random
+
+from auto_style_manager.auto_classify import AutoClassifier, computeClasses, reservoirSample, sampleValues
+from auto_style_manager.style_profile import StyleProfile
+
+
+class Feature:
+    def __init__(self, value):
+        self.value = value
+    
+    def attribute(self, index):
+        return self.value
+
+
+class Fields:
+    def lookupField(self, name):
+        return 0
+
+
+class Source:
+    """Feature source stand-in yielding one attribute per row"""
+    
+    def __init__(self, values):
+        self.values = values
+        self.read = 0
+    
+    def getFeatures(self, request=None):
+        for value in self.values:
+            self.read += 1
+            yield Feature(value)
+
+
+def test_reservoir_covers_every_row():
+    rows = 200000
+    sample = reservoirSample(range(rows), 2000, random.Random(1))
+    assert len(sample) == 2000
+    # Uniform over all rows: about half the sample comes from the second half
+    assert 0.45 < sum(value >= rows // 2 for value in sample) / len(sample) < 0.55
+
+
+def test_scan_skips_nulls_and_stops_when_canceled():
+    source = Source([1.0, None, float('nan'), 2.0] * 10)
+    assert sorted(sampleValues(source, Fields(), 'v', 100, random.Random(0))) == [1.0] * 10 + [2.0] * 10
+    
+    source = Source(range(100000))
+    assert sampleValues(source, Fields(), 'v', 10, random.Random(0), canceled=lambda: True) == []
+    assert source.read == 1
+
+
+def test_categories_keep_the_field_values():
+    profile = StyleProfile()
+    kind, values = computeClasses([2.0, 1.0, 1.0, 3.5], 'categorized', profile)
+    assert kind == 'categorized' and values == [1.0, 2.0, 3.5]
+    assert all(isinstance(value, float) for value in values)
+    assert computeClasses(['b', 2, 'a'], 'categorized', profile)[1] == [2, 'a', 'b']
+    assert computeClasses([], 'categorized', profile) is None
+
+
+def test_graduated_breaks():
+    kind, breaks = computeClasses(list(range(101)), 'graduated', StyleProfile(classify_classes=4))
+    assert kind == 'graduated' and breaks == [0.0, 25.0, 50.0, 75.0, 100.0]
+    assert computeClasses(['x'], 'graduated', StyleProfile()) is None
+
+
+def test_foreground_classes_are_cached():
+    class Layer(Source):
+        def source(self):
+            return 'memory'
+        
+        def subsetString(self):
+            return ''
+        
+        def featureCount(self):
+            return len(self.values)
+        
+        def fields(self):
+            return Fields()
+    
+    layer = Layer([1, 2, 2, 3])
+    classifier = AutoClassifier(background=False)
+    profile = StyleProfile()
+    assert classifier.classes(layer, 'v', 'categorized', profile) == ('categorized', [1, 2, 3])
+    assert classifier.classes(layer, 'v', 'categorized', profile) == ('categorized', [1, 2, 3])
+    assert layer.read == 4
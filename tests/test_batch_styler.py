@@ -0,0 +1,25 @@
+"""
+Auto Style Manager tests - headless batch styler
+"""
+
+from qgis.core import QgsApplication
+
+from auto_style_manager.batch_styler import mergeStretchCaches
+from auto_style_manager.raster_stats import RasterStretcher
+
+
+def test_worker_stretch_caches_are_merged_into_the_shared_one(tmp_path, monkeypatch):
+    monkeypatch.setattr(QgsApplication, 'qgisSettingsDirPath', lambda: str(tmp_path / 'profile'))
+    shared = RasterStretcher().cache
+    shared.put('old', {'1': [0.0, 1.0]})
+    shared.save()
+    workers = tmp_path / 'workers'
+    workers.mkdir()
+    for pid, key in ((101, 'a'), (102, 'b')):
+        cache = RasterStretcher(str(workers / f'stretch_{pid}.json')).cache
+        cache.put(key, {'1': [float(pid), 200.0]})
+        cache.save()
+    
+    mergeStretchCaches(str(workers))
+    assert RasterStretcher().cache.load() == {'old': {'1': [0.0, 1.0]}, 'a': {'1': [101.0, 200.0]},
+                                              'b': {'1': [102.0, 200.0]}}
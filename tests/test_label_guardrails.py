@@ -0,0 +1,68 @@
+"""
+Auto Style Manager tests - label load estimate
+"""
+
+from types import SimpleNamespace
+
+from qgis.core import QgsProject, QgsVectorLayer
+
+from auto_style_manager.dialog import AutoStyleManagerDialog
+from auto_style_manager.layer_styler import LayerStyler
+from auto_style_manager.style_profile import StyleProfile
+
+
+class Store:
+    def __init__(self, profile):
+        self.profile_value = profile
+    
+    def profile(self):
+        return self.profile_value
+
+
+class Provider:
+    def featureCount(self):
+        return 100
+
+
+class View:
+    def setPlainText(self, text):
+        self.lines = text.splitlines()
+
+
+def labelLoad(monkeypatch, profile):
+    """Run the dialog's label load estimate on a project of roads, rivers and points without fields"""
+    for uri, name in (('LineString?field=name:string', 'roads'), ('LineString?field=name:string', 'rivers'),
+                      ('Point?crs=EPSG:4326', 'points')):
+        layer = QgsVectorLayer(uri, name)
+        monkeypatch.setattr(layer, 'dataProvider', Provider)
+        monkeypatch.setitem(QgsProject.instance().layers, layer.id(), layer)
+    dialog = SimpleNamespace(currentProfile=lambda: profile, label_load_view=View(),
+                             plugin=SimpleNamespace(layerStyler=lambda: LayerStyler(Store(profile))))
+    AutoStyleManagerDialog.refreshLabelLoad(dialog)
+    return dialog.label_load_view.lines
+
+
+def test_label_load_with_labels_off_is_titled_as_an_estimate(monkeypatch):
+    lines = labelLoad(monkeypatch, StyleProfile(labels_enabled=False))
+    assert lines[0] == "Labelable layers: 2    Estimated labels: 200"
+    assert "if labels were enabled" in lines[1]
+
+
+def test_label_load_counts_labeled_layers(monkeypatch):
+    lines = labelLoad(monkeypatch, StyleProfile(labels_enabled=True))
+    assert lines[0] == "Labeled layers: 2    Estimated labels: 200"
+    assert sorted(line.split(':')[0] for line in lines[2:]) == ['rivers', 'roads']
+
+
+def test_label_load_counts_layers_a_rule_labels(monkeypatch):
+    rules = "name=rivers* -> labels_enabled=true"
+    lines = labelLoad(monkeypatch, StyleProfile(labels_enabled=False, style_rules=rules))
+    assert lines[0].startswith("Labeled layers: 1 ")
+    assert [line.split(':')[0] for line in lines[2:]] == ['rivers']
+
+
+def test_label_load_skips_layers_a_rule_leaves_unlabeled(monkeypatch):
+    rules = "name=rivers* -> labels_enabled=false"
+    lines = labelLoad(monkeypatch, StyleProfile(labels_enabled=True, style_rules=rules))
+    assert lines[0].startswith("Labeled layers: 1 ")
+    assert [line.split(':')[0] for line in lines[2:]] == ['roads']
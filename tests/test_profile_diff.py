@@ -0,0 +1,82 @@
+"""
+Auto Style Manager tests - incremental re-application
+"""
+
+from dataclasses import fields, replace
+
+from qgis.core import QgsRasterLayer, QgsVectorLayer
+
+from auto_style_manager.layer_styler import LayerStyler
+from auto_style_manager.profile_diff import (ASPECT_ALL, ASPECT_LABEL_FORMAT, ASPECT_OPACITY, FIELD_ASPECTS,
+                                             changedAspects)
+from auto_style_manager.style_profile import StyleProfile
+
+
+class Store:
+    def __init__(self, profile):
+        self.profile_value = profile
+    
+    def profile(self):
+        return self.profile_value
+
+
+def styled(profile):
+    styler = LayerStyler(Store(profile))
+    raster = QgsRasterLayer('/data/a.tif', 'ortho')
+    labelled = QgsVectorLayer('Point?crs=EPSG:4326&field=name:string', 'towns')
+    plain = QgsVectorLayer('Point?crs=EPSG:4326&field=code:integer', 'wells')
+    for layer in (labelled, plain):
+        assert styler.styleVectorLayer(layer, profile, repaint=False)
+    assert styler.styleRasterLayer(layer=raster, profile=profile, repaint=False, basemap=False)
+    return styler, raster, labelled, plain
+
+
+def test_every_field_is_classified():
+    assert {f.name for f in fields(StyleProfile)} == set(FIELD_ASPECTS)
+
+
+def test_changed_aspects():
+    base = StyleProfile()
+    assert changedAspects(base, base) == frozenset()
+    assert changedAspects(base, replace(base, batch_size=10)) == frozenset()
+    assert changedAspects(base, replace(base, opacity=0.2)) == {ASPECT_OPACITY}
+    assert changedAspects(base, replace(base, label_size=14.0, opacity=0.2)) == {ASPECT_OPACITY,
+                                                                                 ASPECT_LABEL_FORMAT}
+    assert changedAspects(base, replace(base, style_rules='name=* -> opacity=0.1')) == {ASPECT_ALL}
+
+
+def test_label_format_change_only_touches_labelled_layers():
+    profile = StyleProfile(labels_enabled=True, label_field='name')
+    styler, raster, labelled, plain = styled(profile)
+    new = replace(profile, label_size=18.0)
+    assert styler.updateLayer(raster, new, repaint=False) is False
+    assert styler.updateLayer(plain, new, repaint=False) is False
+    assert styler.updateLayer(labelled, new, repaint=False) is True
+    assert labelled.labeling().settings().format().size() == 18.0
+    assert all(styler.isStyledWith(layer, new) for layer in (raster, labelled, plain))
+
+
+def test_opacity_change_only_touches_rasters():
+    profile = StyleProfile()
+    styler, raster, labelled, plain = styled(profile)
+    new = replace(profile, opacity=0.25)
+    assert styler.updateLayer(raster, new, repaint=False) is True
+    assert raster.renderer().opacity() == 0.25
+    assert styler.updateLayer(labelled, new, repaint=False) is False
+    assert styler.updateLayer(plain, new, repaint=False) is False
+
+
+def test_structural_or_unknown_changes_need_a_full_restyle():
+    profile = StyleProfile()
+    styler, raster, labelled, plain = styled(profile)
+    assert styler.updateLayer(plain, replace(profile, classify_enabled=True), repaint=False) is None
+    assert styler.updateLayer(raster, replace(profile, auto_stretch=True), repaint=False) is None
+    # Styled before this session: the old profile is unknown
+    assert LayerStyler(Store(profile)).updateLayer(plain, replace(profile, opacity=0.1)) is None
+
+
+def test_saved_but_not_applied_settings_still_diff_against_the_applied_ones():
+    profile = StyleProfile()
+    styler, raster, labelled, plain = styled(profile)
+    styler.profile_store.profile_value = replace(profile, point_size=9.0)  # Saved, then applied
+    assert styler.updateLayer(plain, styler.profile_store.profile(), repaint=False) is True
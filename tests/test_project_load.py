@@ -0,0 +1,53 @@
+"""
+Auto Style Manager tests - layers added while a project is read
+"""
+
+import os
+
+import pytest
+from qgis.PyQt.QtCore import QSettings
+from qgis.core import QgsProject, QgsVectorLayer
+
+from auto_style_manager.auto_style_manager import AutoStyleManager
+from auto_style_manager.style_profile import FINGERPRINT_PROPERTY, ProfileStore
+from benchmarks.fakes import FakeIface
+
+
+@pytest.fixture
+def plugin(tmp_path):
+    plugin = AutoStyleManager(FakeIface())
+    plugin.profile_store = ProfileStore(QSettings(os.path.join(tmp_path, 'settings.ini'), QSettings.IniFormat))
+    plugin.initGui()
+    yield plugin
+    plugin.unload()
+    QgsProject.instance().removeAllMapLayers()
+
+
+def addLayers(plugin, count):
+    layers = [QgsVectorLayer('Point?crs=EPSG:4326&field=name:string', f'points_{i}') for i in range(count)]
+    QgsProject.instance().addMapLayers(layers, False)
+    plugin.onLayersAdded(layers)
+    plugin.flushPendingLayers()
+    return layers
+
+
+def test_layers_of_a_read_are_skipped(plugin):
+    plugin.onLoadingLayer('points')
+    layers = addLayers(plugin, 2)
+    plugin.onProjectRead()
+    assert not any(layer.customProperty(FINGERPRINT_PROPERTY) for layer in layers)
+    assert all(layer.customProperty(FINGERPRINT_PROPERTY) for layer in addLayers(plugin, 2))
+
+
+def test_a_read_without_readProject_ends_at_the_next_event_loop_turn(plugin):
+    plugin.onLoadingLayer('points')  # The read fails: no readProject follows
+    assert plugin.load_timer.isActive()
+    plugin.load_timer.timeout.emit()
+    assert not plugin.project_loading
+    assert all(layer.customProperty(FINGERPRINT_PROPERTY) for layer in addLayers(plugin, 2))
+
+
+def test_readProject_stops_the_timer(plugin):
+    plugin.onLoadingLayer('points')
+    plugin.onProjectRead()
+    assert not plugin.load_timer.isActive()
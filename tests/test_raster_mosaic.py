@@ -0,0 +1,51 @@
+"""
+Auto Style Manager tests - raster tile mosaics
+"""
+
+from qgis.core import QgsRasterLayer
+
+from auto_style_manager import raster_mosaic
+from auto_style_manager.raster_mosaic import groupTiles
+
+
+class Crs:
+    def __init__(self, authid, wkt):
+        self.ids = (authid, wkt)
+    
+    def authid(self):
+        return self.ids[0]
+    
+    def toWkt(self):
+        return self.ids[1]
+
+
+class Provider:
+    def dataType(self, band):
+        return 1
+
+
+class Tile(QgsRasterLayer):
+    def __init__(self, name, crs):
+        super().__init__(f'/tiles/{name}.tif', name)
+        self.tile_crs = crs
+    
+    def crs(self):
+        return self.tile_crs
+    
+    def dataProvider(self):
+        return Provider()
+    
+    def bandCount(self):
+        return 3
+
+
+def test_tiles_group_by_crs_definition(monkeypatch):
+    monkeypatch.setattr(raster_mosaic.RasterStretcher, 'layerPath', staticmethod(lambda layer: layer.source()))
+    utm = [Tile(f'utm_{i}', Crs('EPSG:32633', 'UTM')) for i in range(3)]
+    custom_a = [Tile(f'a_{i}', Crs('', 'PROJCS["local a"]')) for i in range(3)]
+    custom_b = [Tile(f'b_{i}', Crs('', 'PROJCS["local b"]')) for i in range(2)]
+    
+    groups, rest = groupTiles(utm + custom_a + custom_b, 3)
+    assert sorted(len(group) for group in groups) == [3, 3]
+    assert all(len({tile.crs().toWkt() for tile in group}) == 1 for group in groups)
+    assert rest == custom_b
@@ -0,0 +1,98 @@
+"""
+Auto Style Manager tests - raster stretch cache
+"""
+
+import json
+import os
+
+from auto_style_manager.raster_stats import RasterStretcher
+
+
+class Renderer:
+    def __init__(self, kind):
+        self.kind = kind
+        self.enhancements = {}
+    
+    def type(self):
+        return self.kind
+    
+    def grayBand(self):
+        return 1
+    
+    def redBand(self):
+        return 1
+    
+    def greenBand(self):
+        return 2
+    
+    def blueBand(self):
+        return 3
+    
+    def setContrastEnhancement(self, ce):
+        self.enhancements['gray'] = ce
+    
+    def setRedContrastEnhancement(self, ce):
+        self.enhancements['red'] = ce
+    
+    def setGreenContrastEnhancement(self, ce):
+        self.enhancements['green'] = ce
+    
+    def setBlueContrastEnhancement(self, ce):
+        self.enhancements['blue'] = ce
+
+
+class Provider:
+    def dataType(self, band):
+        return 1
+
+
+class Layer:
+    def __init__(self, kind):
+        self.current = Renderer(kind)
+    
+    def renderer(self):
+        return self.current
+    
+    def dataProvider(self):
+        return Provider()
+
+
+def stretcher(tmp_path, computed):
+    raster = tmp_path / 'a.tif'
+    if not raster.exists():
+        raster.write_bytes(b'x')
+    result = RasterStretcher(str(tmp_path / 'cache' / 'stretch.json'))
+    result.layerPath = lambda layer: str(raster)
+    
+    def computeLimits(layer, bands, low, high):
+        computed.append(list(bands))
+        return {band: (float(band), 100.0 + band) for band in bands}
+    
+    result.computeLimits = computeLimits
+    return result
+
+
+def test_only_missing_bands_are_sampled(tmp_path):
+    computed = []
+    stretch = stretcher(tmp_path, computed)
+    assert stretch.stretchLayer(Layer('singlebandgray'), 2, 98)
+    assert stretch.stretchLayer(Layer('multibandcolor'), 2, 98)
+    assert stretch.stretchLayer(Layer('multibandcolor'), 2, 98)
+    assert stretch.stretchLayer(Layer('singlebandgray'), 2, 98)
+    assert computed == [[1], [2, 3]]
+
+
+def test_cache_is_written_on_save_only(tmp_path):
+    stretch = stretcher(tmp_path, [])
+    path = stretch.cache.path
+    for _ in range(3):
+        stretch.stretchLayer(Layer('multibandcolor'), 2, 98)
+    assert not os.path.exists(path)
+    stretch.cache.flush()
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    assert [sorted(limits) for limits in entries.values()] == [['1', '2', '3']]
+    
+    reloaded = stretcher(tmp_path, computed := [])
+    assert reloaded.stretchLayer(Layer('multibandcolor'), 2, 98)
+    assert computed == []
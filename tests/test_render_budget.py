@@ -0,0 +1,101 @@
+"""
+Auto Style Manager tests - render budget
+"""
+
+from qgis.core import QgsApplication, QgsProject, QgsRuntimeProfilerNode, QgsVectorLayer
+
+from auto_style_manager import render_budget
+from auto_style_manager.auto_style_manager import AutoStyleManager
+from auto_style_manager.layer_styler import LayerStyler
+from auto_style_manager.style_profile import StyleProfile
+from benchmarks.fakes import FakeIface
+
+
+class Store:
+    def __init__(self, profile):
+        self.profile_value = profile
+    
+    def profile(self):
+        return self.profile_value
+
+
+class Canvas:
+    def __init__(self, layers):
+        self.current = layers
+    
+    def layers(self):
+        return self.current
+
+
+def test_layers_sharing_a_name_keep_their_own_times(monkeypatch):
+    profile = StyleProfile(render_budget=True, render_budget_ms=100, render_budget_strikes=1)
+    styler = LayerStyler(Store(profile))
+    fast = QgsVectorLayer('Point?crs=EPSG:4326', 'parcels')
+    slow = QgsVectorLayer('Point?crs=EPSG:4326', 'parcels')
+    monkeypatch.setattr(render_budget, 'profilerTimes', lambda: {fast.id(): 0.01, slow.id(): 0.5})
+    adapted = []
+    monkeypatch.setattr(styler.render_budget, 'adapt',
+                        lambda layer, level, profile: adapted.append(layer) or True)
+    
+    assert styler.render_budget.collect(Canvas([fast, slow]), profile) == [slow]
+    assert adapted == [slow]
+    history = styler.render_budget.history
+    assert list(history[fast.id()]) == [10.0] and list(history[slow.id()]) == [500.0]
+
+
+def test_no_times_without_recording(monkeypatch):
+    monkeypatch.setattr(render_budget, 'recordingAvailable', lambda: False)
+    assert render_budget.profilerTimes() is None
+    assert not render_budget.enableRecording(object())
+    assert not render_budget.disableRecording(object())
+
+
+class Topic:
+    def __init__(self, group, topic_id, elapsed, children=()):
+        roles = QgsRuntimeProfilerNode.CustomRole
+        self.values = {roles.Name: topic_id.upper(), roles.Group: group, roles.Elapsed: elapsed,
+                       roles.ParentElapsed: 99.0, roles.Id: topic_id}
+        self.children = list(children)
+
+
+class Profiler:
+    """Model shaped like QgsRuntimeProfiler: one row per topic, values by node role"""
+    
+    def __init__(self, topics):
+        self.root = Topic('', '', 0.0, topics)
+    
+    def node(self, index):
+        return index if isinstance(index, Topic) else self.root
+    
+    def rowCount(self, parent):
+        return len(self.node(parent).children)
+    
+    def index(self, row, column, parent):
+        return self.node(parent).children[row]
+    
+    def data(self, index, role):
+        return index.values.get(role)
+
+
+def test_profiler_times_are_read_by_node_role(monkeypatch):
+    profiler = Profiler([Topic('rendering', 'map', 0.5, [Topic('rendering', 'layer_a', 0.2),
+                                                         Topic('rendering', 'layer_b', 0.3)]),
+                         Topic('startup', 'layer_a', 4.0)])
+    monkeypatch.setattr(render_budget, 'recordingAvailable', lambda: True)
+    monkeypatch.setattr(QgsApplication, 'profiler', lambda: profiler, raising=False)
+    assert render_budget.profilerTimes() == {'map': 0.5, 'layer_a': 0.2, 'layer_b': 0.3}
+
+
+def test_removed_layers_are_forgotten():
+    profile = StyleProfile(render_budget=True, render_budget_ms=100, render_budget_strikes=5)
+    plugin = AutoStyleManager(FakeIface())
+    plugin.initGui()
+    try:
+        layer = QgsVectorLayer('Point?crs=EPSG:4326', 'parcels')
+        budget = plugin.layerStyler().render_budget
+        budget.record(layer, 500.0, profile)
+        assert budget.rows()
+        QgsProject.instance().layersWillBeRemoved.emit([layer.id()])
+        assert not budget.rows() and not budget.strikes and not budget.names
+    finally:
+        plugin.unload()
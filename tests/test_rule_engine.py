@@ -0,0 +1,128 @@
+"""
+Auto Style Manager tests - style rules
+"""
+
+from dataclasses import replace
+
+from qgis.core import QgsProject, QgsRasterLayer, QgsVectorLayer
+
+from auto_style_manager.apply_job import ApplyToExistingJob
+from auto_style_manager.layer_styler import LayerStyler
+from auto_style_manager.rule_engine import LayerKey, RuleEngine, parseRules
+from auto_style_manager.style_profile import FINGERPRINT_PROPERTY, StyleProfile
+
+
+def engine(text):
+    return RuleEngine(text, StyleProfile)
+
+
+def key(name, provider='memory', source='', geometry='line', crs='EPSG:4326'):
+    return LayerKey(name.lower(), provider, source, geometry, crs)
+
+
+def matched(rules, layer_key):
+    mask = rules.matchKey(layer_key)
+    return [rule.line for i, rule in enumerate(rules.rules) if mask & (1 << i)]
+
+
+def test_parse_reports_bad_lines():
+    rules, errors = parseRules("# comment\n"
+                               "name=a -> line_width=2\n"
+                               "name=b line_width=2\n"
+                               "colour=red -> line_width=2\n"
+                               "name=c -> style_rules=x\n"
+                               "name=d -> labels_enabled=maybe\n", StyleProfile)
+    assert [rule.line for rule in rules] == [2]
+    assert rules[0].overrides == (('line_width', 2.0),)
+    assert [error.split(':')[0] for error in errors] == ['line 3', 'line 4', 'line 5', 'line 6']
+
+
+def test_name_patterns():
+    rules = engine("name=roads -> line_width=1\n"
+                   "name=roads_* -> line_width=2\n"
+                   "name=*_river? -> line_width=3\n"
+                   "name=* -> line_width=4\n")
+    assert matched(rules, key('Roads')) == [1, 4]
+    assert matched(rules, key('roads_main')) == [2, 4]
+    assert matched(rules, key('big_rivers')) == [3, 4]
+    assert matched(rules, key('big_river')) == [4]
+
+
+def test_other_conditions():
+    rules = engine("provider=ogr geometry=polygon -> polygon_width=1\n"
+                   "source=/data/parcels/ -> polygon_width=2\n"
+                   "crs=epsg:3857 geometry=raster -> opacity=0.5\n")
+    assert matched(rules, key('a', 'ogr', '/data/x.gpkg', 'polygon')) == [1]
+    assert matched(rules, key('a', 'ogr', '/data/parcels/p.shp', 'polygon')) == [1, 2]
+    assert matched(rules, key('a', 'ogr', '/data/parcels/p.shp', 'line')) == [2]
+    assert matched(rules, key('a', 'gdal', '', 'raster', 'EPSG:3857')) == [3]
+    assert matched(rules, key('a', 'gdal', '', 'raster', 'EPSG:4326')) == []
+
+
+def test_later_rules_win():
+    rules = engine("name=* -> line_color=#111111 line_width=2\n"
+                   "name=roads_* -> line_color=#222222\n")
+    profile = rules.profileFor(QgsVectorLayer('LineString?crs=EPSG:4326', 'roads_a'), StyleProfile())
+    assert (profile.line_color, profile.line_width) == ('#222222', 2.0)
+
+
+def test_variants_do_not_leak_between_base_profiles():
+    rules = engine("name=roads_* -> line_color=#808080\n"
+                   "name=rivers_* -> line_color=#0000ff\n")
+    roads = QgsVectorLayer('LineString?crs=EPSG:4326', 'roads_a')
+    rivers = QgsVectorLayer('LineString?crs=EPSG:4326', 'rivers_a')
+    assert rules.profileFor(roads, StyleProfile()).line_color == '#808080'
+    # A base profile equal to an earlier variant still gets every rule applied
+    base = replace(StyleProfile(), line_color='#808080')
+    assert rules.profileFor(rivers, base).line_color == '#0000ff'
+    assert rules.profileFor(roads, base) is base
+
+
+def test_unmatched_layers_keep_the_base_profile():
+    rules = engine("geometry=raster -> opacity=0.3\n")
+    base = StyleProfile()
+    assert rules.profileFor(QgsVectorLayer('Point?crs=EPSG:4326', 'points'), base) is base
+    assert rules.profileFor(QgsRasterLayer('/data/a.tif', 'a'), base).opacity == 0.3
+
+
+def test_variant_cache_is_bounded():
+    rules = engine("name=* -> line_width=2\n")
+    layer = QgsVectorLayer('LineString?crs=EPSG:4326', 'roads')
+    for i in range(RuleEngine.MAX_VARIANTS + 10):
+        rules.profileFor(layer, replace(StyleProfile(), line_color=f'#{i:06x}'))
+    assert len(rules.variants) == RuleEngine.MAX_VARIANTS
+
+
+class Store:
+    def __init__(self, profile):
+        self.profile_value = profile
+    
+    def profile(self):
+        return self.profile_value
+
+
+class Plugin:
+    def __init__(self, profile):
+        self.styler = LayerStyler(Store(profile))
+    
+    def layerStyler(self):
+        return self.styler
+    
+    def refreshCanvas(self, layers):
+        pass
+
+
+def test_apply_to_existing_uses_the_basemap_settings_of_rule_variants(monkeypatch):
+    profile = StyleProfile(exclude_basemaps=True, style_rules="name=ortho* -> exclude_basemaps=false\n")
+    ortho = QgsRasterLayer('url=https://tiles.example/ortho', 'ortho_2020', 'wms')
+    osm = QgsRasterLayer('url=https://tiles.example/osm', 'osm', 'wms')
+    for layer in (ortho, osm):
+        monkeypatch.setitem(QgsProject.instance().layers, layer.id(), layer)
+    plugin = Plugin(profile)
+    results = []
+    job = ApplyToExistingJob(plugin, profile)
+    job.finished.connect(lambda *counts: results.append(counts))
+    job.start()
+    assert results == [(2, 0, 0, 0, False)]
+    assert ortho.customProperty(FINGERPRINT_PROPERTY) is not None
+    assert osm.customProperty(FINGERPRINT_PROPERTY) is None
@@ -0,0 +1,55 @@
+"""
+Auto Style Manager tests - JSON store and task registry
+"""
+
+from qgis.core import QgsTask
+
+from auto_style_manager.json_store import JsonStore
+from auto_style_manager.task_registry import TaskRegistry
+
+
+def test_json_store_keeps_newest_entries(tmp_path):
+    store = JsonStore(str(tmp_path / 'store' / 'cache.json'), max_entries=2)
+    store.put('a', 1)
+    store.put('b', 2)
+    store.put('a', 3)
+    store.put('c', 4)
+    assert store.load() == {'a': 3, 'c': 4}
+    store.flush()
+    assert not store.dirty
+    assert JsonStore(store.path).load() == {'a': 3, 'c': 4}
+
+
+def test_json_store_unreadable_file_is_empty(tmp_path):
+    path = tmp_path / 'cache.json'
+    path.write_text('{not json', encoding='utf-8')
+    store = JsonStore(str(path))
+    assert store.get('a') is None
+    store.flush()
+    assert path.read_text(encoding='utf-8') == '{not json'
+
+
+class Task(QgsTask):
+    def __init__(self, result):
+        super().__init__('test')
+        self.result = result
+    
+    def run(self):
+        return self.result
+
+
+def test_task_registry_drops_finished_tasks():
+    registry = TaskRegistry()
+    registry.start('done', Task(True))
+    registry.start('failed', Task(False))
+    assert len(registry) == 0
+
+
+def test_task_registry_keeps_newer_task_under_key():
+    registry = TaskRegistry()
+    older, newer = Task(True), Task(True)
+    registry.tasks['key'] = newer
+    registry.discard('key', older)
+    assert registry.get('key') is newer
+    registry.cancelAll()
+    assert newer.isCanceled() and 'key' not in registry
@@ -0,0 +1,79 @@
+"""
+Auto Style Manager tests - spatial index creation
+"""
+
+from qgis.core import QgsFeatureSource, QgsVectorDataProvider
+
+from auto_style_manager import spatial_index
+from auto_style_manager.diagnostics import StylingDiagnostics
+from auto_style_manager.spatial_index import CreateSpatialIndexTask, SpatialIndexBuilder
+from auto_style_manager.style_profile import StyleProfile
+
+
+class Provider:
+    def __init__(self, capabilities, count):
+        self.caps = capabilities
+        self.count = count
+    
+    def capabilities(self):
+        return self.caps
+    
+    def hasSpatialIndex(self):
+        return QgsFeatureSource.SpatialIndexNotPresent
+    
+    def featureCount(self):
+        return self.count
+
+
+class Layer:
+    def __init__(self, name, path, capabilities, count=100000):
+        self.layer_name = name
+        self.path = path
+        self.provider = Provider(capabilities, count)
+    
+    def id(self):
+        return self.layer_name + '_id'
+    
+    def name(self):
+        return self.layer_name
+    
+    def source(self):
+        return str(self.path)
+    
+    def providerType(self):
+        return 'ogr'
+    
+    def dataProvider(self):
+        return self.provider
+
+
+class Registry:
+    @staticmethod
+    def instance():
+        return Registry()
+    
+    def decodeUri(self, provider, source):
+        return {'path': source}
+
+
+def test_index_outcomes_are_summarised(tmp_path, monkeypatch):
+    monkeypatch.setattr(spatial_index, 'QgsProviderRegistry', Registry)
+    monkeypatch.setattr(CreateSpatialIndexTask, 'run', lambda task: task.name != 'broken')
+    for name in ('roads.shp', 'broken.shp', 'parcels.geojson'):
+        (tmp_path / name).write_bytes(b'x')
+    builder = SpatialIndexBuilder(StylingDiagnostics())
+    reported = []
+    builder.on_result = lambda name, outcome: reported.append((name, outcome))
+    profile = StyleProfile(index_threshold=1000)
+    layers = [Layer('roads', tmp_path / 'roads.shp', QgsVectorDataProvider.CreateSpatialIndex),
+              Layer('broken', tmp_path / 'broken.shp', QgsVectorDataProvider.CreateSpatialIndex),
+              Layer('parcels', tmp_path / 'parcels.geojson', 0),
+              Layer('small', tmp_path / 'roads.shp', QgsVectorDataProvider.CreateSpatialIndex, count=10)]
+    
+    for layer in layers:
+        builder.maybeBuild(layer, profile)
+    assert reported == [('roads', 'created'), ('broken', 'failed')]
+    assert builder.summaryLines([layer.id() for layer in layers]) == [
+        "1 spatial index(es) created", "1 spatial index(es) failed",
+        "No spatial index, the provider cannot create one: parcels"]
+    assert builder.summaryLines([layers[-1].id()]) == []
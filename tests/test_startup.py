@@ -0,0 +1,27 @@
+"""
+Auto Style Manager tests - startup
+"""
+
+import json
+import subprocess
+import sys
+
+from benchmarks.run import PLUGIN_DIR
+
+# Runs in a fresh interpreter: the other tests have already imported the styler
+CHILD = """
+import json, sys
+from benchmarks import fakes, run
+fakes.install()
+run.loadPlugin()
+plugin = sys.modules[run.PACKAGE_NAME].classFactory(run.benchIface())
+plugin.initGui()
+names = [run.PACKAGE_NAME + '.layer_styler', run.PACKAGE_NAME + '.dialog', 'numpy']
+print(json.dumps([name for name in names if name in sys.modules]))
+"""
+
+
+def test_startup_loads_only_the_bootstrap():
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=PLUGIN_DIR,
+                            check=True, capture_output=True, text=True).stdout
+    assert json.loads(output.strip().splitlines()[-1]) == []
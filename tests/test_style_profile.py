@@ -0,0 +1,120 @@
+"""
+Auto Style Manager tests - profile document storage
+"""
+
+import json
+import os
+from dataclasses import replace
+
+import pytest
+
+from auto_style_manager.style_profile import (PROFILE_FORMAT, PROFILE_KEY, PROFILE_VERSION, SETTINGS_GROUP,
+                                              ProfileStore, StyleProfile)
+
+
+class FileSettings:
+    """QSettings over a file: values are kept as INI strings and re-read on sync()"""
+    
+    def __init__(self, path):
+        self.path = str(path)
+        self.sync()
+    
+    def fileName(self):
+        return self.path
+    
+    def value(self, key, default=None, type=None):
+        if key not in self.values:
+            return default
+        value = self.values[key]
+        if type is bool:
+            return value == 'true'
+        return type(value) if type is not None else value
+    
+    def setValue(self, key, value):
+        self.values[key] = ('true' if value else 'false') if isinstance(value, bool) else str(value)
+        self.write()
+    
+    def contains(self, key):
+        return key in self.values
+    
+    def remove(self, key):
+        self.values.pop(key, None)
+        self.write()
+    
+    def write(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.values, f)
+    
+    def sync(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.values = json.load(f)
+        except OSError:
+            self.values = {}
+
+
+def document(**changes):
+    return dict({'format': PROFILE_FORMAT, 'version': PROFILE_VERSION, 'name': 'test', 'profile': {}},
+                **changes)
+
+
+def test_legacy_keys_are_migrated_into_one_document(tmp_path):
+    settings = FileSettings(tmp_path / 'settings.json')
+    settings.setValue(f"{SETTINGS_GROUP}/opacity", 0.4)
+    settings.setValue(f"{SETTINGS_GROUP}/labels_enabled", True)
+    settings.setValue(f"{SETTINGS_GROUP}/label_field", "name")
+    settings.setValue(f"{SETTINGS_GROUP}/overview_threshold", 32)
+    
+    profile = ProfileStore(settings).profile()
+    assert (profile.opacity, profile.labels_enabled, profile.label_field, profile.overview_threshold) == (
+        0.4, True, "name", 32)
+    assert list(settings.values) == [PROFILE_KEY]
+    # The migrated document is what the next session reads
+    assert ProfileStore(FileSettings(settings.path)).profile() == profile
+
+
+def test_newer_or_badly_typed_documents_are_rejected():
+    with pytest.raises(ValueError, match="newer"):
+        StyleProfile.fromDocument(document(version=PROFILE_VERSION + 1))
+    with pytest.raises(ValueError):
+        StyleProfile.fromDocument(document(version="1"))
+    with pytest.raises(ValueError):
+        StyleProfile.fromDocument(document(format="something-else"))
+    for values in ({'opacity': 'high'}, {'labels_enabled': 1}, {'label_field': 3}, {'batch_size': [10]}):
+        with pytest.raises(ValueError):
+            StyleProfile.fromDocument(document(profile=values))
+    assert StyleProfile.fromDocument(document(profile={'unknown': 1, 'batch_size': 10.0}))[1].batch_size == 10
+
+
+def test_unreadable_stored_document_falls_back_to_defaults(tmp_path):
+    settings = FileSettings(tmp_path / 'settings.json')
+    settings.setValue(PROFILE_KEY, json.dumps(document(profile={'opacity': 'high'})))
+    assert ProfileStore(settings).profile() == StyleProfile()
+
+
+def test_export_import_round_trip(tmp_path):
+    profile = replace(StyleProfile(), opacity=0.25, label_field="name", style_rules="name=a* -> line_width=2")
+    source = ProfileStore(FileSettings(tmp_path / 'a.json'))
+    source.save(profile)
+    path = str(tmp_path / 'fleet.json')
+    source.exportProfile(path, "fleet")
+    
+    target = ProfileStore(FileSettings(tmp_path / 'b.json'))
+    name, imported = target.importProfile(path)
+    assert (name, imported) == ("fleet", profile)
+    assert target.profile() == profile
+    assert ProfileStore(FileSettings(tmp_path / 'b.json')).profile() == profile
+
+
+def test_profile_is_rebuilt_when_the_settings_file_changes(tmp_path):
+    path = tmp_path / 'settings.json'
+    store = ProfileStore(FileSettings(path))
+    first = store.save(StyleProfile())
+    assert store.profile() is first
+    
+    # Another QGIS instance saves a new profile
+    replace(first, opacity=0.1).writeSettings(FileSettings(path))
+    stamp = os.stat(path).st_mtime_ns + 1000000000
+    os.utime(path, ns=(stamp, stamp))
+    assert store.profile().opacity == 0.1
+    assert store.profile() is store.profile()
@@ -0,0 +1,92 @@
+"""
+Auto Style Manager tests - local vector cache
+"""
+
+from xml.dom import minidom
+
+from qgis.core import QgsProject, QgsVectorLayer
+
+from auto_style_manager.auto_style_manager import AutoStyleManager
+from auto_style_manager.vector_cache import ORIGINAL_PROVIDER_PROPERTY, ORIGINAL_SOURCE_PROPERTY
+from benchmarks.fakes import FakeIface
+
+
+class Node:
+    """The QDomNode/QDomElement calls the project hook makes, over minidom"""
+    
+    def __init__(self, node):
+        self.node = node
+    
+    def firstChildElement(self, name):
+        return Node(next(child for child in self.node.childNodes if child.nodeName == name))
+    
+    def hasChildNodes(self):
+        return self.node.hasChildNodes()
+    
+    def firstChild(self):
+        return Node(self.node.firstChild)
+    
+    def removeChild(self, child):
+        self.node.removeChild(child.node)
+    
+    def appendChild(self, child):
+        self.node.appendChild(child.node)
+    
+    def parentNode(self):
+        return Node(self.node.parentNode)
+    
+    def toElement(self):
+        return self
+    
+    def attribute(self, name):
+        return self.node.getAttribute(name)
+    
+    def elementsByTagName(self, name):
+        return NodeList(self.node.getElementsByTagName(name))
+
+
+class NodeList:
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+    
+    def count(self):
+        return len(self.nodes)
+    
+    def at(self, i):
+        return Node(self.nodes[i])
+
+
+class Document:
+    def __init__(self, document):
+        self.document = document
+    
+    def createTextNode(self, text):
+        return Node(self.document.createTextNode(text))
+
+
+LAYER_XML = f"""<maplayer><datasource>/cache/abc_1.gpkg|layername=data</datasource>
+<provider encoding="UTF-8">ogr</provider><customproperties><Option type="Map">
+<Option name="{ORIGINAL_SOURCE_PROPERTY}" type="QString" value="/data/parcels.geojson"/>
+<Option name="{ORIGINAL_PROVIDER_PROPERTY}" type="QString" value="ogr"/>
+<Option name="other" type="QString" value="kept"/></Option></customproperties></maplayer>"""
+
+
+def test_saved_projects_keep_the_original_source():
+    plugin = AutoStyleManager(FakeIface())
+    plugin.initGui()
+    try:
+        document = minidom.parseString(LAYER_XML)
+        element = document.documentElement
+        layer = QgsVectorLayer('/cache/abc_1.gpkg|layername=data', 'parcels', 'ogr')
+        layer.setCustomProperty(ORIGINAL_SOURCE_PROPERTY, '/data/parcels.geojson')
+        layer.setCustomProperty(ORIGINAL_PROVIDER_PROPERTY, 'ogr')
+        QgsProject.instance().writeMapLayer.emit(layer, Node(element), Document(document))
+        
+        text = element.toxml()
+        assert '<datasource>/data/parcels.geojson</datasource>' in text
+        assert ORIGINAL_SOURCE_PROPERTY not in text and ORIGINAL_PROVIDER_PROPERTY not in text
+        assert 'name="other"' in text
+        # The open project keeps reading the cached copy
+        assert layer.source() == '/cache/abc_1.gpkg|layername=data'
+    finally:
+        plugin.unload()
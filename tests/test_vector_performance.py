@@ -0,0 +1,129 @@
+"""
+Auto Style Manager tests - vector performance tiers
+"""
+
+from dataclasses import replace
+
+from qgis.core import QgsWkbTypes
+
+from auto_style_manager.style_profile import StyleProfile
+from auto_style_manager.vector_performance import (TIER_DENSE, TIER_HEAVY, TIER_NORMAL, TIER_PROPERTY,
+                                                   applyPerformance, layerTier)
+
+
+class SimplifyMethod:
+    def simplifyHints(self):
+        return 0
+    
+    def threshold(self):
+        return 1.0
+    
+    def forceLocalOptimization(self):
+        return False
+
+
+class Layer:
+    """Just the simplification, scale range and property API the tiers use"""
+    
+    def __init__(self):
+        self.properties = {}
+        self.method = SimplifyMethod()
+        self.scale_visibility = False
+        self.min_scale = 0.0
+        self.max_scale = 0.0
+    
+    def geometryType(self):
+        return QgsWkbTypes.PolygonGeometry
+    
+    def customProperty(self, key, default=None):
+        return self.properties.get(key, default)
+    
+    def setCustomProperty(self, key, value):
+        self.properties[key] = value
+    
+    def removeCustomProperty(self, key):
+        self.properties.pop(key, None)
+    
+    def simplifyMethod(self):
+        return self.method
+    
+    def setSimplifyMethod(self, method):
+        self.method = method
+    
+    def hasScaleBasedVisibility(self):
+        return self.scale_visibility
+    
+    def setScaleBasedVisibility(self, visible):
+        self.scale_visibility = visible
+    
+    def minimumScale(self):
+        return self.min_scale
+    
+    def setMinimumScale(self, scale):
+        self.min_scale = scale
+    
+    def maximumScale(self):
+        return self.max_scale
+    
+    def setMaximumScale(self, scale):
+        self.max_scale = scale
+
+
+def test_tiers():
+    profile = StyleProfile(heavy_features=100, dense_features=1000)
+    assert layerTier(-1, profile) == TIER_NORMAL
+    assert layerTier(99, profile) == TIER_NORMAL
+    assert layerTier(100, profile) == TIER_HEAVY
+    assert layerTier(5000, profile) == TIER_DENSE
+
+
+def test_dropping_back_to_normal_restores_the_scale_range():
+    profile = StyleProfile()
+    layer = Layer()
+    layer.setMinimumScale(5000000.0)
+    assert applyPerformance(layer, TIER_HEAVY, profile)
+    assert layer.hasScaleBasedVisibility() and layer.minimumScale() == profile.heavy_min_scale
+    assert applyPerformance(layer, TIER_DENSE, profile)
+    assert layer.minimumScale() == profile.dense_min_scale
+    
+    assert not applyPerformance(layer, TIER_NORMAL, profile)
+    assert not layer.hasScaleBasedVisibility()
+    assert layer.minimumScale() == 5000000.0
+    assert layer.simplifyMethod() is not None and TIER_PROPERTY not in layer.properties
+
+
+def test_a_tier_without_a_limit_clears_the_previous_one():
+    profile = StyleProfile(heavy_min_scale=0)
+    layer = Layer()
+    assert applyPerformance(layer, TIER_DENSE, profile)
+    assert layer.hasScaleBasedVisibility() and layer.minimumScale() == profile.dense_min_scale
+    assert applyPerformance(layer, TIER_HEAVY, profile)
+    assert not layer.hasScaleBasedVisibility() and layer.minimumScale() == 0.0
+
+
+def test_switching_a_limit_off_restores_the_user_scale_range():
+    profile = StyleProfile()
+    layer = Layer()
+    layer.setScaleBasedVisibility(True)
+    layer.setMinimumScale(5000000.0)
+    layer.setMaximumScale(1000.0)
+    assert applyPerformance(layer, TIER_DENSE, profile)
+    assert layer.minimumScale() == profile.dense_min_scale and layer.maximumScale() == 1000.0
+    assert applyPerformance(layer, TIER_DENSE, replace(profile, dense_min_scale=0))
+    assert (layer.hasScaleBasedVisibility(), layer.minimumScale(), layer.maximumScale()) == (True, 5000000.0,
+                                                                                            1000.0)
+
+
+def test_stricter_user_limits_are_kept():
+    layer = Layer()
+    layer.setScaleBasedVisibility(True)
+    layer.setMinimumScale(10000.0)
+    assert applyPerformance(layer, TIER_DENSE, StyleProfile())
+    assert layer.minimumScale() == 10000.0
+
+
+def test_untiered_layers_are_left_alone():
+    layer = Layer()
+    assert not applyPerformance(layer, TIER_NORMAL, StyleProfile())
+    assert isinstance(layer.simplifyMethod(), SimplifyMethod)
+    assert layer.properties == {}
@@ -0,0 +1,333 @@
+"""
+Auto Style Manager - local vector cache
+Background copies of slow vector sources into indexed GeoPackages, with size-bounded LRU eviction
+"""
+
+import hashlib
+import os
+import time
+from qgis.core import (Qgis, QgsApplication, QgsDataProvider, QgsMessageLog, QgsProject, QgsProviderRegistry,
+                       QgsTask, QgsVectorFileWriter, QgsVectorLayer)
+
+from .json_store import JsonStore
+from .task_registry import TaskRegistry
+
+
+# File formats that are re-parsed on every read
+SLOW_EXTENSIONS = frozenset(['.geojson', '.json', '.csv', '.tsv', '.kml', '.kmz', '.gml', '.gpx'])
+
+# Layer custom property holding the source a cached layer was copied from
+ORIGINAL_SOURCE_PROPERTY = "AutoStyleManager/original_source"
+ORIGINAL_PROVIDER_PROPERTY = "AutoStyleManager/original_provider"
+
+# Separates a cache key from the file name of a replaced copy kept in the index
+STALE_SEPARATOR = "@"
+
+# Table name inside every cache GeoPackage
+CACHE_TABLE = "data"
+
+HEAD_TIMEOUT = 10
+
+
+def cacheSource(layer, min_mb):
+    """Return (location, remote) for a layer worth caching, or None
+    
+    location is a local file of a slow format over min_mb megabytes, or the URL
+    of a remote source (WFS, or a file read over HTTP).
+    """
+    provider = layer.providerType()
+    if provider not in ('ogr', 'delimitedtext', 'WFS'):
+        return None
+    parts = QgsProviderRegistry.instance().decodeUri(provider, layer.source())
+    if provider == 'WFS':
+        url = parts.get('url')
+        return (url, True) if url else None
+    path = parts.get('path') or ''
+    if path.startswith(('http://', 'https://', '/vsicurl/')):
+        return path.replace('/vsicurl/', '', 1), True
+    if os.path.splitext(path)[1].lower() not in SLOW_EXTENSIONS:
+        return None
+    try:
+        if os.path.getsize(path) < min_mb * 1024 * 1024:
+            return None
+    except OSError:
+        return None
+    return path, False
+
+
+def setElementText(document, element, text):
+    while element.hasChildNodes():
+        element.removeChild(element.firstChild())
+    element.appendChild(document.createTextNode(text))
+
+
+def writeOriginalSource(layer, element, document):
+    """Save a cached layer into a project file with its original source
+    
+    Connected to QgsProject.writeMapLayer: the cache file may be evicted in a
+    later session, the original source is what the project should keep.
+    """
+    source = layer.customProperty(ORIGINAL_SOURCE_PROPERTY)
+    if not source:
+        return False
+    provider = layer.customProperty(ORIGINAL_PROVIDER_PROPERTY) or 'ogr'
+    setElementText(document, element.firstChildElement('datasource'), source)
+    setElementText(document, element.firstChildElement('provider'), provider)
+    # Reopened, the layer reads the original source and may be cached again
+    properties = element.firstChildElement('customproperties')
+    nodes = []
+    for tag in ('Option', 'property'):
+        found = properties.elementsByTagName(tag)
+        nodes.extend(found.at(i).toElement() for i in range(found.count()))
+    for node in nodes:
+        if (node.attribute('name') or node.attribute('key')) in (ORIGINAL_SOURCE_PROPERTY,
+                                                                 ORIGINAL_PROVIDER_PROPERTY):
+            node.parentNode().removeChild(node)
+    return True
+
+
+def fileVersion(path):
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def urlVersion(url):
+    """ETag (or Last-Modified) of a URL from a HEAD request, '' if the server gives neither"""
+    import urllib.request
+    request = urllib.request.Request(url, method='HEAD')
+    try:
+        with urllib.request.urlopen(request, timeout=HEAD_TIMEOUT) as response:
+            return response.headers.get('ETag') or response.headers.get('Last-Modified') or ''
+    except (OSError, ValueError):
+        return ''
+
+
+class CacheVectorTask(QgsTask):
+    """Copy a vector source into a GeoPackage with a spatial index, unless the cached copy is current"""
+    
+    def __init__(self, cache, layer_id, key, source, provider, location, remote, version, force):
+        super().__init__(f"Auto Style Manager: caching {os.path.basename(location) or location}",
+                         QgsTask.CanCancel)
+        self.cache = cache
+        # Every layer reading this source; later layers join while the copy runs
+        self.layer_ids = {layer_id}
+        self.key = key
+        self.source = source
+        self.provider = provider
+        self.location = location
+        self.remote = remote
+        self.version = version
+        self.force = force
+        self.entry = cache.index.load().get(key)
+        self.transform_context = QgsProject.instance().transformContext()
+        self.path = None
+        self.copied = False
+        self.error = None
+    
+    def run(self):
+        if self.remote:
+            self.version = urlVersion(self.location)
+        entry = self.entry
+        if (not self.force and entry and entry['version'] == self.version
+                and os.path.isfile(entry['path'])):
+            self.path = entry['path']
+            return True
+        
+        # A forced refresh gets a new file so the one in use is never overwritten
+        path = self.cache.cachePath(self.key, f"{self.version}|{time.time()}" if self.force else self.version)
+        tmp_path = path[:-len('.gpkg')] + '.tmp.gpkg'
+        # Layers may be created off the main thread as long as they never join a project
+        layer = QgsVectorLayer(self.source, 'cache', self.provider)
+        if not layer.isValid():
+            self.error = "could not open the source"
+            return False
+        
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = 'GPKG'
+        options.layerName = CACHE_TABLE
+        options.layerOptions = ['SPATIAL_INDEX=YES']
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        result = QgsVectorFileWriter.writeAsVectorFormatV3(layer, tmp_path, self.transform_context, options)
+        if result[0] != QgsVectorFileWriter.NoError:
+            self.error = result[1] or "the GeoPackage could not be written"
+            return False
+        if self.isCanceled():
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+        self.path = path
+        self.copied = True
+        return True
+    
+    def finished(self, result):
+        diagnostics = self.cache.diagnostics
+        if not result:
+            if self.isCanceled():
+                diagnostics.count('vector cache cancelled')
+            else:
+                diagnostics.count('vector cache failed')
+                QgsMessageLog.logMessage(f"Could not cache {self.location}: {self.error}",
+                                         "Auto Style Manager", Qgis.Warning)
+            return
+        diagnostics.count('vector cache copied' if self.copied else 'vector cache hit')
+        project = QgsProject.instance()
+        layers = [project.mapLayer(layer_id) for layer_id in self.layer_ids]
+        # Layers already served from an older copy of the source move to the new one
+        layers += [layer for layer in project.mapLayers().values()
+                   if layer.customProperty(ORIGINAL_SOURCE_PROPERTY) == self.source
+                   and layer.id() not in self.layer_ids]
+        for layer in layers:
+            if layer is not None and not layer.source().startswith(self.path):
+                self.cache.swap(layer, self.path)
+        # After the swaps, so a replaced copy is no longer in use when it is deleted
+        self.cache.record(self.key, self.path, self.source, self.provider, self.version)
+
+
+class VectorCache:
+    """Manage the cache directory, its index and the copy tasks"""
+    
+    def __init__(self, diagnostics, cache_dir=None):
+        self.diagnostics = diagnostics
+        if cache_dir is None:
+            cache_dir = os.path.join(QgsApplication.qgisSettingsDirPath(), 'auto_style_manager', 'vector_cache')
+        self.cache_dir = cache_dir
+        # cache key -> path, source, version, size and last use
+        self.index = JsonStore(os.path.join(cache_dir, 'index.json'))
+        self.max_bytes = None
+        # cache key -> running task, so a source is only copied by one task at a time
+        self.tasks = TaskRegistry()
+    
+    @staticmethod
+    def cacheKey(provider, source):
+        return hashlib.sha1(f"{provider}|{source}".encode()).hexdigest()[:16]
+    
+    def cachePath(self, key, version):
+        suffix = hashlib.sha1(version.encode()).hexdigest()[:8]
+        return os.path.join(self.cache_dir, f"{key}_{suffix}.gpkg")
+    
+    def maybeCache(self, layers, profile):
+        """Start a cache task for every qualifying vector layer; return how many were queued"""
+        self.max_bytes = profile.cache_max_mb * 1024 * 1024
+        queued = 0
+        for layer in layers:
+            if not isinstance(layer, QgsVectorLayer) or not layer.isValid():
+                continue
+            if layer.customProperty(ORIGINAL_SOURCE_PROPERTY):
+                continue  # Already served from the cache
+            target = cacheSource(layer, profile.cache_min_mb)
+            if target is not None and self.start(layer, layer.source(), layer.providerType(), *target):
+                queued += 1
+        return queued
+    
+    def start(self, layer, source, provider, location, remote, force=False):
+        key = self.cacheKey(provider, source)
+        running = self.tasks.get(key)
+        if running is not None:
+            # Same source already being copied: switch this layer too when it is done
+            running.layer_ids.add(layer.id())
+            return True
+        try:
+            version = '' if remote else fileVersion(location)
+        except OSError:
+            return False
+        self.diagnostics.count('vector cache started')
+        self.tasks.start(key, CacheVectorTask(self, layer.id(), key, source, provider, location, remote,
+                                              version, force))
+        return True
+    
+    def record(self, key, path, source, provider, version):
+        """Store an entry as most recently used, drop its stale versions, then evict
+        
+        A replaced copy that a layer still reads is kept as a stale entry until a
+        later record() or evict() finds it unused.
+        """
+        entries = self.index.load()
+        old = entries.get(key)
+        if old and old['path'] != path:
+            entries[f"{key}{STALE_SEPARATOR}{os.path.basename(old['path'])}"] = old
+        # Replaced copies go as soon as no layer reads them any more
+        for stale in [k for k in entries if STALE_SEPARATOR in k]:
+            if not self.inUse(entries[stale]['path']):
+                self.removeFile(entries.pop(stale)['path'])
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        entries[key] = {'path': path, 'source': source, 'provider': provider, 'version': version,
+                        'size': size, 'used': time.time()}
+        self.evict(keep=key)
+        self.index.save()
+    
+    def evict(self, keep=None):
+        """Remove least recently used copies until the cache fits in max_bytes"""
+        if self.max_bytes is None:
+            return
+        entries = self.index.entries
+        total = sum(entry['size'] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['used']):
+            if total <= self.max_bytes:
+                break
+            if key == keep or self.inUse(entries[key]['path']):
+                continue
+            total -= entries[key]['size']
+            self.removeFile(entries.pop(key)['path'])
+            self.diagnostics.count('vector cache evicted')
+    
+    @staticmethod
+    def inUse(path):
+        """True if a project layer reads from this cache file"""
+        for layer in QgsProject.instance().mapLayers().values():
+            if layer.customProperty(ORIGINAL_SOURCE_PROPERTY) and layer.source().startswith(path):
+                return True
+        return False
+    
+    @staticmethod
+    def removeFile(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def swap(self, layer, path):
+        """Point layer at its cached copy, keeping its style and subset"""
+        if not layer.customProperty(ORIGINAL_SOURCE_PROPERTY):
+            layer.setCustomProperty(ORIGINAL_SOURCE_PROPERTY, layer.source())
+            layer.setCustomProperty(ORIGINAL_PROVIDER_PROPERTY, layer.providerType())
+        subset = layer.subsetString()
+        layer.setDataSource(f"{path}|layername={CACHE_TABLE}", layer.name(), 'ogr',
+                            QgsDataProvider.ProviderOptions())
+        if subset:
+            layer.setSubsetString(subset)
+        layer.triggerRepaint()
+    
+    def restore(self, layer):
+        """Point a cached layer back at its original source; True if it was cached"""
+        source = layer.customProperty(ORIGINAL_SOURCE_PROPERTY)
+        if not source:
+            return False
+        provider = layer.customProperty(ORIGINAL_PROVIDER_PROPERTY) or 'ogr'
+        layer.setDataSource(source, layer.name(), provider, QgsDataProvider.ProviderOptions())
+        layer.removeCustomProperty(ORIGINAL_SOURCE_PROPERTY)
+        layer.removeCustomProperty(ORIGINAL_PROVIDER_PROPERTY)
+        layer.triggerRepaint()
+        return True
+    
+    def refresh(self, layer, profile):
+        """Re-copy a cached layer from its original source; True if a task was started"""
+        source = layer.customProperty(ORIGINAL_SOURCE_PROPERTY)
+        if not source:
+            return False
+        provider = layer.customProperty(ORIGINAL_PROVIDER_PROPERTY) or 'ogr'
+        self.max_bytes = profile.cache_max_mb * 1024 * 1024
+        parts = QgsProviderRegistry.instance().decodeUri(provider, source)
+        location = parts.get('url') or parts.get('path') or source
+        remote = location.startswith(('http://', 'https://', '/vsicurl/'))
+        return self.start(layer, source, provider, location.replace('/vsicurl/', '', 1), remote, force=True)
+    
+    def usage(self):
+        """Return (entries, bytes) currently in the cache"""
+        entries = self.index.load()
+        return len(entries), sum(entry['size'] for entry in entries.values())
+    
+    def cancelAll(self):
+        self.tasks.cancelAll()
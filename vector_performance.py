@@ -0,0 +1,106 @@
+"""
+Auto Style Manager - vector performance profile
+Feature-count tiers deciding simplification, scale range and symbol cost
+"""
+
+from qgis.core import QgsVectorSimplifyMethod, QgsWkbTypes
+
+
+TIER_NORMAL = 'normal'
+TIER_HEAVY = 'heavy'
+TIER_DENSE = 'dense'
+
+# Layer custom properties: the tier applied, and the settings it replaced
+TIER_PROPERTY = "AutoStyleManager/performance_tier"
+ORIGINAL_PROPERTY = "AutoStyleManager/performance_original"
+
+
+def featureCount(layer):
+    """Return the provider's (possibly estimated) feature count, -1 when unknown"""
+    try:
+        provider = layer.dataProvider()
+        count = provider.featureCount() if provider else layer.featureCount()
+    except Exception:
+        return -1
+    return count if count is not None and count >= 0 else -1
+
+
+def layerTier(count, profile):
+    """Map a feature count to TIER_NORMAL, TIER_HEAVY or TIER_DENSE"""
+    if count < 0:
+        return TIER_NORMAL  # Unknown counts are not worth guessing about
+    if count >= profile.dense_features:
+        return TIER_DENSE
+    if count >= profile.heavy_features:
+        return TIER_HEAVY
+    return TIER_NORMAL
+
+
+def saveOriginal(layer):
+    """Store the simplification and scale range a tier is about to replace"""
+    method = layer.simplifyMethod()
+    layer.setCustomProperty(ORIGINAL_PROPERTY, [
+        int(method.simplifyHints()), method.threshold(), method.forceLocalOptimization(),
+        layer.hasScaleBasedVisibility(), layer.minimumScale(), layer.maximumScale()])
+
+
+def restoreScaleRange(layer):
+    """Put back the scale range saved before the first tier"""
+    original = layer.customProperty(ORIGINAL_PROPERTY)
+    if original:
+        _hints, _threshold, _local, visible, min_scale, max_scale = original
+        layer.setMinimumScale(float(min_scale))
+        layer.setMaximumScale(float(max_scale))
+        layer.setScaleBasedVisibility(bool(visible))
+
+
+def resetPerformance(layer):
+    """Undo applyPerformance on a layer back in TIER_NORMAL; True if it had a tier"""
+    if not layer.customProperty(TIER_PROPERTY):
+        return False
+    original = layer.customProperty(ORIGINAL_PROPERTY)
+    if original:
+        hints, threshold, local = original[:3]
+        method = QgsVectorSimplifyMethod()
+        method.setSimplifyHints(QgsVectorSimplifyMethod.SimplifyHints(int(hints)))
+        method.setThreshold(float(threshold))
+        method.setForceLocalOptimization(bool(local))
+        layer.setSimplifyMethod(method)
+        restoreScaleRange(layer)
+    layer.removeCustomProperty(TIER_PROPERTY)
+    layer.removeCustomProperty(ORIGINAL_PROPERTY)
+    return True
+
+
+def applyPerformance(layer, tier, profile):
+    """Set render simplification and a zoomed-out scale limit for heavy layers
+    
+    Layers dropping back to TIER_NORMAL get the settings from before their
+    first tier back. A new tier starts from the user's own scale range, and a
+    stricter limit the user set is kept.
+    """
+    if tier == TIER_NORMAL:
+        resetPerformance(layer)
+        return False
+    
+    if layer.customProperty(TIER_PROPERTY):
+        restoreScaleRange(layer)
+    else:
+        saveOriginal(layer)
+    layer.setCustomProperty(TIER_PROPERTY, tier)
+    
+    if layer.geometryType() in (QgsWkbTypes.LineGeometry, QgsWkbTypes.PolygonGeometry):
+        method = QgsVectorSimplifyMethod()
+        method.setSimplifyHints(QgsVectorSimplifyMethod.GeometrySimplification |
+                                QgsVectorSimplifyMethod.AntialiasingSimplification)
+        method.setThreshold(profile.simplify_threshold)
+        method.setForceLocalOptimization(True)
+        layer.setSimplifyMethod(method)
+    
+    min_scale = profile.dense_min_scale if tier == TIER_DENSE else profile.heavy_min_scale
+    # QGIS "minimum" scale is the most zoomed-out denominator shown
+    user_limit = layer.minimumScale() if layer.hasScaleBasedVisibility() else 0
+    if min_scale > 0 and not 0 < user_limit <= min_scale:
+        layer.setMinimumScale(min_scale)
+        layer.setScaleBasedVisibility(True)
+    return True